@@ -30,6 +30,8 @@
         'views/farm_field_wizard_views.xml',
         'views/farm_row_wizard_views.xml',
         'views/farm_tree_wizard_views.xml',
+        'views/farm_payroll_wizard_views.xml',
+        'views/farm_cooler_reading_wizard_views.xml',
         'views/farm_field_views.xml',
         'views/farm_parcel_views.xml',
         'views/farm_row_views.xml',
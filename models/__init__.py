@@ -1,3 +1,13 @@
+from . import farm_cash_ledger
+from . import farm_expense_report_source
+from . import farm_cost_cube
+from . import farm_code_sequence
+from . import farm_tree_scope
+from . import farm_operation_mixin
+from . import farm_operation_worker
+from . import farm_high_volume
+from . import farm_stock_availability
+from . import farm_stock_consumption
 from . import farm_field
 from . import farm_parcel
 from . import farm_row
@@ -6,8 +16,12 @@ from . import farm_variety
 from . import farm_disease
 from . import farm_pallet
 from . import farm_cooler
+from . import farm_cooler_slot
+from . import farm_cooler_reading
 from . import farm_operations
+from . import farm_pallet_occupancy
 from . import farm_worker
+from . import farm_worker_period
 from . import farm_meter
 from . import farm_resource
 from . import farm_document
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import defaultdict
+
+from odoo import models, fields, api, tools
+from odoo.tools import float_compare
+
+_logger = logging.getLogger(__name__)
+
+# Kassaya mədaxil kimi düşən əməliyyat növləri
+INCOME_TYPES = ('income', 'subsidy', 'debt')
+
+
+class FarmCashLedger(models.Model):
+    """Kassa Reyestri - mənbə model və əməliyyat növü üzrə yığılmış balans"""
+    _name = 'farm.cash.ledger'
+    _description = 'Kassa Reyestri'
+    _order = 'source_model, transaction_type'
+
+    source_model = fields.Char('Mənbə Model', required=True, readonly=True, index=True)
+    transaction_type = fields.Selection([
+        ('income', 'Mədaxil'),
+        ('expense', 'Məxaric'),
+        ('subsidy', 'Subsidiya'),
+        ('debt', 'Borc')
+    ], string='Növ', required=True, readonly=True)
+    amount = fields.Float('Məbləğ', readonly=True)
+    record_count = fields.Integer('Qeyd Sayı', readonly=True)
+
+    _sql_constraints = [
+        ('source_type_unique', 'unique(source_model, transaction_type)',
+         'Hər mənbə model və növ üçün yalnız bir reyestr sətri ola bilər!'),
+    ]
+
+    @api.model
+    def _apply(self, deltas):
+        """Dəyişiklikləri {(model, növ): [məbləğ, say]} şəklində reyestrə tətbiq edir"""
+        rows = [
+            (source_model, transaction_type, amount, count)
+            for (source_model, transaction_type), (amount, count) in deltas.items()
+            if amount or count
+        ]
+        if not rows:
+            return
+        for source_model, transaction_type, amount, count in rows:
+            # Sətir səviyyəsində kilid - paralel yazılar yalnız eyni sətirdə gözləyir
+            self.env.cr.execute("""
+                INSERT INTO farm_cash_ledger
+                    (source_model, transaction_type, amount, record_count,
+                     create_uid, create_date, write_uid, write_date)
+                VALUES (%s, %s, %s, %s, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')
+                ON CONFLICT (source_model, transaction_type) DO UPDATE
+                SET amount = farm_cash_ledger.amount + EXCLUDED.amount,
+                    record_count = farm_cash_ledger.record_count + EXCLUDED.record_count,
+                    write_uid = EXCLUDED.write_uid,
+                    write_date = EXCLUDED.write_date
+            """, (source_model, transaction_type, amount, count, self.env.uid, self.env.uid))
+        self.invalidate_model(['amount', 'record_count', 'write_uid', 'write_date'])
+
+    @api.model
+    def _get_totals(self):
+        """Reyestrin bütün sətirlərini {(model, növ): məbləğ} şəklində qaytarır"""
+        self.env.cr.execute("SELECT source_model, transaction_type, amount FROM farm_cash_ledger")
+        return {(source_model, transaction_type): amount
+                for source_model, transaction_type, amount in self.env.cr.fetchall()}
+
+    @api.model
+    def get_total_income(self):
+        """Reyestrdən ümumi mədaxil"""
+        return sum(amount for (_model, ttype), amount in self._get_totals().items()
+                   if ttype in INCOME_TYPES)
+
+    @api.model
+    def get_total_expense(self, source_models=None):
+        """Reyestrdən ümumi məxaric (istəyə görə yalnız verilmiş modellər üzrə)"""
+        return sum(amount for (model, ttype), amount in self._get_totals().items()
+                   if ttype == 'expense' and (source_models is None or model in source_models))
+
+    @api.model
+    def get_balance(self):
+        """Reyestrdən cari balans - bir SUM sorğusu ilə"""
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(CASE WHEN transaction_type IN %s THEN amount ELSE -amount END), 0)
+            FROM farm_cash_ledger
+        """, (INCOME_TYPES,))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _source_models(self):
+        """Reyestrə yazan bütün modellərin adları"""
+        return [
+            name for name, model_class in self.env.registry.items()
+            if getattr(model_class, '_cash_ledger_source', False)
+            and not model_class._abstract and not model_class._transient
+        ]
+
+    @tools.ormcache()
+    def _cascade_map(self):
+        """Kaskadla silinən və reyestrə təsir edən əlaqələr: {valideyn: [(model, sahə)]}"""
+        edges = defaultdict(list)
+        for name in self.env.registry:
+            for field in self.env[name]._fields.values():
+                if field.type == 'many2one' and field.store and field.ondelete == 'cascade':
+                    edges[field.comodel_name].append((name, field.name))
+
+        # Yalnız yolu reyestr mənbəyinə çıxan modelləri saxla
+        relevant = set(self._source_models())
+        changed = True
+        while changed:
+            changed = False
+            for parent, children in edges.items():
+                if parent not in relevant and any(child in relevant for child, _f in children):
+                    relevant.add(parent)
+                    changed = True
+        return {
+            parent: tuple((child, field_name) for child, field_name in children if child in relevant)
+            for parent, children in edges.items()
+            if parent in relevant
+        }
+
+    @api.model
+    def _detach_cascaded(self, records, visited=None):
+        """Valideyn qeydlərlə birlikdə bazada kaskadla silinəcək mənbələri reyestrdən çıxarır"""
+        # Bir qeyd bir neçə valideyn yolu ilə tapıla bilər - iki dəfə çıxarmamaq üçün
+        visited = defaultdict(set) if visited is None else visited
+        if not records:
+            return
+        for child_model, field_name in self._cascade_map().get(records._name, ()):
+            children = self.env[child_model].with_context(active_test=False).search([
+                (field_name, 'in', records.ids),
+                ('id', 'not in', list(visited[child_model])),
+            ])
+            if not children:
+                continue
+            visited[child_model].update(children.ids)
+            if getattr(children, '_cash_ledger_source', False):
+                self._apply(children._cash_ledger_deltas(-1))
+            self._detach_cascaded(children, visited)
+
+    @api.model
+    def _reconcile(self):
+        """Reyestri bütün mənbə cədvəllərindən tam yenidən hesablayır və fərqləri qaytarır"""
+        expected = defaultdict(lambda: [0.0, 0])
+        for model_name in self._source_models():
+            model = self.env[model_name].with_context(active_test=False)
+            for batch in tools.split_every(1000, model.search([]).ids, model.browse):
+                for key, (amount, count) in batch._cash_ledger_deltas().items():
+                    expected[key][0] += amount
+                    expected[key][1] += count
+                batch.invalidate_recordset()
+
+        self.env.cr.execute("SELECT source_model, transaction_type, amount, record_count FROM farm_cash_ledger")
+        current = {(row[0], row[1]): (row[2], row[3]) for row in self.env.cr.fetchall()}
+
+        differences = []
+        for key in set(expected) | set(current):
+            expected_amount, expected_count = expected.get(key, (0.0, 0))
+            current_amount, current_count = current.get(key, (0.0, 0))
+            if float_compare(expected_amount, current_amount, precision_digits=2) or expected_count != current_count:
+                differences.append({
+                    'source_model': key[0],
+                    'transaction_type': key[1],
+                    'ledger_amount': current_amount,
+                    'actual_amount': expected_amount,
+                    'ledger_count': current_count,
+                    'actual_count': expected_count,
+                })
+
+        self.env.cr.execute("DELETE FROM farm_cash_ledger")
+        self.invalidate_model()
+        self._apply(expected)
+
+        for diff in differences:
+            _logger.warning(
+                "Kassa reyestri uyğunsuzluğu %(source_model)s/%(transaction_type)s: "
+                "reyestr %(ledger_amount).2f (%(ledger_count)s), faktiki %(actual_amount).2f (%(actual_count)s)",
+                diff,
+            )
+        return differences
+
+    @api.model
+    def _cron_reconcile(self):
+        """Planlaşdırılmış üzləşmə"""
+        self._reconcile()
+
+
+class FarmCashLedgerMixin(models.AbstractModel):
+    """Kassa balansına təsir edən modellər üçün mixin"""
+    _name = 'farm.cash.ledger.mixin'
+    _description = 'Kassa Reyestri Mənbəyi'
+
+    _cash_ledger_source = True
+    # Qeydin reyestrə düşdüyü növ
+    _cash_ledger_type = 'expense'
+    # Məbləğ sahəsi
+    _cash_ledger_amount_field = 'amount'
+    # Boş olduqda qeyd balansa daxil edilmir (xərc hesabatındakı şərtlərlə eyni)
+    _cash_ledger_required_fields = ()
+    # Dəyişdikdə reyestrin yenilənməsini tələb edən əlavə sahələr
+    _cash_ledger_trigger_fields = ()
+
+    def _cash_ledger_entry(self):
+        """Qeydin kassaya təsiri: (növ, məbləğ) və ya balansa daxil deyilsə None"""
+        self.ensure_one()
+        if not all(self[name] for name in self._cash_ledger_required_fields):
+            return None
+        return self._cash_ledger_type, self[self._cash_ledger_amount_field]
+
+    def _cash_ledger_deltas(self, sign=1):
+        """Qeydlərin reyestrə təsirini {(model, növ): [məbləğ, say]} şəklində toplayır"""
+        deltas = defaultdict(lambda: [0.0, 0])
+        for record in self:
+            entry = record._cash_ledger_entry()
+            if entry:
+                transaction_type, amount = entry
+                delta = deltas[(self._name, transaction_type)]
+                delta[0] += sign * (amount or 0.0)
+                delta[1] += sign
+        return deltas
+
+    def _cash_ledger_expense_total(self):
+        """Qeydlərin kassadan çıxan ümumi məbləği"""
+        total = 0.0
+        for record in self:
+            entry = record._cash_ledger_entry()
+            if entry and entry[0] == 'expense' and entry[1] > 0:
+                total += entry[1]
+        return total
+
+    def _check_cash_balance(self):
+        """Bütün qeydlərin cəmini balansla bir dəfə yoxlayır
+
+        Toplu yaradılma/yazı zamanı qeydlər reyestrdə olmur, ona görə
+        cəm məbləğ balansdan çox olmamalıdır.
+        """
+        total = self._cash_ledger_expense_total()
+        if total > 0:
+            self.env['farm.cash.flow'].check_expense_balance(total, self._name, self.ids)
+
+    def _cash_ledger_triggers(self):
+        return ({self._cash_ledger_amount_field}
+                | set(self._cash_ledger_required_fields)
+                | set(self._cash_ledger_trigger_fields))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['farm.cash.ledger']._apply(records._cash_ledger_deltas())
+        return records
+
+    def write(self, vals):
+        if not self._cash_ledger_triggers().intersection(vals):
+            return super().write(vals)
+        # Köhnə təsiri yazıdan əvvəl çıxarırıq ki, balans yoxlanışları qeydin özünü saymasın
+        ledger = self.env['farm.cash.ledger']
+        ledger._apply(self._cash_ledger_deltas(-1))
+        result = super().write(vals)
+        ledger._apply(self._cash_ledger_deltas())
+        return result
+
+    def unlink(self):
+        ledger = self.env['farm.cash.ledger']
+        ledger._apply(self._cash_ledger_deltas(-1))
+        ledger._detach_cascaded(self)
+        return super().unlink()
+
+
+class FarmCashLedgerCascadeMixin(models.AbstractModel):
+    """Silinməsi kassa mənbələrini kaskadla silən modellər üçün mixin"""
+    _name = 'farm.cash.ledger.cascade.mixin'
+    _description = 'Kassa Reyestri Kaskad Valideyni'
+
+    def unlink(self):
+        self.env['farm.cash.ledger']._detach_cascaded(self)
+        return super().unlink()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+from odoo import models, api
+from odoo.exceptions import UserError
+
+
+class FarmCodeSequenceMixin(models.AbstractModel):
+    """Kodları ir.sequence ardıcıllığından ayıran modellər üçün mixin
+
+    Standart ardıcıllıqlar PostgreSQL sequence üzərində işləyir - paralel
+    işçilər bir-birini gözləmir və eyni kodu ala bilmir. Toplu yaradılmada
+    bütün kodlar bir sorğu ilə blok şəklində ayrılır.
+    """
+    _name = 'farm.code.sequence.mixin'
+    _description = 'Kod Ardıcıllığı'
+
+    # Kodun yazıldığı sahə
+    _code_field = 'code'
+    # ir.sequence kodu
+    _code_sequence = None
+
+    @api.model
+    def _get_code_sequence(self):
+        sequence = self.env['ir.sequence'].sudo().search([('code', '=', self._code_sequence)], limit=1)
+        if not sequence:
+            raise UserError(f'"{self._code_sequence}" ardıcıllığı tapılmadı!')
+        return sequence
+
+    @api.model
+    def _allocate_codes(self, count):
+        """Ardıcıllıqdan bir dəfəyə `count` sayda kod ayırır"""
+        if count <= 0:
+            return []
+        sequence = self._get_code_sequence()
+        if sequence.implementation != 'standard':
+            return [sequence.next_by_id() for _i in range(count)]
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            ['ir_sequence_%03d' % sequence.id, count],
+        )
+        return [sequence.get_next_char(number) for number, in self.env.cr.fetchall()]
+
+    @api.model
+    def _assign_codes(self, vals_list):
+        """Kodu verilməmiş dəyərlərə kod təyin edir"""
+        missing = [vals for vals in vals_list if not vals.get(self._code_field)]
+        for vals, code in zip(missing, self._allocate_codes(len(missing))):
+            vals[self._code_field] = code
+
+    @api.model
+    def _sync_code_sequence(self):
+        """Ardıcıllığı mövcud kodların ən böyüyündən sonraya çəkir"""
+        sequence = self._get_code_sequence()
+        self.flush_model([self._code_field])
+        self.env.cr.execute(
+            "SELECT MAX(substring(%s from %%s)::bigint) FROM %s" % (self._code_field, self._table),
+            ['^%s([0-9]+)$' % re.escape(sequence.prefix or '')],
+        )
+        last_number = self.env.cr.fetchone()[0] or 0
+        if last_number >= sequence.number_next_actual:
+            sequence.write({'number_next': last_number + 1})
+
+    @api.model
+    def _sync_code_sequences(self):
+        """Bütün kod ardıcıllıqlarını mövcud məlumatlarla uyğunlaşdırır"""
+        for name, model_class in self.env.registry.items():
+            if getattr(model_class, '_code_sequence', None) and not model_class._abstract:
+                self.env[name]._sync_code_sequence()
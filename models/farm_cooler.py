@@ -1,22 +1,45 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 
+# Yer təklifində soyuducunun hədəf temperaturu ilə məhsul temperaturu arasında icazə verilən fərq (°C)
+TEMPERATURE_TOLERANCE = 2.0
+
 
 class FarmCooler(models.Model):
     _name = 'farm.cooler'
     _description = 'Soyuducu'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.code.sequence.mixin']
     _order = 'cooler_code'
 
+    _expense_report_trigger_fields = ()
+    _code_field = 'cooler_code'
+    _code_sequence = 'farm.cooler.code'
+
     name = fields.Char('Soyuducu Adı')
     cooler_code = fields.Char('Soyuducu Kodu', copy=False, readonly=True)
     
     # Tutum məlumatları
     capacity_kg = fields.Float('Tutum (kq)', default=5.0)
+    # Palet reyestri dəyişdikcə artımla yenilənir (farm.pallet.occupancy)
+    current_load_kg = fields.Float('Hazırkı Yük (kq)', readonly=True, copy=False)
+    free_capacity_kg = fields.Float('Boş Tutum (kq)', compute='_compute_free_capacity')
+    load_percent = fields.Float('Doluluq (%)', compute='_compute_free_capacity')
+
+    # Palet yerləri: bölmələr 1..N, hər bölmədə yerlər 1..M
+    section_count = fields.Integer('Bölmə Sayı', default=0)
+    positions_per_section = fields.Integer('Bölmədə Yer Sayı', default=0)
+    slot_ids = fields.One2many('farm.cooler.slot', 'cooler_id', string='Palet Yerləri')
+    free_slot_count = fields.Integer('Boş Yer Sayı', compute='_compute_free_slot_count')
 
     # Temperatura nəzarət
     target_temperature = fields.Float('Hədəf Temperatura (°C)', default=4.0)
     current_temperature = fields.Float('Hazırkı Temperatura (°C)')
+    # Son sensor ölçməsi (farm.cooler.reading)
+    current_humidity = fields.Float('Hazırkı Rütubət (%)', readonly=True, copy=False)
+    last_reading_time = fields.Datetime('Son Ölçmə Vaxtı', readonly=True, copy=False)
 
     # Status
     status = fields.Selection([
@@ -24,6 +47,79 @@ class FarmCooler(models.Model):
         ('passive', 'Passiv')
     ], string='Status', default='active', required=True)
 
+    # Soyuducudakı paletlər (reyestr)
+    occupancy_ids = fields.One2many('farm.pallet.occupancy', 'cooler_id', string='Soyuducudakı Paletlər')
+    stored_pallet_count = fields.Integer('Palet Sayı', compute='_compute_stored_pallet_count')
+
+    def _compute_stored_pallet_count(self):
+        counts = dict(self.env['farm.pallet.occupancy']._read_group(
+            [('cooler_id', 'in', self.ids)], ['cooler_id'], ['__count']))
+        for cooler in self:
+            cooler.stored_pallet_count = counts.get(cooler, 0)
+
+    @api.depends('capacity_kg', 'current_load_kg')
+    def _compute_free_capacity(self):
+        for cooler in self:
+            cooler.free_capacity_kg = cooler.capacity_kg - cooler.current_load_kg
+            cooler.load_percent = cooler.capacity_kg and cooler.current_load_kg * 100.0 / cooler.capacity_kg
+
+    def _compute_free_slot_count(self):
+        counts = dict(self.env['farm.cooler.slot']._read_group(
+            [('cooler_id', 'in', self.ids), ('occupied', '=', False)], ['cooler_id'], ['__count']))
+        for cooler in self:
+            cooler.free_slot_count = counts.get(cooler, 0)
+
+    def action_view_pallets(self):
+        """Soyuducudakı paletlər"""
+        return {
+            'name': 'Soyuducudakı Paletlər',
+            'type': 'ir.actions.act_window',
+            'view_mode': 'list',
+            'res_model': 'farm.pallet.occupancy',
+            'domain': [('cooler_id', '=', self.id)],
+        }
+
+    def action_view_slots(self):
+        """Soyuducunun palet yerləri"""
+        return {
+            'name': 'Palet Yerləri',
+            'type': 'ir.actions.act_window',
+            'view_mode': 'list',
+            'res_model': 'farm.cooler.slot',
+            'domain': [('cooler_id', '=', self.id)],
+            'context': {'search_default_free_slots': 1},
+        }
+
+    def action_view_readings(self):
+        """Soyuducunun temperatura və rütubət tarixçəsi (saatlıq/günlük yekunlar)"""
+        return {
+            'name': 'Temperatura Tarixçəsi',
+            'type': 'ir.actions.act_window',
+            'view_mode': 'graph,list',
+            'res_model': 'farm.cooler.reading.rollup',
+            'domain': [('cooler_id', '=', self.id)],
+            'context': {'search_default_hourly': 1},
+        }
+
+    @api.model
+    def _update_current_conditions(self, cooler_ids):
+        """Hazırkı temperatura və rütubəti soyuducunun ən son ölçməsindən götürür"""
+        if not cooler_ids:
+            return
+        self.env['farm.cooler.reading'].flush_model()
+        self.env.cr.execute("""
+            UPDATE farm_cooler c
+            SET current_temperature = r.temperature, current_humidity = r.humidity,
+                last_reading_time = r.reading_time
+            FROM unnest(%s::int[]) AS k(id)
+            CROSS JOIN LATERAL (
+                SELECT reading_time, temperature, humidity FROM farm_cooler_reading
+                WHERE cooler_id = k.id ORDER BY reading_time DESC LIMIT 1
+            ) r
+            WHERE c.id = k.id AND (c.last_reading_time IS NULL OR c.last_reading_time < r.reading_time)
+        """, [list(cooler_ids)])
+        self.invalidate_model(['current_temperature', 'current_humidity', 'last_reading_time'])
+
     def name_get(self):
         """Override name_get for custom display name"""
         result = []
@@ -41,24 +137,33 @@ class FarmCooler(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
+        # Soyuducu kodu SOY001, SOY002, SOY003... formatında ardıcıllıqdan ayrılır
+        self._assign_codes(vals_list)
         for vals in vals_list:
-            if not vals.get('cooler_code'):
-                # Soyuducu kodu SOY001, SOY002, SOY003... formatında generasiya et
-                last_cooler = self.search([('cooler_code', 'like', 'SOY%')], order='cooler_code desc', limit=1)
-                if last_cooler and last_cooler.cooler_code:
-                    try:
-                        # "SOY001" formatından nömrəni çıxar
-                        number = int(last_cooler.cooler_code.replace('SOY', '')) + 1
-                        vals['cooler_code'] = f'SOY{number:03d}'
-                    except ValueError:
-                        vals['cooler_code'] = 'SOY001'
-                else:
-                    vals['cooler_code'] = 'SOY001'
-
             # Default ad ver
             if not vals.get('name') and vals.get('cooler_code'):
                 vals['name'] = vals['cooler_code']
-        return super().create(vals_list)
+        coolers = super().create(vals_list)
+        coolers._generate_slots()
+        return coolers
+
+    def write(self, vals):
+        result = super().write(vals)
+        if {'section_count', 'positions_per_section'}.intersection(vals):
+            self._generate_slots()
+        return result
+
+    def unlink(self):
+        # Soyuducu ilə kaskadla silinən soyuducu anbarı qeydlərinin işçi sətirləri
+        storages = self.env['farm.cold.storage'].with_context(active_test=False).search(
+            [('cooler_id', 'in', self.ids)])
+        self.env['farm.operation.worker']._remove_operations(storages)
+        return super().unlink()
+
+    def _expense_report_keys(self):
+        """Soyuducu ilə kaskadla silinən soyuducu anbarı qeydlərinin sətirləri"""
+        return self.env['farm.cold.storage'].with_context(active_test=False).search(
+            [('cooler_id', 'in', self.ids)])._expense_report_keys()
 
     @api.constrains('capacity_kg')
     def _check_capacity(self):
@@ -66,6 +171,164 @@ class FarmCooler(models.Model):
             if record.capacity_kg <= 0:
                 raise ValidationError('Tutum müsbət olmalıdır!')
 
+    @api.constrains('section_count', 'positions_per_section')
+    def _check_slot_grid(self):
+        for record in self:
+            if record.section_count < 0 or record.positions_per_section < 0:
+                raise ValidationError('Bölmə və yer sayı mənfi ola bilməz!')
+
+    def _generate_slots(self):
+        """Bölmə/yer sayına görə palet yerlərini yaradır, şəbəkədən kənarda qalan boş yerləri silir"""
+        if not self:
+            return
+        cr = self.env.cr
+        self.flush_recordset(['section_count', 'positions_per_section'])
+        self.env['farm.pallet.occupancy'].flush_model()
+        cr.execute("""
+            SELECT 1 FROM farm_cooler_slot sl
+            JOIN farm_cooler c ON c.id = sl.cooler_id
+            WHERE sl.cooler_id = ANY(%s) AND sl.occupied
+              AND (sl.section::int > COALESCE(c.section_count, 0)
+                   OR sl.position::int > COALESCE(c.positions_per_section, 0))
+            LIMIT 1
+        """, [self.ids])
+        if cr.fetchone():
+            raise ValidationError('Paletlə dolu olan yerlər silinə bilməz!')
+        cr.execute("""
+            DELETE FROM farm_cooler_slot sl
+            USING farm_cooler c
+            WHERE c.id = sl.cooler_id AND sl.cooler_id = ANY(%s)
+              AND (sl.section::int > COALESCE(c.section_count, 0)
+                   OR sl.position::int > COALESCE(c.positions_per_section, 0))
+        """, [self.ids])
+        cr.execute("""
+            INSERT INTO farm_cooler_slot (cooler_id, section, position, sequence, occupied)
+            SELECT c.id, s::varchar, p::varchar, s * 10000 + p,
+                   EXISTS (SELECT 1 FROM farm_pallet_occupancy o
+                           WHERE o.cooler_id = c.id AND o.storage_section = s::varchar
+                             AND o.storage_position = p::varchar)
+            FROM farm_cooler c
+            CROSS JOIN LATERAL generate_series(1, COALESCE(c.section_count, 0)) AS s
+            CROSS JOIN LATERAL generate_series(1, COALESCE(c.positions_per_section, 0)) AS p
+            WHERE c.id = ANY(%s)
+            ON CONFLICT (cooler_id, section, position) DO NOTHING
+        """, [self.ids])
+        self.env['farm.cooler.slot'].invalidate_model()
+
+    @api.model
+    def _apply_occupancy_changes(self, removed, inserted):
+        """Palet reyestrindən silinən/əlavə olunan sətirlərə görə yükü və yerlərin doluluğunu yeniləyir
+
+        removed/inserted - (cooler_id, bölmə, nömrə, miqdar) sətirləri.
+        """
+        cr = self.env.cr
+        loads = defaultdict(float)
+        slots = {}
+        for rows, sign in ((removed, -1), (inserted, 1)):
+            for cooler_id, section, position, quantity in rows:
+                if not cooler_id:
+                    continue
+                loads[cooler_id] += sign * (quantity or 0.0)
+                if section and position:
+                    slots[cooler_id, section, position] = sign > 0
+        loads = {cooler_id: delta for cooler_id, delta in loads.items() if delta}
+        if loads:
+            cr.execute("""
+                UPDATE farm_cooler c SET current_load_kg = COALESCE(c.current_load_kg, 0) + data.delta
+                FROM unnest(%s::int[], %s::float[]) AS data(id, delta)
+                WHERE c.id = data.id
+            """, [list(loads), list(loads.values())])
+            self.invalidate_model(['current_load_kg'])
+        if slots:
+            cooler_ids, sections, positions = zip(*slots)
+            cr.execute("""
+                UPDATE farm_cooler_slot sl SET occupied = data.occupied
+                FROM unnest(%s::int[], %s::varchar[], %s::varchar[], %s::bool[])
+                     AS data(cooler_id, section, position, occupied)
+                WHERE sl.cooler_id = data.cooler_id AND sl.section = data.section
+                  AND sl.position = data.position
+            """, [list(cooler_ids), list(sections), list(positions), list(slots.values())])
+            self.env['farm.cooler.slot'].invalidate_model(['occupied'])
+
+    @api.model
+    def _reconcile_occupancy(self):
+        """Yükü və yerlərin doluluğunu palet reyestrindən tam yenidən hesablayır"""
+        cr = self.env.cr
+        cr.execute("""
+            UPDATE farm_cooler c SET current_load_kg = data.load
+            FROM (SELECT c2.id, COALESCE(SUM(o.quantity_kg), 0) AS load
+                  FROM farm_cooler c2
+                  LEFT JOIN farm_pallet_occupancy o ON o.cooler_id = c2.id
+                  GROUP BY c2.id) data
+            WHERE c.id = data.id AND c.current_load_kg IS DISTINCT FROM data.load
+        """)
+        cr.execute("""
+            UPDATE farm_cooler_slot sl SET occupied = data.occupied
+            FROM (SELECT s.id, EXISTS (SELECT 1 FROM farm_pallet_occupancy o
+                                       WHERE o.cooler_id = s.cooler_id AND o.storage_section = s.section
+                                         AND o.storage_position = s.position) AS occupied
+                  FROM farm_cooler_slot s) data
+            WHERE sl.id = data.id AND sl.occupied IS DISTINCT FROM data.occupied
+        """)
+        self.invalidate_model(['current_load_kg'])
+        self.env['farm.cooler.slot'].invalidate_model(['occupied'])
+
+    @api.model
+    def _cron_reconcile_occupancy(self):
+        """Gecəlik üzləşdirmə - yük və yer doluluğu palet reyestri ilə müqayisə edilir"""
+        self._reconcile_occupancy()
+
+    @api.model
+    def _propose_slots(self, requests, coolers=None, released=None):
+        """Gələn paletlər üçün soyuducu və yer təklif edir
+
+        requests - (miqdar kq, temperatura və ya None) cütləri. Hər palet üçün
+        (soyuducu, bölmə, nömrə) və ya yer tapılmadıqda False qaytarılır.
+        released - {soyuducu: kq}, yeri dəyişəcək paletlərin artıq yükə daxil olan miqdarı.
+        Soyuducular bir dəfə oxunur, boş yerlər qismən indekslə soyuducu başına
+        bir sorğu ilə gətirilir; hər palet üçün seçim yaddaşda aparılır.
+        """
+        if coolers is None:
+            coolers = self.search([('status', '=', 'active')])
+        coolers = coolers.filtered(lambda c: c.status == 'active')
+        released = released or {}
+        free_kg = {cooler: cooler.free_capacity_kg + released.get(cooler, 0.0) for cooler in coolers}
+        free_slots = {}
+        limit = len(requests)
+
+        def next_slot(cooler):
+            if cooler not in free_slots:
+                self.env.cr.execute("""
+                    SELECT section, position FROM farm_cooler_slot
+                    WHERE cooler_id = %s AND NOT occupied
+                    ORDER BY sequence LIMIT %s
+                """, [cooler.id, limit])
+                free_slots[cooler] = self.env.cr.fetchall()[::-1]
+            return free_slots[cooler]
+
+        self.env['farm.cooler.slot'].flush_model()
+        proposals = []
+        for quantity, temperature in requests:
+            best = None
+            for cooler in coolers:
+                if free_kg[cooler] < quantity:
+                    continue
+                deviation = 0.0 if temperature is None else abs(cooler.target_temperature - temperature)
+                if deviation > TEMPERATURE_TOLERANCE or not next_slot(cooler):
+                    continue
+                # Əvvəl temperaturu ən yaxın, sonra boş tutumu ən az qalan (sıx yerləşdirmə)
+                key = (deviation, free_kg[cooler] - quantity)
+                if best is None or key < best[0]:
+                    best = (key, cooler)
+            if best is None:
+                proposals.append(False)
+                continue
+            cooler = best[1]
+            free_kg[cooler] -= quantity
+            section, position = free_slots[cooler].pop()
+            proposals.append((cooler, section, position))
+        return proposals
+
     @api.constrains('target_temperature')
     def _check_temperature(self):
         for record in self:
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, time, timedelta, timezone
+
+from odoo import models, fields, api, tools
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Sensor şlüzünün CSV/JSON fayllarını qoyduğu qovluq (boşdursa şlüz oxunmur)
+GATEWAY_PATH_PARAM = 'farm_agriculture_v2.sensor_gateway_path'
+# Saxlama müddəti (gün): xam ölçmələr və saatlıq yekunlar; günlük yekunlar silinmir
+RAW_RETENTION_PARAM = 'farm_agriculture_v2.cooler_reading_retention_days'
+HOURLY_RETENTION_PARAM = 'farm_agriculture_v2.cooler_reading_hourly_retention_days'
+DEFAULT_RAW_RETENTION_DAYS = 90
+DEFAULT_HOURLY_RETENTION_DAYS = 730
+# Bir INSERT sorğusundakı ölçmə sayı
+INGEST_BATCH_SIZE = 10000
+READING_FORMATS = ('csv', 'json')
+
+
+class FarmCoolerReading(models.Model):
+    """Soyuducu sensor ölçmələri (temperatura və rütubət)
+
+    Cədvəl yalnız əlavə olunur: ölçmələr dəyişdirilmir, köhnələri saxlama
+    müddətindən sonra toplu silinir. Ölçmələr toplu əlavə edildikcə
+    saatlıq və günlük yekunlar yalnız təsirlənən dövrlər üçün yenilənir.
+    """
+    _name = 'farm.cooler.reading'
+    _description = 'Soyuducu Ölçməsi'
+    _order = 'reading_time desc'
+    _log_access = False
+
+    cooler_id = fields.Many2one('farm.cooler', string='Soyuducu', required=True, readonly=True, ondelete='cascade')
+    reading_time = fields.Datetime('Ölçmə Vaxtı', required=True, readonly=True)
+    temperature = fields.Float('Temperatura (°C)', readonly=True, aggregator='avg')
+    humidity = fields.Float('Rütubət (%)', readonly=True, aggregator='avg')
+
+    _sql_constraints = [
+        # Eyni faylın təkrar yüklənməsində ölçmələr ikiləşmir
+        ('reading_unique', 'unique(cooler_id, reading_time)', 'Bu soyuducu üçün bu vaxtda ölçmə artıq mövcuddur!'),
+    ]
+
+    def init(self):
+        # Vaxt sırası ilə əlavə olunan cədvəldə BRIN indeksi kiçikdir - saxlama silinməsi üçün
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS farm_cooler_reading_time_brin
+            ON farm_cooler_reading USING brin (reading_time)
+        """)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        readings = super().create(vals_list)
+        self.env['farm.cooler.reading.rollup']._refresh(
+            {(reading.cooler_id.id, reading.reading_time) for reading in readings})
+        self.env['farm.cooler']._update_current_conditions(readings.cooler_id.ids)
+        return readings
+
+    def write(self, vals):
+        raise UserError('Soyuducu ölçmələri dəyişdirilə bilməz!')
+
+    @api.model
+    def _retention_cutoff(self, param, default_days):
+        """Saxlama həddi - günün başlanğıcı, ki silinən və yekunlaşdırılan dövrlər tam günlər olsun"""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(param, default_days))
+        return datetime.combine(fields.Date.today(), time.min) - timedelta(days=days)
+
+    @api.model
+    def _ingest(self, rows):
+        """Ölçmələri toplu əlavə edir, əlavə olunanların sayını qaytarır
+
+        rows - (soyuducu id, vaxt, temperatura, rütubət) sətirləri. Təkrarlanan
+        ölçmələr və xam saxlama müddətindən köhnə ölçmələr ötürülür (onların
+        saatı artıq yekunlaşdırılıb və xam ölçmələri silinib).
+        """
+        cutoff = self._retention_cutoff(RAW_RETENTION_PARAM, DEFAULT_RAW_RETENTION_DAYS)
+        rows = [row for row in rows if row[1] >= cutoff]
+        if not rows:
+            return 0
+        self.flush_model()
+        cr = self.env.cr
+        inserted = set()
+        for batch in tools.split_every(INGEST_BATCH_SIZE, rows):
+            cooler_ids, times, temperatures, humidities = zip(*batch)
+            cr.execute("""
+                INSERT INTO farm_cooler_reading (cooler_id, reading_time, temperature, humidity)
+                SELECT * FROM unnest(%s::int[], %s::timestamp[], %s::float[], %s::float[])
+                ON CONFLICT (cooler_id, reading_time) DO NOTHING
+                RETURNING cooler_id, reading_time
+            """, [list(cooler_ids), list(times), list(temperatures), list(humidities)])
+            inserted.update(cr.fetchall())
+        self.invalidate_model()
+        if inserted:
+            self.env['farm.cooler.reading.rollup']._refresh(inserted)
+            self.env['farm.cooler']._update_current_conditions({cooler_id for cooler_id, _time in inserted})
+        return len(inserted)
+
+    @api.model
+    def _parse_time(self, value):
+        """ISO vaxtı UTC (saat qurşaqsız) vaxta çevirir"""
+        value = datetime.fromisoformat(str(value).strip())
+        if value.tzinfo:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    @api.model
+    def _parse_rows(self, content, file_format):
+        """CSV/JSON ölçmələrini oxuyur: (soyuducu id, vaxt, temperatura, rütubət)
+
+        Sütunlar/açarlar: cooler (soyuducu kodu), time, temperature, humidity.
+        JSON siyahı və ya {"readings": [...]} ola bilər.
+        """
+        if isinstance(content, bytes):
+            content = content.decode('utf-8-sig')
+        if file_format == 'csv':
+            records = list(csv.DictReader(io.StringIO(content)))
+        elif file_format == 'json':
+            records = json.loads(content)
+            if isinstance(records, dict):
+                records = records.get('readings', [])
+        else:
+            raise UserError('Ölçmə faylı CSV və ya JSON formatında olmalıdır!')
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise UserError('JSON ölçmələri obyektlər siyahısı olmalıdır!')
+
+        codes = {str(record.get('cooler') or '').strip() for record in records}
+        coolers = {
+            cooler['cooler_code']: cooler['id']
+            for cooler in self.env['farm.cooler'].search_read([('cooler_code', 'in', list(codes))], ['cooler_code'])
+        }
+        unknown = sorted(codes - set(coolers))
+        if unknown:
+            raise UserError('Naməlum soyuducu kodları: %s' % ', '.join(unknown))
+
+        rows = []
+        for number, record in enumerate(records, 1):
+            try:
+                humidity = record.get('humidity')
+                rows.append((
+                    coolers[str(record['cooler']).strip()],
+                    self._parse_time(record['time']),
+                    float(record['temperature']),
+                    float(humidity) if humidity not in (None, '') else None,
+                ))
+            except (KeyError, TypeError, ValueError):
+                raise UserError(f'{number}-ci ölçmə sətri yanlışdır: {record}')
+        return rows
+
+    @api.model
+    def _cron_ingest_gateway(self):
+        """Sensor şlüzünün qovluğundakı faylları yükləyir
+
+        Yüklənən fayl 'processed', oxuna bilməyən fayl 'failed' alt qovluğuna
+        köçürülür. Hər fayldan sonra commit edilir - köçürmədən əvvəl dayanarsa,
+        təkrar yükləmədə ölçmələr ikiləşmir.
+        """
+        path = self.env['ir.config_parameter'].sudo().get_param(GATEWAY_PATH_PARAM)
+        if not path or not os.path.isdir(path):
+            return
+        for name in sorted(os.listdir(path)):
+            file_format = os.path.splitext(name)[1].lower().lstrip('.')
+            file_path = os.path.join(path, name)
+            if file_format not in READING_FORMATS or not os.path.isfile(file_path):
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    with open(file_path, 'rb') as reading_file:
+                        count = self._ingest(self._parse_rows(reading_file.read(), file_format))
+            except (UserError, ValueError) as error:
+                _logger.warning('Sensor faylı yüklənmədi %s: %s', name, error)
+                target = os.path.join(path, 'failed')
+            else:
+                _logger.info('Sensor faylı yükləndi %s: %s ölçmə', name, count)
+                self.env.cr.commit()
+                target = os.path.join(path, 'processed')
+            os.makedirs(target, exist_ok=True)
+            shutil.move(file_path, os.path.join(target, name))
+
+    @api.model
+    def _cron_apply_retention(self):
+        """Saxlama müddəti bitmiş xam ölçmələri və saatlıq yekunları silir"""
+        cr = self.env.cr
+        cr.execute("DELETE FROM farm_cooler_reading WHERE reading_time < %s",
+                   [self._retention_cutoff(RAW_RETENTION_PARAM, DEFAULT_RAW_RETENTION_DAYS)])
+        _logger.info('Soyuducu ölçmələri: %s köhnə ölçmə silindi', cr.rowcount)
+        cr.execute("DELETE FROM farm_cooler_reading_rollup WHERE period = 'hour' AND period_start < %s",
+                   [self._retention_cutoff(HOURLY_RETENTION_PARAM, DEFAULT_HOURLY_RETENTION_DAYS)])
+        self.invalidate_model()
+        self.env['farm.cooler.reading.rollup'].invalidate_model()
+
+
+class FarmCoolerReadingRollup(models.Model):
+    """Soyuducu ölçmələrinin saatlıq və günlük yekunları
+
+    Saatlıq yekun həmin saatın xam ölçmələrindən, günlük yekun isə günün
+    saatlıq yekunlarından hesablanır - aylarla tarixçə bu kiçik cədvəldən
+    oxunur.
+    """
+    _name = 'farm.cooler.reading.rollup'
+    _description = 'Soyuducu Ölçmələrinin Yekunu'
+    _order = 'period_start desc'
+    _log_access = False
+
+    cooler_id = fields.Many2one('farm.cooler', string='Soyuducu', required=True, readonly=True, ondelete='cascade')
+    period = fields.Selection([
+        ('hour', 'Saatlıq'),
+        ('day', 'Günlük'),
+    ], string='Dövr', required=True, readonly=True)
+    period_start = fields.Datetime('Dövrün Başlanğıcı', required=True, readonly=True)
+    reading_count = fields.Integer('Ölçmə Sayı', readonly=True)
+    humidity_count = fields.Integer('Rütubət Ölçməsi Sayı', readonly=True)
+    temperature_min = fields.Float('Min Temperatura (°C)', readonly=True, aggregator='min')
+    temperature_max = fields.Float('Maks Temperatura (°C)', readonly=True, aggregator='max')
+    temperature_avg = fields.Float('Orta Temperatura (°C)', readonly=True, aggregator='avg')
+    humidity_min = fields.Float('Min Rütubət (%)', readonly=True, aggregator='min')
+    humidity_max = fields.Float('Maks Rütubət (%)', readonly=True, aggregator='max')
+    humidity_avg = fields.Float('Orta Rütubət (%)', readonly=True, aggregator='avg')
+
+    _sql_constraints = [
+        ('rollup_unique', 'unique(cooler_id, period, period_start)', 'Bu dövr üçün yekun artıq mövcuddur!'),
+    ]
+
+    @api.model
+    def _refresh(self, readings):
+        """Ölçmələrin saat və günlərinin yekunlarını yenidən hesablayır
+
+        readings - (soyuducu id, ölçmə vaxtı) cütləri.
+        """
+        hours = {(cooler_id, reading_time.replace(minute=0, second=0, microsecond=0))
+                 for cooler_id, reading_time in readings}
+        if not hours:
+            return
+        days = {(cooler_id, hour.replace(hour=0)) for cooler_id, hour in hours}
+        self.env['farm.cooler.reading'].flush_model()
+        cr = self.env.cr
+        cr.execute("""
+            INSERT INTO farm_cooler_reading_rollup
+                (cooler_id, period, period_start, reading_count, humidity_count,
+                 temperature_min, temperature_max, temperature_avg, humidity_min, humidity_max, humidity_avg)
+            SELECT k.cooler_id, 'hour', k.period_start, COUNT(*), COUNT(r.humidity),
+                   MIN(r.temperature), MAX(r.temperature), AVG(r.temperature),
+                   MIN(r.humidity), MAX(r.humidity), AVG(r.humidity)
+            FROM unnest(%s::int[], %s::timestamp[]) AS k(cooler_id, period_start)
+            JOIN farm_cooler_reading r ON r.cooler_id = k.cooler_id
+             AND r.reading_time >= k.period_start AND r.reading_time < k.period_start + interval '1 hour'
+            GROUP BY k.cooler_id, k.period_start
+            ON CONFLICT (cooler_id, period, period_start) DO UPDATE SET
+                reading_count = EXCLUDED.reading_count, humidity_count = EXCLUDED.humidity_count,
+                temperature_min = EXCLUDED.temperature_min, temperature_max = EXCLUDED.temperature_max,
+                temperature_avg = EXCLUDED.temperature_avg, humidity_min = EXCLUDED.humidity_min,
+                humidity_max = EXCLUDED.humidity_max, humidity_avg = EXCLUDED.humidity_avg
+        """, [[cooler_id for cooler_id, _hour in hours], [hour for _cooler_id, hour in hours]])
+        cr.execute("""
+            INSERT INTO farm_cooler_reading_rollup
+                (cooler_id, period, period_start, reading_count, humidity_count,
+                 temperature_min, temperature_max, temperature_avg, humidity_min, humidity_max, humidity_avg)
+            SELECT k.cooler_id, 'day', k.period_start, SUM(h.reading_count), SUM(h.humidity_count),
+                   MIN(h.temperature_min), MAX(h.temperature_max),
+                   SUM(h.temperature_avg * h.reading_count) / SUM(h.reading_count),
+                   MIN(h.humidity_min), MAX(h.humidity_max),
+                   SUM(h.humidity_avg * h.humidity_count) / NULLIF(SUM(h.humidity_count), 0)
+            FROM unnest(%s::int[], %s::timestamp[]) AS k(cooler_id, period_start)
+            JOIN farm_cooler_reading_rollup h ON h.cooler_id = k.cooler_id AND h.period = 'hour'
+             AND h.period_start >= k.period_start AND h.period_start < k.period_start + interval '1 day'
+            GROUP BY k.cooler_id, k.period_start
+            ON CONFLICT (cooler_id, period, period_start) DO UPDATE SET
+                reading_count = EXCLUDED.reading_count, humidity_count = EXCLUDED.humidity_count,
+                temperature_min = EXCLUDED.temperature_min, temperature_max = EXCLUDED.temperature_max,
+                temperature_avg = EXCLUDED.temperature_avg, humidity_min = EXCLUDED.humidity_min,
+                humidity_max = EXCLUDED.humidity_max, humidity_avg = EXCLUDED.humidity_avg
+        """, [[cooler_id for cooler_id, _day in days], [day for _cooler_id, day in days]])
+        self.invalidate_model()
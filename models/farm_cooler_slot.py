@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+
+
+class FarmCoolerSlot(models.Model):
+    """Soyuducuda palet yeri (bölmə + nömrə)
+
+    Yerlər soyuducunun bölmə/yer sayına görə yaradılır. Doluluq palet
+    reyestri yeniləndikcə işarələnir; boş yerlər qismən indekslə sıra
+    üzrə tapılır - dolu yerlər skan edilmir.
+    """
+    _name = 'farm.cooler.slot'
+    _description = 'Soyuducu Palet Yeri'
+    _order = 'cooler_id, sequence'
+    _log_access = False
+
+    cooler_id = fields.Many2one('farm.cooler', string='Soyuducu', required=True, readonly=True, ondelete='cascade')
+    section = fields.Char('Bölmə', required=True, readonly=True)
+    position = fields.Char('Nömrə', required=True, readonly=True)
+    sequence = fields.Integer('Sıra', readonly=True)
+    occupied = fields.Boolean('Dolu', readonly=True)
+
+    _sql_constraints = [
+        ('slot_unique', 'unique(cooler_id, section, position)', 'Soyuducuda bu yer artıq mövcuddur!'),
+    ]
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS farm_cooler_slot_free_index
+            ON farm_cooler_slot (cooler_id, sequence) WHERE NOT occupied
+        """)
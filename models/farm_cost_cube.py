@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api
+from odoo.tools import date_utils
+
+# Kuba daxil olan mənbələr: tarix və sahə sütunları, (kateqoriya, məbləğ) ölçüləri.
+# 'model' verilməsə mənbə modelin adı yazılır.
+COST_CUBE_SOURCES = {
+    'farm.expense.report': {
+        'date': 'date',
+        'field': 'field_id',
+        'model': 'original_model',
+        'measures': [('expense_type', 'amount')],
+    },
+    'farm.cash.flow': {
+        'date': 'date',
+        'measures': [('transaction_type', 'amount')],
+    },
+    'farm.founder.investment': {
+        'date': 'date',
+        'measures': [("'income'", 'amount')],
+    },
+    'farm.founder.expense': {
+        'date': 'date',
+        'measures': [("'expense'", 'amount')],
+    },
+    'farm.tractor.income': {
+        'date': 'income_date',
+        'measures': [("'income'", 'amount')],
+    },
+    'farm.plowing': {
+        'date': 'operation_date',
+        'field': 'field_id',
+        'measures': [("'total_cost'", 'total_cost'), ("'worker_cost'", 'total_worker_cost')],
+    },
+    'farm.planting': {
+        'date': 'planting_date',
+        'field': 'field_id',
+        'measures': [("'total_cost'", 'total_cost'), ("'worker_cost'", 'total_worker_cost')],
+    },
+    'farm.irrigation': {
+        'date': 'irrigation_date',
+        'field': 'field_id',
+        'measures': [("'total_cost'", 'total_cost'), ("'worker_cost'", 'total_worker_cost'),
+                     ("'water_liters'", 'water_liters')],
+    },
+    'farm.fertilizing': {
+        'date': 'fertilizing_date',
+        'field': 'field_id',
+        'measures': [("'total_cost'", 'total_cost'), ("'worker_cost'", 'total_worker_cost')],
+    },
+    'farm.treatment': {
+        'date': 'treatment_date',
+        'field': 'field_id',
+        'measures': [("'total_cost'", 'total_cost'), ("'worker_cost'", 'total_worker_cost')],
+    },
+    'farm.pruning': {
+        'date': 'pruning_date',
+        'field': 'field_id',
+        'measures': [("'total_cost'", 'total_cost'), ("'worker_cost'", 'total_worker_cost')],
+    },
+    'farm.harvest': {
+        'date': 'harvest_date',
+        'field': 'field_id',
+        'measures': [("'total_cost'", 'total_cost'), ("'worker_cost'", 'total_worker_cost')],
+    },
+}
+
+DIRTY_KEY = 'farm.cost.cube.dirty'
+
+
+class FarmCostCube(models.Model):
+    """Xərc Kubu - sahə × ay × mənbə × kateqoriya üzrə yığılmış məbləğlər"""
+    _name = 'farm.cost.cube'
+    _description = 'Xərc Kubu'
+    _order = 'month desc, source, category'
+    _log_access = False
+
+    field_id = fields.Many2one('farm.field', string='Sahə', readonly=True, ondelete='cascade', index=True)
+    month = fields.Date('Ay', readonly=True, index=True)
+    source = fields.Char('Mənbə', readonly=True, index=True)
+    source_model = fields.Char('Mənbə Model', readonly=True)
+    category = fields.Char('Kateqoriya', readonly=True)
+    amount = fields.Float('Məbləğ', readonly=True)
+    record_count = fields.Integer('Qeyd Sayı', readonly=True)
+    last_date = fields.Date('Son Tarix', readonly=True)
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS farm_cost_cube_cell_unique
+            ON farm_cost_cube (COALESCE(field_id, 0), month, source, source_model, category)
+        """)
+
+    @api.model
+    def _source_query(self, source, date_from=None, date_to=None, field_id=False):
+        """Mənbə cədvəlindən ay üzrə qruplaşdırılmış sorğu
+
+        field_id=False sahə filtri qoymur, None sahəsiz sətirləri seçir.
+        """
+        spec = COST_CUBE_SOURCES[source]
+        date_column = spec['date']
+        field_column = spec.get('field', 'NULL')
+        model_column = spec.get('model', "'%s'" % source)
+
+        where, params = ['%s IS NOT NULL' % date_column], []
+        if date_from:
+            where.append('%s >= %%s' % date_column)
+            params.append(date_from)
+        if date_to:
+            where.append('%s < %%s' % date_column)
+            params.append(date_to + timedelta(days=1))
+        if field_id is not False:
+            where.append('%s IS NOT DISTINCT FROM %%s' % field_column)
+            params.append(field_id)
+
+        queries = []
+        for category, amount in spec['measures']:
+            queries.append("""
+                SELECT %(field)s::integer AS field_id,
+                       date_trunc('month', %(date)s)::date AS month,
+                       '%(source)s' AS source,
+                       %(model)s AS source_model,
+                       %(category)s AS category,
+                       COALESCE(SUM(%(amount)s), 0) AS amount,
+                       COUNT(*) AS record_count,
+                       MAX(%(date)s)::date AS last_date
+                FROM %(table)s
+                WHERE %(where)s
+                GROUP BY 1, 2, 4, 5
+            """ % {
+                'field': field_column,
+                'date': date_column,
+                'source': source,
+                'model': model_column,
+                'category': category,
+                'amount': amount,
+                'table': self.env[source]._table,
+                'where': ' AND '.join(where),
+            })
+        return ' UNION ALL '.join(queries), params * len(queries)
+
+    @api.model
+    def _upsert(self, query, params):
+        """Mənbə sorğusunun sətirlərini yazır, yazılan sətirlərin id-lərini qaytarır
+
+        Eyni xananı eyni anda yeniləyən tranzaksiyalar unikal indeksdə
+        toqquşmasın deyə DELETE + INSERT əvəzinə ON CONFLICT istifadə olunur.
+        """
+        self.env.cr.execute("""
+            INSERT INTO farm_cost_cube
+                (field_id, month, source, source_model, category, amount, record_count, last_date)
+            %s
+            ON CONFLICT ((COALESCE(field_id, 0)), month, source, source_model, category) DO UPDATE SET
+                amount = EXCLUDED.amount,
+                record_count = EXCLUDED.record_count,
+                last_date = EXCLUDED.last_date
+            RETURNING id
+        """ % query, params)
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _refresh(self, cells=None, sources=None):
+        """Kub xanalarını mənbələrdən yenidən hesablayır
+
+        cells - {(mənbə, sahə id, ay)}; verilməsə göstərilən (və ya bütün) mənbələr tam yenilənir.
+        """
+        cr = self.env.cr
+        self.env.flush_all()
+        if cells is None:
+            for source in sources or COST_CUBE_SOURCES:
+                query, params = self._source_query(source)
+                kept = self._upsert(query, params)
+                cr.execute("DELETE FROM farm_cost_cube WHERE source = %s AND id != ALL(%s)", [source, kept])
+        else:
+            for source, field_id, month in cells:
+                query, params = self._source_query(
+                    source, month, date_utils.end_of(month, 'month'), field_id=field_id)
+                kept = self._upsert(query, params)
+                cr.execute("""
+                    DELETE FROM farm_cost_cube
+                    WHERE source = %s AND month = %s AND field_id IS NOT DISTINCT FROM %s AND id != ALL(%s)
+                """, [source, month, field_id, kept])
+        self.invalidate_model()
+
+    @api.model
+    def _mark_dirty(self, cells):
+        """Xanaları tranzaksiyanın sonunda (və ya növbəti oxunuşda) yeniləmək üçün qeyd edir"""
+        if not cells:
+            return
+        data = self.env.cr.precommit.data
+        if not data.get(DIRTY_KEY):
+            self.env.cr.precommit.add(self._process_dirty)
+        data.setdefault(DIRTY_KEY, set()).update(cells)
+
+    @api.model
+    def _process_dirty(self):
+        cells = self.env.cr.precommit.data.pop(DIRTY_KEY, None)
+        if cells:
+            self._refresh(cells)
+
+    @api.model
+    def _cron_refresh(self):
+        """Planlaşdırılmış tam yeniləmə"""
+        self._refresh()
+
+    @api.model
+    def _aggregate(self, date_from=None, date_to=None, field_id=False, sources=None):
+        """Tarix aralığı üzrə cəmlər: {(mənbə, mənbə model, kateqoriya): {amount, count, last_date}}
+
+        Tam aylar kubdan, aralığın kənarlarındakı natamam aylar isə
+        birbaşa mənbə cədvəllərindən oxunur.
+        """
+        self._process_dirty()
+        self.env.flush_all()
+        sources = list(sources or COST_CUBE_SOURCES)
+        result = defaultdict(lambda: {'amount': 0.0, 'count': 0, 'last_date': False})
+
+        def collect(rows):
+            for source, source_model, category, amount, count, last_date in rows:
+                values = result[(source, source_model, category)]
+                values['amount'] += amount or 0.0
+                values['count'] += count or 0
+                if last_date and (not values['last_date'] or last_date > values['last_date']):
+                    values['last_date'] = last_date
+
+        # Tam ayların aralığı: [full_from, full_to)
+        full_from = date_from
+        if date_from and date_from.day != 1:
+            full_from = date_utils.start_of(date_from, 'month') + relativedelta(months=1)
+        full_to = date_to and date_utils.start_of(date_to + timedelta(days=1), 'month')
+        edges = []
+        if full_from and full_to and full_from >= full_to:
+            # Aralıqda tam ay yoxdur
+            edges.append((date_from, date_to))
+        else:
+            where, params = ['source = ANY(%s)'], [sources]
+            if full_from:
+                where.append('month >= %s')
+                params.append(full_from)
+            if full_to:
+                where.append('month < %s')
+                params.append(full_to)
+            if field_id is not False:
+                where.append('field_id IS NOT DISTINCT FROM %s')
+                params.append(field_id)
+            self.env.cr.execute("""
+                SELECT source, source_model, category, SUM(amount), SUM(record_count), MAX(last_date)
+                FROM farm_cost_cube
+                WHERE %s
+                GROUP BY 1, 2, 3
+            """ % ' AND '.join(where), params)
+            collect(self.env.cr.fetchall())
+            if date_from and date_from < full_from:
+                edges.append((date_from, full_from - timedelta(days=1)))
+            if date_to and full_to <= date_to:
+                edges.append((full_to, date_to))
+
+        for edge_from, edge_to in edges:
+            for source in sources:
+                query, params = self._source_query(source, edge_from, edge_to, field_id=field_id)
+                self.env.cr.execute("""
+                    SELECT source, source_model, category, SUM(amount), SUM(record_count), MAX(last_date)
+                    FROM (%s) cube
+                    GROUP BY 1, 2, 3
+                """ % query, params)
+                collect(self.env.cr.fetchall())
+        return result
+
+
+class FarmCostCubeMixin(models.AbstractModel):
+    """Xərc kubunun xanalarına təsir edən modellər üçün mixin"""
+    _name = 'farm.cost.cube.mixin'
+    _description = 'Xərc Kubu Mənbəyi'
+
+    # Qeydin kubdakı tarixi və sahəsi (mənbə modellər üçün)
+    _cost_cube_date_field = None
+    _cost_cube_field_field = None
+    # Məbləğləri bu valideyn qeydlərin cəmlərinə daxil olan modellər üçün
+    _cost_cube_parent_fields = ()
+    # Dəyişdikdə kubu yeniləyən sahələr (None - istənilən sahə)
+    _cost_cube_trigger_fields = None
+
+    def _cost_cube_cells(self):
+        """Qeydlərin təsir etdiyi kub xanaları: {(mənbə, sahə id, ay)}"""
+        cells = set()
+        if self._cost_cube_date_field:
+            for record in self:
+                date = record[self._cost_cube_date_field]
+                if not date:
+                    continue
+                field_id = None
+                if self._cost_cube_field_field:
+                    field_id = record[self._cost_cube_field_field].id or None
+                month = date_utils.start_of(fields.Date.to_date(date), 'month')
+                cells.add((self._name, field_id, month))
+        for field_name in self._cost_cube_parent_fields:
+            cells |= self.mapped(field_name)._cost_cube_cells()
+        return cells
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['farm.cost.cube']._mark_dirty(records._cost_cube_cells())
+        return records
+
+    def write(self, vals):
+        triggers = self._cost_cube_trigger_fields
+        if triggers is not None and not set(triggers).intersection(vals):
+            return super().write(vals)
+        cells = self._cost_cube_cells()
+        result = super().write(vals)
+        self.env['farm.cost.cube']._mark_dirty(cells | self._cost_cube_cells())
+        return result
+
+    def unlink(self):
+        self.env['farm.cost.cube']._mark_dirty(self._cost_cube_cells())
+        return super().unlink()
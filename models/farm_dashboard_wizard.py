@@ -1,6 +1,32 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
 from datetime import datetime, timedelta
 
+# Dashboard-da göstərilən əməliyyatlar (xərc kubunun mənbələri)
+DASHBOARD_OPERATIONS = (
+    'farm.plowing',
+    'farm.planting',
+    'farm.irrigation',
+    'farm.fertilizing',
+    'farm.treatment',
+    'farm.pruning',
+    'farm.harvest',
+)
+
+# Xərc hesabatı sətirlərinin dashboard göstəricilərinə uyğunluğu
+DASHBOARD_REPORT_KEYS = {
+    ('farm.additional.expense', 'Fəhlə'): 'skilled_worker',
+    ('farm.additional.expense', 'Digər Xərclər'): 'additional',
+    ('farm.worker.payment', 'Fəhlə'): 'skilled_worker',
+    ('farm.worker.payment', 'Maaş'): 'salary',
+    ('farm.material.expense', 'Mal-material'): 'material',
+    ('farm.tractor.expense', 'Traktor'): 'tractor',
+    ('farm.diesel.expense', 'Dizel'): 'diesel',
+    ('farm.hotel.expense', 'Otel'): 'hotel',
+    ('farm.communal.expense', 'Kommunal'): 'communal',
+}
+
 
 class FarmDashboardWizard(models.TransientModel):
     """Sahə Dashboard Wizard - Real vaxtda məlumat göstərmək üçün"""
@@ -177,249 +203,84 @@ class FarmDashboardWizard(models.TransientModel):
             'per_tree_expense': 0.0,
         }
         
-        # Ağac sayı 0 olarsa, hesablama etmə
-        trees_count = field.total_trees or 1
-        
-        # Gübrə xərcləri və sayısı
-        fertilizing_records = self.env['farm.fertilizing'].search([
-            ('field_id', '=', field_id),
-            ('fertilizing_date', '>=', date_from),
-            ('fertilizing_date', '<=', date_to)
-        ])
-        
+        # Bütün cəmlər xərc kubundan - tam aylar hazır xanalardan oxunur
+        totals = self.env['farm.cost.cube']._aggregate(
+            date_from, date_to, field_id=field_id,
+            sources=list(DASHBOARD_OPERATIONS) + ['farm.expense.report'],
+        )
+
+        operations = {}
+        for model_name in DASHBOARD_OPERATIONS:
+            total_cost = totals.get((model_name, model_name, 'total_cost'), {})
+            operations[model_name] = {
+                'count': total_cost.get('count', 0),
+                'total_cost': total_cost.get('amount', 0.0),
+                'worker_cost': totals.get((model_name, model_name, 'worker_cost'), {}).get('amount', 0.0),
+                'last_date': total_cost.get('last_date', False),
+                'water_liters': totals.get((model_name, model_name, 'water_liters'), {}).get('amount', 0.0),
+            }
+
+        # Xərc hesabatından sahəyə düşən digər xərclər
+        report_totals = defaultdict(float)
+        for (source, original_model, expense_type), values in totals.items():
+            key = DASHBOARD_REPORT_KEYS.get((original_model, expense_type))
+            if source == 'farm.expense.report' and key:
+                report_totals[key] += values['amount']
+
+        fertilizing = operations['farm.fertilizing']
+        irrigation = operations['farm.irrigation']
+        treatment = operations['farm.treatment']
+
         # Gübrə xərci = ümumi xərc - işçi xərci (yalnız gübrə məhsulunun qiyməti)
-        total_fertilizer_cost = sum(fertilizing_records.mapped('total_cost')) - sum(fertilizing_records.mapped('total_worker_cost'))
-        dashboard_data.update({
-            'total_fertilizer_cost': total_fertilizer_cost,
-            'last_fertilizing_date': max(fertilizing_records.mapped('fertilizing_date')) if fertilizing_records else False,
-            'fertilizing_count': len(fertilizing_records),
-        })
-        
-        # Sulama xərcləri və su miqdarı
-        irrigation_records = self.env['farm.irrigation'].search([
-            ('field_id', '=', field_id),
-            ('irrigation_date', '>=', date_from),
-            ('irrigation_date', '<=', date_to)
-        ])
-        
+        total_fertilizer_cost = fertilizing['total_cost'] - fertilizing['worker_cost']
         # Su xərci = ümumi xərc - işçi xərci (yalnız su qiyməti)
-        total_water_cost = sum(irrigation_records.mapped('total_cost')) - sum(irrigation_records.mapped('total_worker_cost'))
-        total_water_liters = sum(irrigation_records.mapped('water_liters')) if irrigation_records else 0
-        dashboard_data.update({
-            'total_water_cost': total_water_cost,
-            'total_water_liters': total_water_liters,
-            'last_irrigation_date': max(irrigation_records.mapped('irrigation_date')) if irrigation_records else False,
-            'total_irrigation_count': len(irrigation_records),
-            'irrigation_count': len(irrigation_records),
-        })
-        
-        # İşçi xərcləri (bütün əməliyyatlardan)
-        total_worker_cost = 0
-        total_skilled_worker_cost = 0
-        total_general_worker_cost = 0
-        
-        # Fəhlə xərclərini əlavə xərclərdən hesabla
-        all_additional_expenses = self.env['farm.additional.expense'].search([
-            ('expense_date', '>=', date_from),
-            ('expense_date', '<=', date_to),
-            ('expense_type', '=', 'skilled_worker')
-        ])
-        
-        # Fəhlə xərclərini sahə üzrə filtrlə
-        for expense in all_additional_expenses:
-            # Hansı əməliyyata aid olduğunu yoxla
-            field_ids = []
-            if expense.plowing_id:
-                field_ids.append(expense.plowing_id.field_id.id)
-            elif expense.planting_id:
-                field_ids.append(expense.planting_id.field_id.id)
-            elif expense.irrigation_id:
-                field_ids.append(expense.irrigation_id.field_id.id)
-            elif expense.fertilizing_id:
-                field_ids.append(expense.fertilizing_id.field_id.id)
-            elif expense.treatment_id:
-                field_ids.append(expense.treatment_id.field_id.id)
-            elif expense.pruning_id:
-                field_ids.append(expense.pruning_id.field_id.id)
-            elif expense.harvest_id:
-                field_ids.append(expense.harvest_id.field_id.id)
-            
-            if field_id in field_ids:
-                total_skilled_worker_cost += expense.amount
-        
-        # Şumlama əməliyyatları
-        plowing_records = self.env['farm.plowing'].search([
-            ('field_id', '=', field_id),
-            ('operation_date', '>=', date_from),
-            ('operation_date', '<=', date_to)
-        ])
-        total_general_worker_cost += sum(plowing_records.mapped('total_worker_cost'))
-        last_plowing = max(plowing_records.mapped('operation_date')) if plowing_records else False
-        
-        # Əkin əməliyyatları
-        planting_records = self.env['farm.planting'].search([
-            ('field_id', '=', field_id),
-            ('planting_date', '>=', date_from),
-            ('planting_date', '<=', date_to)
-        ])
-        total_general_worker_cost += sum(planting_records.mapped('total_worker_cost'))
-        last_planting = max(planting_records.mapped('planting_date')) if planting_records else False
-        
-        # Gübrələmə işçi xərcləri
-        total_general_worker_cost += sum(fertilizing_records.mapped('total_worker_cost'))
-        
-        # Sulama işçi xərcləri
-        total_general_worker_cost += sum(irrigation_records.mapped('total_worker_cost'))
-        
-        # Müalicə əməliyyatları
-        treatment_records = self.env['farm.treatment'].search([
-            ('field_id', '=', field_id),
-            ('treatment_date', '>=', date_from),
-            ('treatment_date', '<=', date_to)
-        ])
-        total_general_worker_cost += sum(treatment_records.mapped('total_worker_cost'))
-        last_treatment = max(treatment_records.mapped('treatment_date')) if treatment_records else False
-        
-        # Dərman xərci (treatment_records-dən işçi xərcini çıxaraq)
-        total_treatment_cost = sum(treatment_records.mapped('total_cost')) - sum(treatment_records.mapped('total_worker_cost'))
-        
-        # Digər əlavə xərclər (skilled_worker xaricində bütün növlər)
-        total_additional_cost = 0
-        all_other_additional_expenses = self.env['farm.additional.expense'].search([
-            ('expense_date', '>=', date_from),
-            ('expense_date', '<=', date_to),
-            ('expense_type', '!=', 'skilled_worker')
-        ])
-        
-        # Digər əlavə xərclərini sahə üzrə filtrlə
-        for expense in all_other_additional_expenses:
-            # Hansı əməliyyata aid olduğunu yoxla
-            field_ids = []
-            if expense.plowing_id:
-                field_ids.append(expense.plowing_id.field_id.id)
-            elif expense.planting_id:
-                field_ids.append(expense.planting_id.field_id.id)
-            elif expense.irrigation_id:
-                field_ids.append(expense.irrigation_id.field_id.id)
-            elif expense.fertilizing_id:
-                field_ids.append(expense.fertilizing_id.field_id.id)
-            elif expense.treatment_id:
-                field_ids.append(expense.treatment_id.field_id.id)
-            elif expense.pruning_id:
-                field_ids.append(expense.pruning_id.field_id.id)
-            elif expense.harvest_id:
-                field_ids.append(expense.harvest_id.field_id.id)
-            
-            if field_id in field_ids:
-                total_additional_cost += expense.amount
-        
-        # Maaş ödənişlərini ayrı hesabla
-        total_salary_cost = 0
-        worker_payments = self.env['farm.worker.payment'].search([
-            ('payment_date', '>=', date_from),
-            ('payment_date', '<=', date_to)
-        ])
-        
-        for payment in worker_payments:
-            # İşçinin sahəsini yoxla
-            if payment.worker_id.field_id and payment.worker_id.field_id.id == field_id:
-                if payment.payment_type == 'daily':
-                    total_skilled_worker_cost += payment.amount  # Günlük ödənişlər fəhlə kateqoriyasında
-                else:
-                    total_salary_cost += payment.amount  # Maaş, avans, bonus ayrı hesablanır
-        
-        # Budama əməliyyatları
-        pruning_records = self.env['farm.pruning'].search([
-            ('field_id', '=', field_id),
-            ('pruning_date', '>=', date_from),
-            ('pruning_date', '<=', date_to)
-        ])
-        total_general_worker_cost += sum(pruning_records.mapped('total_worker_cost'))
-        last_pruning = max(pruning_records.mapped('pruning_date')) if pruning_records else False
-        
-        # Məhsul yığımı əməliyyatları
-        harvest_records = self.env['farm.harvest'].search([
-            ('field_id', '=', field_id),
-            ('harvest_date', '>=', date_from),
-            ('harvest_date', '<=', date_to)
-        ])
-        total_general_worker_cost += sum(harvest_records.mapped('total_worker_cost'))
-        last_harvest = max(harvest_records.mapped('harvest_date')) if harvest_records else False
-        
-        # Ümumi işçi xərci hesabla
+        total_water_cost = irrigation['total_cost'] - irrigation['worker_cost']
+        # Dərman xərci (işçi xərcini çıxaraq)
+        total_treatment_cost = treatment['total_cost'] - treatment['worker_cost']
+
+        # Fəhlə xərcləri: əlavə fəhlə xərcləri və günlük ödənişlər
+        total_skilled_worker_cost = report_totals['skilled_worker']
+        total_general_worker_cost = sum(
+            operation['worker_cost'] for operation in operations.values()
+        )
         total_worker_cost = total_skilled_worker_cost + total_general_worker_cost
-        
+        total_salary_cost = report_totals['salary']
+        total_additional_cost = report_totals['additional']
+        total_material_cost = report_totals['material']
+        total_tractor_cost = report_totals['tractor']
+        total_diesel_cost = report_totals['diesel']
+        total_hotel_cost = report_totals['hotel']
+        total_communal_cost = report_totals['communal']
+
         dashboard_data.update({
+            'total_fertilizer_cost': total_fertilizer_cost,
+            'last_fertilizing_date': fertilizing['last_date'],
+            'fertilizing_count': fertilizing['count'],
+            'total_water_cost': total_water_cost,
+            'total_water_liters': irrigation['water_liters'],
+            'last_irrigation_date': irrigation['last_date'],
+            'total_irrigation_count': irrigation['count'],
+            'irrigation_count': irrigation['count'],
             'total_worker_cost': total_worker_cost,
             'total_skilled_worker_cost': total_skilled_worker_cost,
             'total_general_worker_cost': total_general_worker_cost,
             'total_salary_cost': total_salary_cost,
             'total_treatment_cost': total_treatment_cost,
             'total_additional_cost': total_additional_cost,
-            'last_plowing_date': last_plowing,
-            'last_planting_date': last_planting,
-            'last_treatment_date': last_treatment,
-            'last_pruning_date': last_pruning,
-            'last_harvest_date': last_harvest,
-            'plowing_count': len(plowing_records),
-            'planting_count': len(planting_records),
-            'treatment_count': len(treatment_records),
-            'pruning_count': len(pruning_records),
-            'harvest_count': len(harvest_records),
-        })
-        
-        # Material xərcləri (yalnız bu sahə üçün)
-        material_expenses = self.env['farm.material.expense'].search([
-            ('field_id', '=', field_id),
-            ('expense_date', '>=', date_from),
-            ('expense_date', '<=', date_to)
-        ])
-        total_material_cost = sum(material_expenses.mapped('amount'))
-        dashboard_data.update({
+            'last_plowing_date': operations['farm.plowing']['last_date'],
+            'last_planting_date': operations['farm.planting']['last_date'],
+            'last_treatment_date': treatment['last_date'],
+            'last_pruning_date': operations['farm.pruning']['last_date'],
+            'last_harvest_date': operations['farm.harvest']['last_date'],
+            'plowing_count': operations['farm.plowing']['count'],
+            'planting_count': operations['farm.planting']['count'],
+            'treatment_count': treatment['count'],
+            'pruning_count': operations['farm.pruning']['count'],
+            'harvest_count': operations['farm.harvest']['count'],
             'total_material_cost': total_material_cost,
-        })
-        
-        # Traktor xərcləri (yalnız bu sahə üçün)
-        tractor_expenses = self.env['farm.tractor.expense'].search([
-            ('field_id', '=', field_id),
-            ('expense_date', '>=', date_from),
-            ('expense_date', '<=', date_to)
-        ])
-        total_tractor_cost = sum(tractor_expenses.mapped('amount'))
-        dashboard_data.update({
             'total_tractor_cost': total_tractor_cost,
-        })
-        
-        # Diesel xərcləri (yalnız bu sahə üçün)
-        diesel_expenses = self.env['farm.diesel.expense'].search([
-            ('field_id', '=', field_id),
-            ('expense_date', '>=', date_from),
-            ('expense_date', '<=', date_to)
-        ])
-        total_diesel_cost = sum(diesel_expenses.mapped('amount'))
-        dashboard_data.update({
             'total_diesel_cost': total_diesel_cost,
-        })
-        
-        # Hotel xərcləri (yalnız bu sahə üçün)
-        hotel_expenses = self.env['farm.hotel.expense'].search([
-            ('field_id', '=', field_id),
-            ('expense_date', '>=', date_from),
-            ('expense_date', '<=', date_to)
-        ])
-        total_hotel_cost = sum(hotel_expenses.mapped('amount'))
-        dashboard_data.update({
             'total_hotel_cost': total_hotel_cost,
-        })
-        
-        # Kommunal xərcələr (yalnız bu sahə üçün)
-        communal_expenses = self.env['farm.communal.expense'].search([
-            ('field_id', '=', field_id),
-            ('expense_date', '>=', date_from),
-            ('expense_date', '<=', date_to)
-        ])
-        total_communal_cost = sum(communal_expenses.mapped('amount'))
-        dashboard_data.update({
             'total_communal_cost': total_communal_cost,
         })
         
@@ -7,6 +7,7 @@ class FarmDieselExpense(models.Model):
     """Dizel Xərcləri"""
     _name = 'farm.diesel.expense'
     _description = 'Dizel Xərcləri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin']
     _order = 'expense_date desc'
 
     name = fields.Char('Xərc Adı', required=True, default='Dizel Xərci')
@@ -23,10 +24,7 @@ class FarmDieselExpense(models.Model):
     @api.constrains('amount')
     def _check_balance_limit(self):
         """Xərc etməzdən əvvəl balansı yoxlayır"""
-        for record in self:
-            if record.amount > 0:
-                cash_flow = self.env['farm.cash.flow']
-                cash_flow.check_expense_balance(record.amount, 'farm.diesel.expense', record.id)
+        self._check_cash_balance()
     
     # Hesabat üçün
     year = fields.Integer('İl', compute='_compute_date_fields', store=True)
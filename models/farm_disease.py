@@ -4,9 +4,11 @@ from odoo import models, fields, api
 class FarmDiseaseType(models.Model):
     _name = 'farm.disease.type'
     _description = 'Xəstəlik Səbəbi'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'farm.code.sequence.mixin']
     _order = 'name'
 
+    _code_sequence = 'farm.disease.type.code'
+
     name = fields.Char('Zərərverici Adı')
     code = fields.Char('Zərərverici Kodu', copy=False, readonly=True)
 
@@ -34,20 +36,9 @@ class FarmDiseaseType(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
+        # Xəstəlik kodu XS001, XS002, XS003... formatında ardıcıllıqdan ayrılır
+        self._assign_codes(vals_list)
         for vals in vals_list:
-            if not vals.get('code'):
-                # Xəstəlik kodu XS001, XS002, XS003... formatında generasiya et
-                last_disease = self.search([('code', 'like', 'XS%')], order='code desc', limit=1)
-                if last_disease and last_disease.code:
-                    try:
-                        # "XS001" formatından nömrəni çıxar
-                        number = int(last_disease.code.replace('XS', '')) + 1
-                        vals['code'] = f'XS{number:03d}'
-                    except ValueError:
-                        vals['code'] = 'XS001'
-                else:
-                    vals['code'] = 'XS001'
-            
             # Default ad ver
             if not vals.get('name') and vals.get('code'):
                 vals['name'] = vals['code']
@@ -1,9 +1,39 @@
 # -*- coding: utf-8 -*-
 
+from collections import defaultdict
+
 from odoo import models, fields, api, tools
+from odoo.tools.sql import table_kind, TableKind
 from datetime import datetime
 
+# Hesabat sətirlərini mənbə cədvəllərdən hesablayan view
+SOURCE_VIEW = 'farm_expense_report_source'
+
+# Sətir id-si: mənbə nömrəsi * ID_STRIDE + mənbə qeydinin id-si.
+# Hər mənbə öz aralığındadır, id qeyd yaşadıqca dəyişmir.
+# Satınalma sətirləri sifariş sətrinin (pol.id) id-si ilə açarlanır.
+ID_STRIDE = 10 ** 10
+
+# İşçi sətirləri (farm.operation.worker.line_model): mənbə nömrəsi və hesabatdakı adı
+WORKER_LINE_SOURCES = (
+    ('farm.plowing.worker', 8, 'Şumlama'),
+    ('farm.planting.worker', 9, 'Əkin'),
+    ('farm.irrigation.worker', 10, 'Sulama'),
+    ('farm.fertilizing.worker', 11, 'Gübrələmə'),
+    ('farm.treatment.worker', 12, 'Dərmanlama'),
+    ('farm.pruning.worker', 13, 'Budama'),
+    ('farm.harvest.worker', 14, 'Yığım'),
+    ('farm.cold.storage.worker', 15, 'Soyuducu'),
+)
+
+REPORT_COLUMNS = (
+    'id', 'name', 'date', 'amount', 'expense_type', 'note', 'year', 'month', 'quarter',
+    'original_model', 'original_id', 'field_id',
+)
+
+
 class FarmExpenseReport(models.Model):
+    """Ümumi Xərc Hesabatı - mənbə view-dan doldurulan indeksli cədvəl"""
     _name = 'farm.expense.report'
     _description = 'Ümumi Xərc Hesabatı'
     _auto = False
@@ -22,12 +52,46 @@ class FarmExpenseReport(models.Model):
     field_id = fields.Many2one('farm.field', string='Sahə', readonly=True)
 
     def init(self):
-        tools.drop_view_if_exists(self.env.cr, self._table)
+        cr = self.env.cr
+        # Cədvəl törəmə məlumatdır - hər yenilənmədə sıfırdan qurulur
+        # (köhnə versiyalarda hesabat özü view idi)
+        kind = table_kind(cr, self._table)
+        if kind == TableKind.View:
+            tools.drop_view_if_exists(cr, self._table)
+        elif kind:
+            cr.execute("DROP TABLE %s" % self._table)
+        self._create_source_view()
+        cr.execute("""
+            CREATE TABLE %s (
+                id BIGINT PRIMARY KEY,
+                name VARCHAR,
+                date DATE,
+                amount DOUBLE PRECISION,
+                expense_type VARCHAR,
+                note TEXT,
+                year VARCHAR,
+                month VARCHAR,
+                quarter VARCHAR,
+                original_model VARCHAR,
+                original_id INTEGER,
+                field_id INTEGER
+            )
+        """ % self._table)
+        tools.create_index(cr, 'farm_expense_report_date_index', self._table, ['date'])
+        tools.create_index(cr, 'farm_expense_report_field_id_index', self._table, ['field_id'])
+        tools.create_index(cr, 'farm_expense_report_expense_type_index', self._table, ['expense_type'])
+        tools.create_index(cr, 'farm_expense_report_original_index', self._table, ['original_model', 'original_id'])
+        # İşçi xərcləri birləşdirilmiş işçi sətirləri cədvəlindən oxunur - əvvəlcə o qurulur
+        self.env['farm.operation.worker']._rebuild()
+        self._refresh()
+
+    def _create_source_view(self):
+        tools.drop_view_if_exists(self.env.cr, SOURCE_VIEW)
         self.env.cr.execute("""
-            CREATE OR REPLACE VIEW %s AS (
+            CREATE OR REPLACE VIEW %(view)s AS (
                 -- Kommunal Xərclər
                 SELECT 
-                    row_number() OVER () AS id,
+                    1 * %(stride)s + id AS id,
                     name,
                     expense_date AS date,
                     amount,
@@ -46,7 +110,7 @@ class FarmExpenseReport(models.Model):
                 
                 -- Dizel Xərclər
                 SELECT 
-                    row_number() OVER () + 10000 AS id,
+                    2 * %(stride)s + id AS id,
                     name,
                     expense_date AS date,
                     amount,
@@ -65,7 +129,7 @@ class FarmExpenseReport(models.Model):
                 
                 -- Traktor Xərclər
                 SELECT 
-                    row_number() OVER () + 20000 AS id,
+                    3 * %(stride)s + id AS id,
                     name,
                     expense_date AS date,
                     amount,
@@ -84,7 +148,7 @@ class FarmExpenseReport(models.Model):
                 
                 -- Mal-Material Xərclər
                 SELECT 
-                    row_number() OVER () + 30000 AS id,
+                    4 * %(stride)s + id AS id,
                     name,
                     expense_date AS date,
                     amount,
@@ -103,7 +167,7 @@ class FarmExpenseReport(models.Model):
                 
                 -- Otel Xərclər
                 SELECT 
-                    row_number() OVER () + 40000 AS id,
+                    5 * %(stride)s + id AS id,
                     name,
                     expense_date AS date,
                     amount,
@@ -122,7 +186,7 @@ class FarmExpenseReport(models.Model):
                 
                 -- Maaş Ödənişləri (salary, bonus, advance, other)
                 SELECT 
-                    row_number() OVER () + 50000 AS id,
+                    6 * %(stride)s + fwp.id AS id,
                     'Maaş Ödənişi - ' || fw.name AS name,
                     fwp.payment_date AS date,
                     fwp.amount,
@@ -143,7 +207,7 @@ class FarmExpenseReport(models.Model):
                 
                 -- Günlük Ödənişlər (daily - fəhlə kateqoriyasında)
                 SELECT 
-                    row_number() OVER () + 51000 AS id,
+                    6 * %(stride)s + fwp.id AS id,
                     'Günlük Ödəniş - ' || fw.name AS name,
                     fwp.payment_date AS date,
                     fwp.amount,
@@ -164,7 +228,7 @@ class FarmExpenseReport(models.Model):
                 
                 -- Əlavə Fəhlə Xərcləri (farm_additional_expense - yalnız skilled_worker növü)
                 SELECT 
-                    row_number() OVER () + 60000 AS id,
+                    7 * %(stride)s + fae.id AS id,
                     fae.name,
                     fae.expense_date AS date,
                     fae.amount,
@@ -175,31 +239,15 @@ class FarmExpenseReport(models.Model):
                     'Q' || EXTRACT(quarter FROM fae.expense_date)::text AS quarter,
                     'farm.additional.expense' AS original_model,
                     fae.id AS original_id,
-                    CASE 
-                        WHEN fae.plowing_id IS NOT NULL THEN fp.field_id
-                        WHEN fae.planting_id IS NOT NULL THEN fpl.field_id
-                        WHEN fae.irrigation_id IS NOT NULL THEN fi.field_id
-                        WHEN fae.fertilizing_id IS NOT NULL THEN ff.field_id
-                        WHEN fae.treatment_id IS NOT NULL THEN ft.field_id
-                        WHEN fae.pruning_id IS NOT NULL THEN fpr.field_id
-                        WHEN fae.harvest_id IS NOT NULL THEN fh.field_id
-                        ELSE NULL
-                    END AS field_id
+                    fae.field_id
                 FROM farm_additional_expense fae
-                LEFT JOIN farm_plowing fp ON fae.plowing_id = fp.id
-                LEFT JOIN farm_planting fpl ON fae.planting_id = fpl.id
-                LEFT JOIN farm_irrigation fi ON fae.irrigation_id = fi.id
-                LEFT JOIN farm_fertilizing ff ON fae.fertilizing_id = ff.id
-                LEFT JOIN farm_treatment ft ON fae.treatment_id = ft.id
-                LEFT JOIN farm_pruning fpr ON fae.pruning_id = fpr.id
-                LEFT JOIN farm_harvest fh ON fae.harvest_id = fh.id
                 WHERE fae.expense_date IS NOT NULL AND fae.expense_type = 'skilled_worker'
                 
                 UNION ALL
                 
                 -- Digər Digər Xərclər (farm_additional_expense - skilled_worker xaricində bütün növlər)
                 SELECT 
-                    row_number() OVER () + 61000 AS id,
+                    7 * %(stride)s + fae.id AS id,
                     fae.name,
                     fae.expense_date AS date,
                     fae.amount,
@@ -210,192 +258,35 @@ class FarmExpenseReport(models.Model):
                     'Q' || EXTRACT(quarter FROM fae.expense_date)::text AS quarter,
                     'farm.additional.expense' AS original_model,
                     fae.id AS original_id,
-                    CASE 
-                        WHEN fae.plowing_id IS NOT NULL THEN fp.field_id
-                        WHEN fae.planting_id IS NOT NULL THEN fpl.field_id
-                        WHEN fae.irrigation_id IS NOT NULL THEN fi.field_id
-                        WHEN fae.fertilizing_id IS NOT NULL THEN ff.field_id
-                        WHEN fae.treatment_id IS NOT NULL THEN ft.field_id
-                        WHEN fae.pruning_id IS NOT NULL THEN fpr.field_id
-                        WHEN fae.harvest_id IS NOT NULL THEN fh.field_id
-                        ELSE NULL
-                    END AS field_id
+                    fae.field_id
                 FROM farm_additional_expense fae
-                LEFT JOIN farm_plowing fp ON fae.plowing_id = fp.id
-                LEFT JOIN farm_planting fpl ON fae.planting_id = fpl.id
-                LEFT JOIN farm_irrigation fi ON fae.irrigation_id = fi.id
-                LEFT JOIN farm_fertilizing ff ON fae.fertilizing_id = ff.id
-                LEFT JOIN farm_treatment ft ON fae.treatment_id = ft.id
-                LEFT JOIN farm_pruning fpr ON fae.pruning_id = fpr.id
-                LEFT JOIN farm_harvest fh ON fae.harvest_id = fh.id
                 WHERE fae.expense_date IS NOT NULL AND fae.expense_type != 'skilled_worker'
                 
                 UNION ALL
                 
-                -- Əməliyyatlardakı İşçi Xərcləri (Fəhlə kateqoriyasında)
-                SELECT 
-                    row_number() OVER () + 65000 AS id,
-                    'Şumlama - ' || fw.name AS name,
-                    fp.operation_date::date AS date,
-                    fpw.amount,
-                    'Fəhlə' AS expense_type,
-                    COALESCE(fp.notes, '') AS note,
-                    EXTRACT(year FROM fp.operation_date)::text AS year,
-                    EXTRACT(month FROM fp.operation_date)::text AS month,
-                    'Q' || EXTRACT(quarter FROM fp.operation_date)::text AS quarter,
-                    'farm.plowing' AS original_model,
-                    fp.id AS original_id,
-                    fp.field_id
-                FROM farm_plowing_worker fpw
-                JOIN farm_plowing fp ON fpw.plowing_id = fp.id
-                JOIN farm_worker fw ON fpw.worker_id = fw.id
-                WHERE fp.operation_date IS NOT NULL
-                
-                UNION ALL
-                
-                SELECT 
-                    row_number() OVER () + 66000 AS id,
-                    'Əkin - ' || fw.name AS name,
-                    fpl.planting_date::date AS date,
-                    fplw.amount,
-                    'Fəhlə' AS expense_type,
-                    COALESCE(fpl.notes, '') AS note,
-                    EXTRACT(year FROM fpl.planting_date)::text AS year,
-                    EXTRACT(month FROM fpl.planting_date)::text AS month,
-                    'Q' || EXTRACT(quarter FROM fpl.planting_date)::text AS quarter,
-                    'farm.planting' AS original_model,
-                    fpl.id AS original_id,
-                    fpl.field_id
-                FROM farm_planting_worker fplw
-                JOIN farm_planting fpl ON fplw.planting_id = fpl.id
-                JOIN farm_worker fw ON fplw.worker_id = fw.id
-                WHERE fpl.planting_date IS NOT NULL
-                
-                UNION ALL
-                
-                SELECT 
-                    row_number() OVER () + 67000 AS id,
-                    'Sulama - ' || fw.name AS name,
-                    fi.irrigation_date::date AS date,
-                    fiw.amount,
-                    'Fəhlə' AS expense_type,
-                    COALESCE(fi.notes, '') AS note,
-                    EXTRACT(year FROM fi.irrigation_date)::text AS year,
-                    EXTRACT(month FROM fi.irrigation_date)::text AS month,
-                    'Q' || EXTRACT(quarter FROM fi.irrigation_date)::text AS quarter,
-                    'farm.irrigation' AS original_model,
-                    fi.id AS original_id,
-                    fi.field_id
-                FROM farm_irrigation_worker fiw
-                JOIN farm_irrigation fi ON fiw.irrigation_id = fi.id
-                JOIN farm_worker fw ON fiw.worker_id = fw.id
-                WHERE fi.irrigation_date IS NOT NULL
-                
-                UNION ALL
-                
-                SELECT 
-                    row_number() OVER () + 68000 AS id,
-                    'Gübrələmə - ' || fw.name AS name,
-                    ff.fertilizing_date::date AS date,
-                    ffw.amount,
-                    'Fəhlə' AS expense_type,
-                    COALESCE(ff.notes, '') AS note,
-                    EXTRACT(year FROM ff.fertilizing_date)::text AS year,
-                    EXTRACT(month FROM ff.fertilizing_date)::text AS month,
-                    'Q' || EXTRACT(quarter FROM ff.fertilizing_date)::text AS quarter,
-                    'farm.fertilizing' AS original_model,
-                    ff.id AS original_id,
-                    ff.field_id
-                FROM farm_fertilizing_worker ffw
-                JOIN farm_fertilizing ff ON ffw.fertilizing_id = ff.id
-                JOIN farm_worker fw ON ffw.worker_id = fw.id
-                WHERE ff.fertilizing_date IS NOT NULL
-                
-                UNION ALL
-                
+                -- Əməliyyatlardakı İşçi Xərcləri (Fəhlə kateqoriyasında) - birləşdirilmiş işçi sətirləri cədvəli
                 SELECT 
-                    row_number() OVER () + 69000 AS id,
-                    'Dərmanlama - ' || fw.name AS name,
-                    ft.treatment_date::date AS date,
-                    ftw.amount,
+                    %(worker_line_ordinal)s * %(stride)s + fow.line_id AS id,
+                    %(worker_line_label)s || ' - ' || fw.name AS name,
+                    fow.date,
+                    fow.amount,
                     'Fəhlə' AS expense_type,
-                    COALESCE(ft.notes, '') AS note,
-                    EXTRACT(year FROM ft.treatment_date)::text AS year,
-                    EXTRACT(month FROM ft.treatment_date)::text AS month,
-                    'Q' || EXTRACT(quarter FROM ft.treatment_date)::text AS quarter,
-                    'farm.treatment' AS original_model,
-                    ft.id AS original_id,
-                    ft.field_id
-                FROM farm_treatment_worker ftw
-                JOIN farm_treatment ft ON ftw.treatment_id = ft.id
-                JOIN farm_worker fw ON ftw.worker_id = fw.id
-                WHERE ft.treatment_date IS NOT NULL
-                
-                UNION ALL
-                
-                SELECT 
-                    row_number() OVER () + 69500 AS id,
-                    'Budama - ' || fw.name AS name,
-                    fpr.pruning_date::date AS date,
-                    fprw.amount,
-                    'Fəhlə' AS expense_type,
-                    COALESCE(fpr.notes, '') AS note,
-                    EXTRACT(year FROM fpr.pruning_date)::text AS year,
-                    EXTRACT(month FROM fpr.pruning_date)::text AS month,
-                    'Q' || EXTRACT(quarter FROM fpr.pruning_date)::text AS quarter,
-                    'farm.pruning' AS original_model,
-                    fpr.id AS original_id,
-                    fpr.field_id
-                FROM farm_pruning_worker fprw
-                JOIN farm_pruning fpr ON fprw.pruning_id = fpr.id
-                JOIN farm_worker fw ON fprw.worker_id = fw.id
-                WHERE fpr.pruning_date IS NOT NULL
-                
-                UNION ALL
-                
-                SELECT 
-                    row_number() OVER () + 69700 AS id,
-                    'Yığım - ' || fw.name AS name,
-                    fh.harvest_date::date AS date,
-                    fhw.amount,
-                    'Fəhlə' AS expense_type,
-                    COALESCE(fh.notes, '') AS note,
-                    EXTRACT(year FROM fh.harvest_date)::text AS year,
-                    EXTRACT(month FROM fh.harvest_date)::text AS month,
-                    'Q' || EXTRACT(quarter FROM fh.harvest_date)::text AS quarter,
-                    'farm.harvest' AS original_model,
-                    fh.id AS original_id,
-                    fh.field_id
-                FROM farm_harvest_worker fhw
-                JOIN farm_harvest fh ON fhw.harvest_id = fh.id
-                JOIN farm_worker fw ON fhw.worker_id = fw.id
-                WHERE fh.harvest_date IS NOT NULL
-                
-                UNION ALL
-                
-                SELECT 
-                    row_number() OVER () + 69800 AS id,
-                    'Soyuducu - ' || fw.name AS name,
-                    fcs.storage_date::date AS date,
-                    fcsw.amount,
-                    'Fəhlə' AS expense_type,
-                    COALESCE(fcs.notes, '') AS note,
-                    EXTRACT(year FROM fcs.storage_date)::text AS year,
-                    EXTRACT(month FROM fcs.storage_date)::text AS month,
-                    'Q' || EXTRACT(quarter FROM fcs.storage_date)::text AS quarter,
-                    'farm.cold.storage' AS original_model,
-                    fcs.id AS original_id,
-                    NULL AS field_id
-                FROM farm_cold_storage_worker fcsw
-                JOIN farm_cold_storage fcs ON fcsw.cold_storage_id = fcs.id
-                JOIN farm_worker fw ON fcsw.worker_id = fw.id
-                WHERE fcs.storage_date IS NOT NULL
+                    COALESCE(fow.note, '') AS note,
+                    EXTRACT(year FROM fow.date)::text AS year,
+                    EXTRACT(month FROM fow.date)::text AS month,
+                    'Q' || EXTRACT(quarter FROM fow.date)::text AS quarter,
+                    fow.operation_model AS original_model,
+                    fow.operation_id AS original_id,
+                    fow.field_id
+                FROM farm_operation_worker fow
+                JOIN farm_worker fw ON fow.worker_id = fw.id
+                WHERE fow.date IS NOT NULL
                 
                 UNION ALL
                 
                 -- Gübrə Satınalmaları
                 SELECT 
-                    row_number() OVER () + 70000 AS id,
+                    16 * %(stride)s + pol.id AS id,
                     'Gübrə Satınalması - ' || po.name AS name,
                     po.date_order::date AS date,
                     po.amount_total,
@@ -420,7 +311,7 @@ class FarmExpenseReport(models.Model):
                 
                 -- Dərman Satınalmaları
                 SELECT 
-                    row_number() OVER () + 71000 AS id,
+                    16 * %(stride)s + pol.id AS id,
                     'Dərman Satınalması - ' || po.name AS name,
                     po.date_order::date AS date,
                     po.amount_total,
@@ -445,7 +336,9 @@ class FarmExpenseReport(models.Model):
                 
                 -- Digər Satınalmalar
                 SELECT 
-                    row_number() OVER () + 72000 AS id,
+                    -- Sətirsiz sifariş sifarişin öz id-si ilə ayrıca aralıqda
+                    CASE WHEN pol.id IS NULL THEN 17 * %(stride)s + po.id
+                         ELSE 16 * %(stride)s + pol.id END AS id,
                     'Digər Satınalma - ' || po.name AS name,
                     po.date_order::date AS date,
                     po.amount_total,
@@ -466,7 +359,80 @@ class FarmExpenseReport(models.Model):
                 AND po.date_order IS NOT NULL
                 AND (pc.name IS NULL OR pc.name NOT IN ('Fertilizer', 'Pestisid'))
             )
-        """ % self._table)
+        """ % {
+            'view': SOURCE_VIEW,
+            'stride': ID_STRIDE,
+            'worker_line_ordinal': 'CASE fow.line_model %s END' % ' '.join(
+                "WHEN '%s' THEN %d" % (line_model, ordinal) for line_model, ordinal, _label in WORKER_LINE_SOURCES),
+            'worker_line_label': 'CASE fow.line_model %s END' % ' '.join(
+                "WHEN '%s' THEN '%s'" % (line_model, label) for line_model, _ordinal, label in WORKER_LINE_SOURCES),
+        })
+
+    @api.model
+    def _refresh(self, keys=None):
+        """Hesabat sətirlərini mənbə view-dan yeniləyir
+
+        keys - {(original_model, original_id)} açarları; verilməsə cədvəl tam yenilənir.
+        """
+        cr = self.env.cr
+        cube = self.env['farm.cost.cube']
+        columns = ', '.join(REPORT_COLUMNS)
+        if keys is None:
+            cr.execute("DELETE FROM %s" % self._table)
+            cr.execute("INSERT INTO %s (%s) SELECT %s FROM %s" % (self._table, columns, columns, SOURCE_VIEW))
+            self.invalidate_model()
+            cube._refresh(sources=[self._name])
+        else:
+            ids_by_model = defaultdict(set)
+            for model_name, res_id in keys:
+                if res_id:
+                    ids_by_model[model_name].add(res_id)
+            if not ids_by_model:
+                return
+            # Mənbə qeydlərin yaddaşdakı dəyişiklikləri bazaya yazılmalıdır
+            self.env.flush_all()
+            cells = set()
+            for model_name, ids in ids_by_model.items():
+                params = (model_name, list(ids))
+                # Kubda həm köhnə, həm yeni sətirlərin xanaları yenilənməlidir
+                cells |= self._cost_cube_cells(params)
+                # Eyni açarları eyni anda yeniləyən tranzaksiyalar toqquşmasın deyə
+                # DELETE + INSERT əvəzinə ON CONFLICT, sonra mənbədə olmayan sətirlər silinir
+                cr.execute("""
+                    INSERT INTO %s (%s)
+                    SELECT %s FROM %s WHERE original_model = %%s AND original_id = ANY(%%s)
+                    ON CONFLICT (id) DO UPDATE SET %s
+                    RETURNING id
+                """ % (self._table, columns, columns, SOURCE_VIEW, ', '.join(
+                    f'{column} = EXCLUDED.{column}' for column in REPORT_COLUMNS if column != 'id')), params)
+                kept = [row[0] for row in cr.fetchall()]
+                cr.execute("""
+                    DELETE FROM %s WHERE original_model = %%s AND original_id = ANY(%%s) AND id != ALL(%%s)
+                """ % self._table, params + (kept,))
+                cells |= self._cost_cube_cells(params)
+            self.invalidate_model()
+            cube._mark_dirty(cells)
+
+    def _cost_cube_cells(self, params):
+        """Verilmiş mənbə qeydlərinin sətirlərinin kub xanaları"""
+        self.env.cr.execute("""
+            SELECT DISTINCT field_id, date_trunc('month', date)::date
+            FROM %s WHERE original_model = %%s AND original_id = ANY(%%s)
+        """ % self._table, params)
+        return {(self._name, field_id, month) for field_id, month in self.env.cr.fetchall()}
+
+    @api.model
+    def _cron_refresh(self):
+        """Planlaşdırılmış tam yeniləmə"""
+        self._refresh()
+
+    def action_refresh(self):
+        """Hesabatı əl ilə tam yeniləyir"""
+        self._refresh()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
 
     @api.model
     def add_total_expense_to_cash(self):
@@ -518,4 +484,5 @@ class FarmExpenseReport(models.Model):
             'view_mode': 'form',
             'target': 'new',
             'context': {'form_view_initial_mode': 'edit'},
-        }
\ No newline at end of file
+        }
+
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+
+class FarmExpenseReportSourceMixin(models.AbstractModel):
+    """Xərc hesabatına sətir verən və ya onları dəyişən modellər üçün mixin"""
+    _name = 'farm.expense.report.source.mixin'
+    _description = 'Xərc Hesabatı Mənbəyi'
+
+    # Dəyişdikdə hesabatı yeniləyən sahələr (None - istənilən sahə)
+    _expense_report_trigger_fields = None
+    # Hesabat sətri valideyn qeydə aiddirsə (məs. işçi sətirləri əməliyyata)
+    _expense_report_parent_field = None
+    # Sətirləri bu qeydlərdən asılı olan alt qeydlər
+    _expense_report_child_fields = ()
+
+    def _expense_report_keys(self):
+        """Qeydlərə aid hesabat sətirlərinin açarları: {(original_model, original_id)}"""
+        if self._expense_report_parent_field:
+            parents = self.mapped(self._expense_report_parent_field)
+            keys = {(parents._name, res_id) for res_id in parents.ids}
+        else:
+            keys = {(self._name, res_id) for res_id in self.ids}
+        for field_name in self._expense_report_child_fields:
+            keys |= self.mapped(field_name)._expense_report_keys()
+        return keys
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['farm.expense.report']._refresh(records._expense_report_keys())
+        return records
+
+    def write(self, vals):
+        triggers = self._expense_report_trigger_fields
+        if triggers is not None and not set(triggers).intersection(vals):
+            return super().write(vals)
+        # Valideyn dəyişə bilər - həm köhnə, həm yeni sətirlər yenilənir
+        keys = self._expense_report_keys()
+        result = super().write(vals)
+        self.env['farm.expense.report']._refresh(keys | self._expense_report_keys())
+        return result
+
+    def unlink(self):
+        keys = self._expense_report_keys()
+        report = self.env['farm.expense.report']
+        result = super().unlink()
+        report._refresh(keys)
+        return result
@@ -1,12 +1,18 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 
 class FarmField(models.Model):
     _name = 'farm.field'
     _description = 'Sahə (Field)'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.code.sequence.mixin']
     _order = 'code'
 
+    _expense_report_trigger_fields = ()
+    _code_sequence = 'farm.field.code'
+
     name = fields.Char('Sahə Adı', required=True)
     code = fields.Char('Sahə Kodu', copy=False, readonly=True)
     
@@ -59,9 +65,9 @@ class FarmField(models.Model):
     parcel_ids = fields.One2many('farm.parcel', 'field_id', string='Parsellər')
     
     # Statistikalar
-    total_parcel = fields.Integer('Parsel Sayı', compute='_compute_statistics')
-    total_rows = fields.Integer('Cərgə Sayı', compute='_compute_statistics')
-    total_trees = fields.Integer('Ağac Sayı', compute='_compute_statistics')
+    total_parcel = fields.Integer('Parsel Sayı', compute='_compute_statistics', store=True)
+    total_rows = fields.Integer('Cərgə Sayı', compute='_compute_statistics', store=True)
+    total_trees = fields.Integer('Ağac Sayı', compute='_compute_statistics', store=True)
     
     # Əlavə məlumatlar
     description = fields.Text('Açıqlama')
@@ -76,27 +82,43 @@ class FarmField(models.Model):
     
     @api.depends('parcel_ids', 'parcel_ids.row_ids', 'parcel_ids.row_ids.tree_ids')
     def _compute_statistics(self):
+        """Saylar qruplaşdırılmış sorğularla hesablanır - ağac qeydləri yüklənmir"""
+        field_ids = self._origin.ids
+        parcel_counts = {field.id: count for field, count in self.env['farm.parcel']._read_group(
+            [('field_id', 'in', field_ids)], ['field_id'], ['__count'])}
+        row_counts = defaultdict(int)
+        for parcel, count in self.env['farm.row']._read_group(
+                [('parcel_id.field_id', 'in', field_ids)], ['parcel_id'], ['__count']):
+            row_counts[parcel.field_id.id] += count
+        tree_counts = defaultdict(int)
+        for row, count in self.env['farm.tree']._read_group(
+                [('row_id.parcel_id.field_id', 'in', field_ids)], ['row_id'], ['__count']):
+            tree_counts[row.parcel_id.field_id.id] += count
         for field in self:
-            field.total_parcel = len(field.parcel_ids)
-            field.total_rows = sum(len(parcel.row_ids) for parcel in field.parcel_ids)
-            field.total_trees = sum(len(row.tree_ids) for parcel in field.parcel_ids for row in parcel.row_ids)
+            field.total_parcel = parcel_counts.get(field._origin.id, 0)
+            field.total_rows = row_counts[field._origin.id]
+            field.total_trees = tree_counts[field._origin.id]
 
     @api.model_create_multi
     def create(self, vals_list):
-        for vals in vals_list:
-            if not vals.get('code'):
-                # Sahə kodu S1, S2, S3... formatında generasiya et
-                last_field = self.search([('code', 'like', 'S%')], order='code desc', limit=1)
-                if last_field and last_field.code:
-                    try:
-                        number = int(last_field.code[1:]) + 1
-                    except ValueError:
-                        number = 1
-                else:
-                    number = 1
-                vals['code'] = f'S{number}'
+        # Sahə kodu S1, S2, S3... formatında ardıcıllıqdan ayrılır
+        self._assign_codes(vals_list)
         return super().create(vals_list)
 
+    def unlink(self):
+        # Sahə ilə kaskadla silinən əməliyyatların anbardan silinmiş sətirləri və işçi sətirləri
+        self.env['farm.stock.consumption']._check_fields_unlink(self)
+        self.env['farm.operation.worker']._remove_field_operations(self)
+        return super().unlink()
+
+    def _expense_report_keys(self):
+        """Sahəyə bağlı hesabat sətirləri - sahə silinəndə kaskadla gedir"""
+        self.env.cr.execute(
+            "SELECT original_model, original_id FROM farm_expense_report WHERE field_id = ANY(%s)",
+            (self.ids,),
+        )
+        return set(self.env.cr.fetchall())
+
     @api.constrains('area_hectare')
     def _check_area(self):
         for record in self:
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+# Maşın tərəfindən yaradılan qeydlər üçün söndürülən chatter funksiyaları:
+# sahə izləmə, "yaradıldı" mesajı və yaradanın izləyici kimi əlavə edilməsi
+HIGH_VOLUME_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_create_nosubscribe': True,
+    'mail_notrack': True,
+}
+
+# Yüksək həcm rejimi daimi açıq olan modellər (vergüllə ayrılmış model adları)
+HIGH_VOLUME_MODELS_PARAM = 'farm_agriculture_v2.high_volume_models'
+
+
+class FarmHighVolumeMixin(models.AbstractModel):
+    """mail.thread modelləri üçün yüksək həcm rejimi
+
+    Rejim iki yolla açılır:
+    - toplu əməliyyat üçün kontekstlə: with_context(farm_high_volume=True)
+    - model üçün daimi: farm_agriculture_v2.high_volume_models sistem parametrinə
+      model adını əlavə etməklə (məs. "farm.tree,farm.row")
+
+    Rejimdə create/write chatter mesajı, izləmə və izləyici yazmır.
+    mail.thread-in create/write metodlarını əhatə etməsi üçün _inherit
+    siyahısında 'mail.thread'-dən əvvəl yazılmalıdır.
+    """
+    _name = 'farm.high.volume.mixin'
+    _description = 'Yüksək Həcm Rejimi'
+
+    @api.model
+    def _is_high_volume(self):
+        if self.env.context.get('farm_high_volume'):
+            return True
+        # get_param keşlənir - hər create üçün sorğu getmir
+        models_param = self.env['ir.config_parameter'].sudo().get_param(HIGH_VOLUME_MODELS_PARAM) or ''
+        return self._name in {name.strip() for name in models_param.split(',')}
+
+    def _high_volume_context(self):
+        """Rejim açıqdırsa chatter söndürülmüş qeydlər, əks halda özü"""
+        return self.with_context(**HIGH_VOLUME_CONTEXT) if self._is_high_volume() else self
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(FarmHighVolumeMixin, self._high_volume_context()).create(vals_list)
+        return records.with_env(self.env)
+
+    def write(self, vals):
+        return super(FarmHighVolumeMixin, self._high_volume_context()).write(vals)
@@ -7,6 +7,7 @@ class FarmHotelExpense(models.Model):
     """Otel Xərcləri"""
     _name = 'farm.hotel.expense'
     _description = 'Otel Xərcləri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin']
     _order = 'expense_date desc'
 
     name = fields.Char('Xərc Adı', required=True, default='Otel Xərci')
@@ -26,10 +27,7 @@ class FarmHotelExpense(models.Model):
     @api.constrains('amount')
     def _check_balance_limit(self):
         """Xərc etməzdən əvvəl balansı yoxlayır"""
-        for record in self:
-            if record.amount > 0:
-                cash_flow = self.env['farm.cash.flow']
-                cash_flow.check_expense_balance(record.amount, 'farm.hotel.expense', record.id)
+        self._check_cash_balance()
     
     @api.depends('expense_date')
     def _compute_date_fields(self):
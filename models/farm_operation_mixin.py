@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+
+class FarmOperationMixin(models.AbstractModel):
+    """Əməliyyatların ümumi xərc hesablamaları
+
+    Modellərdə worker_line_ids, additional_expense_ids, notes və total_worker_cost,
+    total_additional_cost, total_cost sahələri olmalıdır. Cəmlər bütün
+    qeydlər üçün bir qruplaşdırılmış sorğu ilə hesablanır. Tarix, sahə və qeyd
+    dəyişdikdə işçi sətirləri farm.operation.worker cədvəlində yenilənir.
+    """
+    _name = 'farm.operation.mixin'
+    _description = 'Əməliyyat'
+
+    # Ümumi xərcə daxil olan sahələr
+    _operation_cost_fields = ('total_worker_cost', 'total_additional_cost')
+    # Əməliyyatın tarix sahəsi
+    _operation_date_field = None
+
+    def write(self, vals):
+        result = super().write(vals)
+        if {self._operation_date_field, 'field_id', 'notes'}.intersection(vals):
+            self.env['farm.operation.worker']._sync_operations(self)
+        return result
+
+    def unlink(self):
+        # İşçi sətirləri bazada kaskadla silinir, birləşdirilmiş cədvəldən isə burada
+        self.env['farm.operation.worker']._remove_operations(self)
+        return super().unlink()
+
+    def _operation_line_sums(self, line_field, amount_field):
+        """Sətir məbləğlərinin əməliyyatlar üzrə cəmi: {əməliyyat id: cəm}
+
+        Bazadakı qeydlər üçün bir _read_group sorğusu işlədilir; formada
+        redaktə olunan (hələ saxlanmamış) qeydlər yaddaşdakı sətirlərlə sayılır.
+        """
+        field = self._fields[line_field]
+        stored = self.filtered('id')
+        sums = {}
+        if stored:
+            for operation, total in self.env[field.comodel_name]._read_group(
+                    [(field.inverse_name, 'in', stored.ids)],
+                    [field.inverse_name], ['%s:sum' % amount_field]):
+                sums[operation.id] = total
+        for record in self - stored:
+            sums[record.id] = sum(record[line_field].mapped(amount_field))
+        return sums
+
+    @api.depends('worker_line_ids.amount')
+    def _compute_total_worker_cost(self):
+        sums = self._operation_line_sums('worker_line_ids', 'amount')
+        for record in self:
+            record.total_worker_cost = sums.get(record.id, 0.0)
+
+    @api.depends('additional_expense_ids.amount')
+    def _compute_total_additional_cost(self):
+        sums = self._operation_line_sums('additional_expense_ids', 'amount')
+        for record in self:
+            record.total_additional_cost = sums.get(record.id, 0.0)
+
+    @api.depends(lambda self: self._operation_cost_fields)
+    def _compute_total_cost(self):
+        for record in self:
+            record.total_cost = sum(record[name] for name in self._operation_cost_fields)
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import defaultdict
+
+from odoo import models, fields, api, tools
+
+_logger = logging.getLogger(__name__)
+
+# İşçi sətir modelləri və onları əməliyyata bağlayan sahə
+OPERATION_WORKER_SOURCES = {
+    'farm.plowing.worker': 'plowing_id',
+    'farm.planting.worker': 'planting_id',
+    'farm.irrigation.worker': 'irrigation_id',
+    'farm.fertilizing.worker': 'fertilizing_id',
+    'farm.treatment.worker': 'treatment_id',
+    'farm.pruning.worker': 'pruning_id',
+    'farm.harvest.worker': 'harvest_id',
+    'farm.cold.storage.worker': 'cold_storage_id',
+}
+
+OPERATION_WORKER_COLUMNS = (
+    'worker_id', 'operation_model', 'operation_id', 'line_model', 'line_id',
+    'date', 'field_id', 'amount', 'note',
+)
+
+
+class FarmOperationWorker(models.Model):
+    """Bütün əməliyyatların işçi sətirləri - bir indeksli cədvəldə
+
+    Səkkiz işçi sətir modelinin birləşdirilmiş surətidir; sətirlər dəyişdikcə
+    yenilənir və fərqlər işçi statistikasına tətbiq edilir. Xərc hesabatı
+    yalnız bu cədvəli oxuyur.
+    """
+    _name = 'farm.operation.worker'
+    _description = 'Əməliyyat İşçi Sətri'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    worker_id = fields.Many2one('farm.worker', string='İşçi', readonly=True, ondelete='cascade')
+    operation_model = fields.Selection([
+        ('farm.plowing', 'Şumlama'),
+        ('farm.planting', 'Əkin'),
+        ('farm.irrigation', 'Sulama'),
+        ('farm.fertilizing', 'Gübrələmə'),
+        ('farm.treatment', 'Dərmanlama'),
+        ('farm.pruning', 'Budama'),
+        ('farm.harvest', 'Yığım'),
+        ('farm.cold.storage', 'Soyuducu'),
+    ], string='Əməliyyat Növü', readonly=True, required=True)
+    operation_id = fields.Many2oneReference('Əməliyyat', model_field='operation_model', readonly=True)
+    line_model = fields.Char('Sətir Modeli', readonly=True, required=True)
+    line_id = fields.Integer('Sətir ID', readonly=True, required=True)
+    date = fields.Date('Tarix', readonly=True)
+    field_id = fields.Many2one('farm.field', string='Sahə', readonly=True, ondelete='cascade', index=True)
+    amount = fields.Float('Məbləğ', readonly=True)
+    note = fields.Text('Qeyd', readonly=True)
+
+    _sql_constraints = [
+        ('line_unique', 'unique(line_model, line_id)', 'Hər işçi sətri yalnız bir dəfə ola bilər!'),
+    ]
+
+    def init(self):
+        cr = self.env.cr
+        tools.create_index(cr, 'farm_operation_worker_worker_date_index', self._table, ['worker_id', 'date'])
+        tools.create_index(cr, 'farm_operation_worker_date_index', self._table, ['date'])
+        tools.create_index(cr, 'farm_operation_worker_operation_index', self._table,
+                           ['operation_model', 'operation_id'])
+
+    @api.model
+    def _source_query(self, line_model, where):
+        """İşçi sətir modelindən bu cədvəlin sütunlarını seçən sorğu"""
+        line = self.env[line_model]
+        operation_field = OPERATION_WORKER_SOURCES[line_model]
+        operation = self.env[line._fields[operation_field].comodel_name]
+        return """
+            SELECT line.worker_id, '%(operation_model)s', op.id, '%(line_model)s', line.id,
+                   op.%(date)s::date, %(field)s, line.amount, op.notes
+            FROM %(line_table)s line
+            JOIN %(operation_table)s op ON op.id = line.%(operation_field)s
+            WHERE %(where)s
+        """ % {
+            'operation_model': operation._name,
+            'line_model': line_model,
+            'date': operation._operation_date_field,
+            'field': 'op.field_id' if 'field_id' in operation._fields else 'NULL::integer',
+            'line_table': line._table,
+            'operation_table': operation._table,
+            'operation_field': operation_field,
+            'where': where,
+        }
+
+    @api.model
+    def _rebuild(self):
+        """Cədvəli bütün işçi sətir modellərindən sıfırdan qurur"""
+        cr = self.env.cr
+        self.env.flush_all()
+        cr.execute("DELETE FROM farm_operation_worker")
+        for line_model in OPERATION_WORKER_SOURCES:
+            cr.execute("INSERT INTO farm_operation_worker (%s) %s" % (
+                ', '.join(OPERATION_WORKER_COLUMNS), self._source_query(line_model, 'TRUE')))
+        self.invalidate_model()
+        self.env['farm.worker']._reconcile_statistics()
+
+    @api.model
+    def _reconcile(self):
+        """Cədvəli mənbə sətirləri ilə müqayisə edir, yalnız fərqli sətirləri düzəldir
+
+        Sonra işçi statistikası da üzləşdirilir. Düzgün sətirlərə toxunulmur.
+        """
+        cr = self.env.cr
+        self.env.flush_all()
+        columns = ', '.join(OPERATION_WORKER_COLUMNS)
+        compared = ('worker_id', 'operation_id', 'date', 'field_id', 'amount', 'note')
+        fixed = 0
+        for line_model in OPERATION_WORKER_SOURCES:
+            cr.execute("""
+                DELETE FROM farm_operation_worker t
+                WHERE t.line_model = %%s
+                  AND NOT EXISTS (%s)
+            """ % self._source_query(line_model, 'line.id = t.line_id'), [line_model])
+            fixed += cr.rowcount
+            cr.execute("""
+                UPDATE farm_operation_worker t SET %(assign)s
+                FROM (%(source)s) AS s(%(columns)s)
+                WHERE t.line_model = s.line_model AND t.line_id = s.line_id
+                  AND (%(target)s) IS DISTINCT FROM (%(expected)s)
+            """ % {
+                'assign': ', '.join(f'{column} = s.{column}' for column in compared),
+                'source': self._source_query(line_model, 'TRUE'),
+                'columns': columns,
+                'target': ', '.join(f't.{column}' for column in compared),
+                'expected': ', '.join(f's.{column}' for column in compared),
+            })
+            fixed += cr.rowcount
+            cr.execute("""
+                INSERT INTO farm_operation_worker (%(columns)s)
+                SELECT * FROM (%(source)s) AS s(%(columns)s)
+                WHERE NOT EXISTS (SELECT 1 FROM farm_operation_worker t
+                                  WHERE t.line_model = s.line_model AND t.line_id = s.line_id)
+            """ % {'columns': columns, 'source': self._source_query(line_model, 'TRUE')})
+            fixed += cr.rowcount
+        self.invalidate_model()
+        if fixed:
+            _logger.warning("İşçi sətirləri cədvəli üzləşdirildi, düzəldilən sətir sayı: %s", fixed)
+        self.env['farm.worker']._reconcile_statistics()
+
+    @api.model
+    def _sync_lines(self, line_model, line_ids):
+        """Verilmiş işçi sətirlərini mənbədən yenidən yazır (silinənlər çıxarılır)"""
+        if not line_ids:
+            return
+        cr = self.env.cr
+        line = self.env[line_model]
+        line.flush_model()
+        self.env[line._fields[OPERATION_WORKER_SOURCES[line_model]].comodel_name].flush_model()
+        cr.execute("""
+            DELETE FROM farm_operation_worker WHERE line_model = %s AND line_id = ANY(%s)
+            RETURNING worker_id, amount, date
+        """, [line_model, list(line_ids)])
+        deltas = self._statistics_deltas(cr.fetchall(), sign=-1)
+        cr.execute("INSERT INTO farm_operation_worker (%s) %s RETURNING worker_id, amount, date" % (
+            ', '.join(OPERATION_WORKER_COLUMNS), self._source_query(line_model, 'line.id = ANY(%s)')),
+            [list(line_ids)])
+        self._statistics_deltas(cr.fetchall(), deltas=deltas)
+        self._after_sync(deltas)
+
+    @api.model
+    def _sync_operations(self, operations):
+        """Əməliyyatların bütün işçi sətirlərini yenidən yazır (tarix, sahə, qeyd dəyişəndə)"""
+        if not operations:
+            return
+        cr = self.env.cr
+        operations.flush_recordset()
+        deltas = self._remove_operations(operations, notify=False)
+        for line_model, operation_field in OPERATION_WORKER_SOURCES.items():
+            if self.env[line_model]._fields[operation_field].comodel_name != operations._name:
+                continue
+            self.env[line_model].flush_model()
+            cr.execute("INSERT INTO farm_operation_worker (%s) %s RETURNING worker_id, amount, date" % (
+                ', '.join(OPERATION_WORKER_COLUMNS),
+                self._source_query(line_model, 'line.%s = ANY(%%s)' % operation_field)),
+                [operations.ids])
+            self._statistics_deltas(cr.fetchall(), deltas=deltas)
+        self._after_sync(deltas)
+
+    @api.model
+    def _remove_operations(self, operations, notify=True, deltas=None):
+        """Silinən (və ya kaskadla silinəcək) əməliyyatların sətirlərini çıxarır"""
+        self.env.cr.execute("""
+            DELETE FROM farm_operation_worker WHERE operation_model = %s AND operation_id = ANY(%s)
+            RETURNING worker_id, amount, date
+        """, [operations._name, operations.ids])
+        deltas = self._statistics_deltas(self.env.cr.fetchall(), sign=-1, deltas=deltas)
+        if notify:
+            self._after_sync(deltas)
+        return deltas
+
+    @api.model
+    def _remove_field_operations(self, farm_fields):
+        """Sahə ilə kaskadla silinəcək əməliyyatların sətirlərini çıxarır"""
+        deltas = None
+        for line_model, operation_field in OPERATION_WORKER_SOURCES.items():
+            Operation = self.env[self.env[line_model]._fields[operation_field].comodel_name]
+            field = Operation._fields.get('field_id')
+            if not field or not field.store:
+                continue
+            operations = Operation.with_context(active_test=False).search([('field_id', 'in', farm_fields.ids)])
+            deltas = self._remove_operations(operations, notify=False, deltas=deltas)
+        if deltas:
+            self._after_sync(deltas)
+
+    @api.model
+    def _statistics_deltas(self, rows, sign=1, deltas=None):
+        """(işçi, məbləğ, tarix) sətirlərini {işçi id: [say, məbləğ, ən erkən tarix]} fərqlərinə toplayır"""
+        if deltas is None:
+            deltas = defaultdict(lambda: [0, 0.0, None])
+        for worker_id, amount, date in rows:
+            if worker_id:
+                delta = deltas[worker_id]
+                delta[0] += sign
+                delta[1] += sign * (amount or 0.0)
+                if date and (not delta[2] or date < delta[2]):
+                    delta[2] = date
+        return deltas
+
+    @api.model
+    def _after_sync(self, deltas):
+        self.invalidate_model()
+        self.env['farm.worker']._apply_statistics_deltas(deltas)
+        self.env['farm.worker.period']._reopen({worker_id: delta[2] for worker_id, delta in deltas.items()})
+
+
+class FarmOperationWorkerSourceMixin(models.AbstractModel):
+    """farm.operation.worker cədvəlini dolduran işçi sətir modelləri üçün mixin
+
+    Hesabat mixin-indən sonra _inherit-ə əlavə edilməlidir ki, cədvəl
+    hesabat yenilənməzdən əvvəl yazılsın.
+    """
+    _name = 'farm.operation.worker.source.mixin'
+    _description = 'Əməliyyat İşçi Sətri Mənbəyi'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['farm.operation.worker']._sync_lines(self._name, records.ids)
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        if {'worker_id', 'amount', OPERATION_WORKER_SOURCES[self._name]}.intersection(vals):
+            self.env['farm.operation.worker']._sync_lines(self._name, self.ids)
+        return result
+
+    def unlink(self):
+        line_ids = self.ids
+        result = super().unlink()
+        self.env['farm.operation.worker']._sync_lines(self._name, line_ids)
+        return result
@@ -1,5 +1,7 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
 
 
 class FarmPlowing(models.Model):
@@ -7,7 +9,17 @@ class FarmPlowing(models.Model):
     _name = 'farm.plowing'
     _description = 'Şumlama'
     _order = 'operation_date desc'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin',
+                'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.cost.cube.mixin', 'farm.tree.scope.mixin',
+                'farm.operation.mixin']
+
+    _expense_report_trigger_fields = ('operation_date', 'notes', 'field_id')
+    _operation_date_field = 'operation_date'
+    _expense_report_child_fields = ('additional_expense_ids',)
+    _cost_cube_date_field = 'operation_date'
+    _cost_cube_field_field = 'field_id'
+    _cost_cube_trigger_fields = ('operation_date', 'field_id')
 
     name = fields.Char('Əməliyyat Adı', required=True, compute='_compute_name', default='Şumlama')
     operation_date = fields.Datetime('Tarix', required=True, default=fields.Datetime.now)
@@ -16,6 +28,8 @@ class FarmPlowing(models.Model):
     parcel_ids = fields.Many2many('farm.parcel', string='Parsellər', domain="[('field_id', '=', field_id)]")
     row_ids = fields.Many2many('farm.row', string='Cərgələr')
     tree_ids = fields.Many2many('farm.tree', string='Ağaclar')
+    excluded_tree_ids = fields.Many2many('farm.tree', 'farm_plowing_excluded_tree_rel', 'operation_id', 'tree_id',
+                                         string='İstisna Ağaclar', domain="[('field_id', '=', field_id)]")
 
     # Texniki məlumatlar
     equipment = fields.Many2one('res.partner', string='İcraçı', domain="[('category_id.name', '=', 'İcracı')]")
@@ -36,21 +50,6 @@ class FarmPlowing(models.Model):
 
     notes = fields.Text('Qeydlər')
 
-    @api.depends('worker_line_ids.amount')
-    def _compute_total_worker_cost(self):
-        for record in self:
-            record.total_worker_cost = sum(line.amount for line in record.worker_line_ids)
-
-    @api.depends('additional_expense_ids.amount')
-    def _compute_total_additional_cost(self):
-        for record in self:
-            record.total_additional_cost = sum(expense.amount for expense in record.additional_expense_ids)
-
-    @api.depends('total_worker_cost', 'total_additional_cost')
-    def _compute_total_cost(self):
-        for record in self:
-            record.total_cost = record.total_worker_cost + record.total_additional_cost
-
     @api.constrains('plowing_depth', 'area_hectare')
     def _check_positive_values(self):
         for record in self:
@@ -78,6 +77,7 @@ class FarmPlowing(models.Model):
             self.parcel_ids = [(5,)]
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'parcel_ids': []}}
 
     @api.onchange('parcel_ids')
@@ -87,14 +87,16 @@ class FarmPlowing(models.Model):
         else:
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'row_ids': []}}
 
     @api.onchange('row_ids')
     def _onchange_row_ids(self):
         if self.row_ids:
-            return {'domain': {'tree_ids': [('row_id', 'in', self.row_ids.ids)]}}
+            return {'domain': {'tree_ids': self.env['farm.tree']._hierarchy_domain(self.row_ids)}}
         else:
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'tree_ids': []}}
 
     
@@ -102,9 +104,19 @@ class FarmPlanting(models.Model):
     """Əkin Əməliyyatı"""
     _name = 'farm.planting'
     _description = 'Əkin'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin',
+                'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.cost.cube.mixin', 'farm.tree.scope.mixin',
+                'farm.operation.mixin']
     _order = 'planting_date desc'
 
+    _expense_report_trigger_fields = ('planting_date', 'notes', 'field_id')
+    _operation_date_field = 'planting_date'
+    _expense_report_child_fields = ('additional_expense_ids',)
+    _cost_cube_date_field = 'planting_date'
+    _cost_cube_field_field = 'field_id'
+    _cost_cube_trigger_fields = ('planting_date', 'field_id')
+
     name = fields.Char('Əməliyyat Adı', required=True, compute='_compute_name', default='Əkin')
     planting_date = fields.Datetime('Əkin Tarixi', required=True, default=fields.Datetime.now)
 
@@ -112,6 +124,8 @@ class FarmPlanting(models.Model):
     parcel_ids = fields.Many2many('farm.parcel', string='Parsellər', domain="[('field_id', '=', field_id)]")
     row_ids = fields.Many2many('farm.row', string='Cərgələr')
     tree_ids = fields.Many2many('farm.tree', string='Ağaclar')
+    excluded_tree_ids = fields.Many2many('farm.tree', 'farm_planting_excluded_tree_rel', 'operation_id', 'tree_id',
+                                         string='İstisna Ağaclar', domain="[('field_id', '=', field_id)]")
     
     # Ağac məlumatları
     variety_id = fields.Many2one('farm.variety', string='Bitki Növü (Ağac)', required=True, ondelete='cascade')
@@ -142,26 +156,6 @@ class FarmPlanting(models.Model):
     # Qeydlər
     notes = fields.Text('Qeydlər')
 
-    @api.depends('tree_count', 'unit_price')
-    def _compute_total_cost(self):
-        for record in self:
-            record.total_cost = record.tree_count * record.unit_price
-
-    @api.depends('worker_line_ids.amount')
-    def _compute_total_worker_cost(self):
-        for record in self:
-            record.total_worker_cost = sum(line.amount for line in record.worker_line_ids)
-
-    @api.depends('additional_expense_ids.amount')
-    def _compute_total_additional_cost(self):
-        for record in self:
-            record.total_additional_cost = sum(expense.amount for expense in record.additional_expense_ids)
-
-    @api.depends('total_worker_cost', 'total_additional_cost')
-    def _compute_total_cost(self):
-        for record in self:
-            record.total_cost = record.total_worker_cost + record.total_additional_cost
-
     @api.constrains('tree_count')
     def _check_tree_count(self):
         for record in self:
@@ -187,6 +181,7 @@ class FarmPlanting(models.Model):
             self.parcel_ids = [(5,)]
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'parcel_ids': []}}
 
     @api.onchange('parcel_ids')
@@ -196,14 +191,16 @@ class FarmPlanting(models.Model):
         else:
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'row_ids': []}}
 
     @api.onchange('row_ids')
     def _onchange_row_ids(self):
         if self.row_ids:
-            return {'domain': {'tree_ids': [('row_id', 'in', self.row_ids.ids)]}}
+            return {'domain': {'tree_ids': self.env['farm.tree']._hierarchy_domain(self.row_ids)}}
         else:
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'tree_ids': []}}
 
 
@@ -211,9 +208,19 @@ class FarmIrrigation(models.Model):
     """Sulama Əməliyyatı"""
     _name = 'farm.irrigation'
     _description = 'Sulama'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin',
+                'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.cost.cube.mixin', 'farm.tree.scope.mixin',
+                'farm.operation.mixin']
     _order = 'irrigation_date desc'
 
+    _expense_report_trigger_fields = ('irrigation_date', 'notes', 'field_id')
+    _operation_date_field = 'irrigation_date'
+    _expense_report_child_fields = ('additional_expense_ids',)
+    _cost_cube_date_field = 'irrigation_date'
+    _cost_cube_field_field = 'field_id'
+    _cost_cube_trigger_fields = ('irrigation_date', 'field_id', 'water_liters')
+
     name = fields.Char('Əməliyyat Adı', required=True, compute='_compute_name', default='Sulama')
     irrigation_date = fields.Datetime('Tarix', required=True, default=fields.Datetime.now)
 
@@ -221,6 +228,8 @@ class FarmIrrigation(models.Model):
     parcel_ids = fields.Many2many('farm.parcel', string='Parsellər', domain="[('field_id', '=', field_id)]")
     row_ids = fields.Many2many('farm.row', string='Cərgələr')
     tree_ids = fields.Many2many('farm.tree', string='Ağaclar')
+    excluded_tree_ids = fields.Many2many('farm.tree', 'farm_irrigation_excluded_tree_rel', 'operation_id', 'tree_id',
+                                         string='İstisna Ağaclar', domain="[('field_id', '=', field_id)]")
     meter_id = fields.Many2one('farm.meter', string='Sayğac')
 
     # Sulama tipi
@@ -263,21 +272,6 @@ class FarmIrrigation(models.Model):
             else:
                 record.water_consumed = 0.0
 
-    @api.depends('worker_line_ids.amount')
-    def _compute_total_worker_cost(self):
-        for record in self:
-            record.total_worker_cost = sum(line.amount for line in record.worker_line_ids)
-
-    @api.depends('additional_expense_ids.amount')
-    def _compute_total_additional_cost(self):
-        for record in self:
-            record.total_additional_cost = sum(expense.amount for expense in record.additional_expense_ids)
-
-    @api.depends('total_worker_cost', 'total_additional_cost')
-    def _compute_total_cost(self):
-        for record in self:
-            record.total_cost = record.total_worker_cost + record.total_additional_cost
-
     @api.constrains('water_liters', 'meter_start', 'meter_end')
     def _check_positive_values(self):
         for record in self:
@@ -309,6 +303,7 @@ class FarmIrrigation(models.Model):
             self.parcel_ids = [(5,)]
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'parcel_ids': []}}
 
     @api.onchange('parcel_ids')
@@ -318,14 +313,16 @@ class FarmIrrigation(models.Model):
         else:
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'row_ids': []}}
 
     @api.onchange('row_ids')
     def _onchange_row_ids(self):
         if self.row_ids:
-            return {'domain': {'tree_ids': [('row_id', 'in', self.row_ids.ids)]}}
+            return {'domain': {'tree_ids': self.env['farm.tree']._hierarchy_domain(self.row_ids)}}
         else:
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'tree_ids': []}}
 
 
@@ -333,9 +330,20 @@ class FarmFertilizing(models.Model):
     """Gübrələmə Əməliyyatı"""
     _name = 'farm.fertilizing'
     _description = 'Gübrələmə'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin',
+                'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.cost.cube.mixin', 'farm.tree.scope.mixin',
+                'farm.operation.mixin']
     _order = 'fertilizing_date desc'
 
+    _operation_cost_fields = ('total_product_cost', 'total_worker_cost', 'total_additional_cost')
+    _expense_report_trigger_fields = ('fertilizing_date', 'notes', 'field_id')
+    _operation_date_field = 'fertilizing_date'
+    _expense_report_child_fields = ('additional_expense_ids',)
+    _cost_cube_date_field = 'fertilizing_date'
+    _cost_cube_field_field = 'field_id'
+    _cost_cube_trigger_fields = ('fertilizing_date', 'field_id')
+
     name = fields.Char('Əməliyyat Adı', required=True, compute='_compute_name', default='Gübrələmə')
     fertilizing_date = fields.Datetime('Tarix', required=True, default=fields.Datetime.now)
 
@@ -343,6 +351,8 @@ class FarmFertilizing(models.Model):
     parcel_ids = fields.Many2many('farm.parcel', string='Parsellər', domain="[('field_id', '=', field_id)]")
     row_ids = fields.Many2many('farm.row', string='Cərgələr')
     tree_ids = fields.Many2many('farm.tree', string='Ağaclar')
+    excluded_tree_ids = fields.Many2many('farm.tree', 'farm_fertilizing_excluded_tree_rel', 'operation_id', 'tree_id',
+                                         string='İstisna Ağaclar', domain="[('field_id', '=', field_id)]")
 
 
     # Gübrə tipi
@@ -357,6 +367,9 @@ class FarmFertilizing(models.Model):
     
     # Gübrə məlumatları
     product_line_ids = fields.One2many('farm.fertilizing.line', 'fertilizing_id', string='Məhsul Xərcləri')
+    stock_location_id = fields.Many2one('stock.location', string='Anbar Yeri', domain="[('usage', '=', 'internal')]",
+                                        default=lambda self: self.env['farm.stock.consumption']._default_location(),
+                                        help='İstifadə olunan məhsulların silinəcəyi anbar yeri')
     total_product_cost = fields.Float('Məhsul Xərci', compute='_compute_total_product_cost', store=True)
 
     # İşçi məlumatları
@@ -377,23 +390,27 @@ class FarmFertilizing(models.Model):
 
     @api.depends('product_line_ids.cost')
     def _compute_total_product_cost(self):
+        sums = self._operation_line_sums('product_line_ids', 'cost')
         for record in self:
-            record.total_product_cost = sum(line.cost for line in record.product_line_ids)
-
-    @api.depends('worker_line_ids.amount')
-    def _compute_total_worker_cost(self):
-        for record in self:
-            record.total_worker_cost = sum(line.amount for line in record.worker_line_ids)
-
-    @api.depends('additional_expense_ids.amount')
-    def _compute_total_additional_cost(self):
-        for record in self:
-            record.total_additional_cost = sum(expense.amount for expense in record.additional_expense_ids)
-
-    @api.depends('product_line_ids.cost', 'total_worker_cost', 'total_additional_cost')
-    def _compute_total_cost(self):
-        for record in self:
-            record.total_cost = record.total_product_cost + record.total_worker_cost + record.total_additional_cost
+            record.total_product_cost = sums.get(record.id, 0.0)
+
+    def unlink(self):
+        # Sətirlər kaskadla silinərdi və anbar hərəkəti mənbəsiz qalardı
+        self.env['farm.stock.consumption']._check_operations_unlink(self)
+        return super().unlink()
+
+    def action_consume_stock(self):
+        """Məhsulları anbardan sil"""
+        pickings = self.env['farm.stock.consumption']._consume([self.product_line_ids])
+        if not pickings:
+            raise UserError('Anbardan silinəcək məhsul sətri yoxdur!')
+        return {
+            'name': 'Anbar Sənədləri',
+            'type': 'ir.actions.act_window',
+            'view_mode': 'list,form',
+            'res_model': 'stock.picking',
+            'domain': [('id', 'in', pickings.ids)],
+        }
 
     @api.depends('field_id', 'parcel_ids', 'fertilizing_date')
     def _compute_name(self):
@@ -414,6 +431,7 @@ class FarmFertilizing(models.Model):
             self.parcel_ids = [(5,)]
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'parcel_ids': []}}
 
     @api.onchange('parcel_ids')
@@ -423,14 +441,16 @@ class FarmFertilizing(models.Model):
         else:
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'row_ids': []}}
 
     @api.onchange('row_ids')
     def _onchange_row_ids(self):
         if self.row_ids:
-            return {'domain': {'tree_ids': [('row_id', 'in', self.row_ids.ids)]}}
+            return {'domain': {'tree_ids': self.env['farm.tree']._hierarchy_domain(self.row_ids)}}
         else:
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'tree_ids': []}}
 
 
@@ -438,9 +458,20 @@ class FarmTreatment(models.Model):
     """Dərmanlama Əməliyyatı"""
     _name = 'farm.treatment'
     _description = 'Dərmanlama'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin',
+                'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.cost.cube.mixin', 'farm.tree.scope.mixin',
+                'farm.operation.mixin']
     _order = 'treatment_date desc'
 
+    _operation_cost_fields = ('total_product_cost', 'total_worker_cost', 'total_additional_cost')
+    _expense_report_trigger_fields = ('treatment_date', 'notes', 'field_id')
+    _operation_date_field = 'treatment_date'
+    _expense_report_child_fields = ('additional_expense_ids',)
+    _cost_cube_date_field = 'treatment_date'
+    _cost_cube_field_field = 'field_id'
+    _cost_cube_trigger_fields = ('treatment_date', 'field_id')
+
     name = fields.Char('Əməliyyat Adı', required=True, compute='_compute_name', default='Dərmanlama')
     treatment_date = fields.Datetime('Tarix', required=True, default=fields.Datetime.now)
 
@@ -448,6 +479,8 @@ class FarmTreatment(models.Model):
     parcel_ids = fields.Many2many('farm.parcel', string='Parsellər', domain="[('field_id', '=', field_id)]")
     row_ids = fields.Many2many('farm.row', string='Cərgələr')
     tree_ids = fields.Many2many('farm.tree', string='Ağaclar')
+    excluded_tree_ids = fields.Many2many('farm.tree', 'farm_treatment_excluded_tree_rel', 'operation_id', 'tree_id',
+                                         string='İstisna Ağaclar', domain="[('field_id', '=', field_id)]")
     
     # Tətbiq üsulu
     application_method = fields.Selection([
@@ -460,6 +493,9 @@ class FarmTreatment(models.Model):
 
     # Xəstəlik və dərman
     product_line_ids = fields.One2many('farm.treatment.line', 'treatment_id', string='Dərman Xərcləri')
+    stock_location_id = fields.Many2one('stock.location', string='Anbar Yeri', domain="[('usage', '=', 'internal')]",
+                                        default=lambda self: self.env['farm.stock.consumption']._default_location(),
+                                        help='İstifadə olunan məhsulların silinəcəyi anbar yeri')
     total_product_cost = fields.Float('Məhsul Xərci', compute='_compute_total_product_cost', store=True)
 
     # İşçi məlumatları
@@ -478,23 +514,27 @@ class FarmTreatment(models.Model):
 
     @api.depends('product_line_ids.cost')
     def _compute_total_product_cost(self):
+        sums = self._operation_line_sums('product_line_ids', 'cost')
         for record in self:
-            record.total_product_cost = sum(line.cost for line in record.product_line_ids)
-
-    @api.depends('worker_line_ids.amount')
-    def _compute_total_worker_cost(self):
-        for record in self:
-            record.total_worker_cost = sum(line.amount for line in record.worker_line_ids)
-
-    @api.depends('additional_expense_ids.amount')
-    def _compute_total_additional_cost(self):
-        for record in self:
-            record.total_additional_cost = sum(expense.amount for expense in record.additional_expense_ids)
-
-    @api.depends('total_worker_cost', 'total_additional_cost')
-    def _compute_total_cost(self):
-        for record in self:
-            record.total_cost = record.total_worker_cost + record.total_additional_cost + record.total_product_cost
+            record.total_product_cost = sums.get(record.id, 0.0)
+
+    def unlink(self):
+        # Sətirlər kaskadla silinərdi və anbar hərəkəti mənbəsiz qalardı
+        self.env['farm.stock.consumption']._check_operations_unlink(self)
+        return super().unlink()
+
+    def action_consume_stock(self):
+        """Məhsulları anbardan sil"""
+        pickings = self.env['farm.stock.consumption']._consume([self.product_line_ids])
+        if not pickings:
+            raise UserError('Anbardan silinəcək məhsul sətri yoxdur!')
+        return {
+            'name': 'Anbar Sənədləri',
+            'type': 'ir.actions.act_window',
+            'view_mode': 'list,form',
+            'res_model': 'stock.picking',
+            'domain': [('id', 'in', pickings.ids)],
+        }
 
     @api.depends('field_id', 'parcel_ids', 'treatment_date')
     def _compute_name(self):
@@ -515,6 +555,7 @@ class FarmTreatment(models.Model):
             self.parcel_ids = [(5,)]
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'parcel_ids': []}}
 
     @api.onchange('parcel_ids')
@@ -524,14 +565,16 @@ class FarmTreatment(models.Model):
         else:
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'row_ids': []}}
 
     @api.onchange('row_ids')
     def _onchange_row_ids(self):
         if self.row_ids:
-            return {'domain': {'tree_ids': [('row_id', 'in', self.row_ids.ids)]}}
+            return {'domain': {'tree_ids': self.env['farm.tree']._hierarchy_domain(self.row_ids)}}
         else:
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'tree_ids': []}}
 
 
@@ -539,6 +582,10 @@ class FarmFertilizingLine(models.Model):
     """Gübrələmə Məhsul Sətiri"""
     _name = 'farm.fertilizing.line'
     _description = 'Gübrələmə Məhsul Sətiri'
+    _inherit = ['farm.cost.cube.mixin', 'farm.stock.consumption.mixin']
+
+    _cost_cube_parent_fields = ('fertilizing_id',)
+    _stock_consumption_operation_field = 'fertilizing_id'
 
     fertilizing_id = fields.Many2one('farm.fertilizing', string='Gübrələmə', ondelete='cascade', required=True)
     product_id = fields.Many2one('product.product', string='Gübrə Məhsulu', required=True, 
@@ -559,14 +606,10 @@ class FarmFertilizingLine(models.Model):
 
     @api.depends('product_id')
     def _compute_available_qty(self):
+        # Bütün sətirlərin məhsulları üçün bir stock.quant sorğusu
+        available = self.env['farm.stock.availability']._get_available_qty(self.product_id)
         for line in self:
-            if line.product_id:
-                try:
-                    line.available_qty = line.product_id.qty_available
-                except:
-                    line.available_qty = 0.0
-            else:
-                line.available_qty = 0.0
+            line.available_qty = available.get(line.product_id.id, 0.0)
 
     @api.depends('product_qty', 'unit_cost')
     def _compute_cost(self):
@@ -588,6 +631,10 @@ class FarmTreatmentLine(models.Model):
     """Dərmanlama Məhsul Sətiri"""
     _name = 'farm.treatment.line'
     _description = 'Dərmanlama Məhsul Sətiri'
+    _inherit = ['farm.cost.cube.mixin', 'farm.stock.consumption.mixin']
+
+    _cost_cube_parent_fields = ('treatment_id',)
+    _stock_consumption_operation_field = 'treatment_id'
 
     treatment_id = fields.Many2one('farm.treatment', string='Dərmanlama', ondelete='cascade', required=True)
     product_id = fields.Many2one('product.product', string='Dərman Məhsulu', required=True, 
@@ -608,14 +655,10 @@ class FarmTreatmentLine(models.Model):
 
     @api.depends('product_id')
     def _compute_available_qty(self):
+        # Bütün sətirlərin məhsulları üçün bir stock.quant sorğusu
+        available = self.env['farm.stock.availability']._get_available_qty(self.product_id)
         for line in self:
-            if line.product_id:
-                try:
-                    line.available_qty = line.product_id.qty_available
-                except:
-                    line.available_qty = 0.0
-            else:
-                line.available_qty = 0.0
+            line.available_qty = available.get(line.product_id.id, 0.0)
 
     @api.depends('product_qty', 'unit_cost')
     def _compute_cost(self):
@@ -638,6 +681,13 @@ class FarmAdditionalExpense(models.Model):
     """Digər Xərclər Base Model"""
     _name = 'farm.additional.expense'
     _description = 'Digər Xərclər'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin', 'farm.cost.cube.mixin']
+
+    _cash_ledger_required_fields = ('expense_date',)
+    _cost_cube_parent_fields = (
+        'plowing_id', 'planting_id', 'irrigation_id', 'fertilizing_id',
+        'treatment_id', 'pruning_id', 'harvest_id',
+    )
 
     name = fields.Char('Xərc Adı', required=True)
     description = fields.Text('Açıqlama')
@@ -664,6 +714,42 @@ class FarmAdditionalExpense(models.Model):
     harvest_id = fields.Many2one('farm.harvest', string='Yığım', ondelete='cascade')
     cold_storage_id = fields.Many2one('farm.cold.storage', string='Soyuducu Anbarı', ondelete='cascade')
 
+    # Aid olduğu əməliyyatdan götürülür - sahə üzrə filtrləmə üçün
+    field_id = fields.Many2one('farm.field', string='Sahə', compute='_compute_operation_data',
+                               store=True, index=True)
+    operation_date = fields.Date('Əməliyyat Tarixi', compute='_compute_operation_data',
+                                 store=True, index=True)
+
+    @api.depends('plowing_id.field_id', 'plowing_id.operation_date',
+                 'planting_id.field_id', 'planting_id.planting_date',
+                 'irrigation_id.field_id', 'irrigation_id.irrigation_date',
+                 'fertilizing_id.field_id', 'fertilizing_id.fertilizing_date',
+                 'treatment_id.field_id', 'treatment_id.treatment_date',
+                 'pruning_id.field_id', 'pruning_id.pruning_date',
+                 'harvest_id.field_id', 'harvest_id.harvest_date',
+                 'cold_storage_id.storage_date')
+    def _compute_operation_data(self):
+        for expense in self:
+            if expense.plowing_id:
+                operation, date = expense.plowing_id, expense.plowing_id.operation_date
+            elif expense.planting_id:
+                operation, date = expense.planting_id, expense.planting_id.planting_date
+            elif expense.irrigation_id:
+                operation, date = expense.irrigation_id, expense.irrigation_id.irrigation_date
+            elif expense.fertilizing_id:
+                operation, date = expense.fertilizing_id, expense.fertilizing_id.fertilizing_date
+            elif expense.treatment_id:
+                operation, date = expense.treatment_id, expense.treatment_id.treatment_date
+            elif expense.pruning_id:
+                operation, date = expense.pruning_id, expense.pruning_id.pruning_date
+            elif expense.harvest_id:
+                operation, date = expense.harvest_id, expense.harvest_id.harvest_date
+            else:
+                # Soyuducu anbarı sahəyə bağlı deyil
+                operation, date = None, expense.cold_storage_id.storage_date
+            expense.field_id = operation.field_id if operation else False
+            expense.operation_date = fields.Date.to_date(date) if date else False
+
     @api.constrains('amount')
     def _check_amount(self):
         for expense in self:
@@ -674,9 +760,19 @@ class FarmPruning(models.Model):
     """Budama Əməliyyatı"""
     _name = 'farm.pruning'
     _description = 'Budama'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin',
+                'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.cost.cube.mixin', 'farm.tree.scope.mixin',
+                'farm.operation.mixin']
     _order = 'pruning_date desc'
 
+    _expense_report_trigger_fields = ('pruning_date', 'notes', 'field_id')
+    _operation_date_field = 'pruning_date'
+    _expense_report_child_fields = ('additional_expense_ids',)
+    _cost_cube_date_field = 'pruning_date'
+    _cost_cube_field_field = 'field_id'
+    _cost_cube_trigger_fields = ('pruning_date', 'field_id')
+
     name = fields.Char('Əməliyyat Adı', required=True, compute='_compute_name', default='Budama')
     pruning_date = fields.Datetime('Tarix', required=True, default=fields.Datetime.now)
 
@@ -684,6 +780,8 @@ class FarmPruning(models.Model):
     parcel_ids = fields.Many2many('farm.parcel', string='Parsellər', domain="[('field_id', '=', field_id)]")
     row_ids = fields.Many2many('farm.row', string='Cərgələr')
     tree_ids = fields.Many2many('farm.tree', string='Ağaclar')
+    excluded_tree_ids = fields.Many2many('farm.tree', 'farm_pruning_excluded_tree_rel', 'operation_id', 'tree_id',
+                                         string='İstisna Ağaclar', domain="[('field_id', '=', field_id)]")
     
     # Budama məlumatları
     pruned_tree_count = fields.Integer('Budanan Ağac Sayı', required=True)
@@ -706,21 +804,6 @@ class FarmPruning(models.Model):
     notes = fields.Text('Qeydlər')
     active = fields.Boolean('Aktiv', default=True)
 
-    @api.depends('worker_line_ids.amount')
-    def _compute_total_worker_cost(self):
-        for record in self:
-            record.total_worker_cost = sum(line.amount for line in record.worker_line_ids)
-
-    @api.depends('additional_expense_ids.amount')
-    def _compute_total_additional_cost(self):
-        for record in self:
-            record.total_additional_cost = sum(expense.amount for expense in record.additional_expense_ids)
-
-    @api.depends('total_worker_cost', 'total_additional_cost')
-    def _compute_total_cost(self):
-        for record in self:
-            record.total_cost = record.total_worker_cost + record.total_additional_cost
-
     @api.constrains('pruned_tree_count')
     def _check_positive_values(self):
         for record in self:
@@ -746,6 +829,7 @@ class FarmPruning(models.Model):
             self.parcel_ids = [(5,)]
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'parcel_ids': []}}
 
     @api.onchange('parcel_ids')
@@ -755,14 +839,16 @@ class FarmPruning(models.Model):
         else:
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'row_ids': []}}
 
     @api.onchange('row_ids')
     def _onchange_row_ids(self):
         if self.row_ids:
-            return {'domain': {'tree_ids': [('row_id', 'in', self.row_ids.ids)]}}
+            return {'domain': {'tree_ids': self.env['farm.tree']._hierarchy_domain(self.row_ids)}}
         else:
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'tree_ids': []}}
 
 
@@ -770,9 +856,19 @@ class FarmHarvest(models.Model):
     """Yığım Əməliyyatı"""
     _name = 'farm.harvest'
     _description = 'Yığım'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin',
+                'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.cost.cube.mixin', 'farm.tree.scope.mixin',
+                'farm.operation.mixin']
     _order = 'harvest_date desc'
 
+    _expense_report_trigger_fields = ('harvest_date', 'notes', 'field_id')
+    _operation_date_field = 'harvest_date'
+    _expense_report_child_fields = ('additional_expense_ids',)
+    _cost_cube_date_field = 'harvest_date'
+    _cost_cube_field_field = 'field_id'
+    _cost_cube_trigger_fields = ('harvest_date', 'field_id')
+
     name = fields.Char('Əməliyyat Adı', required=True, compute='_compute_name', default='Yığım')
     harvest_date = fields.Datetime('Yığım Tarixi', required=True, default=fields.Datetime.now)
 
@@ -780,6 +876,8 @@ class FarmHarvest(models.Model):
     parcel_ids = fields.Many2many('farm.parcel', string='Parsellər', domain="[('field_id', '=', field_id)]")
     row_ids = fields.Many2many('farm.row', string='Cərgələr')
     tree_ids = fields.Many2many('farm.tree', string='Ağaclar')
+    excluded_tree_ids = fields.Many2many('farm.tree', 'farm_harvest_excluded_tree_rel', 'operation_id', 'tree_id',
+                                         string='İstisna Ağaclar', domain="[('field_id', '=', field_id)]")
     
     # Yığım məlumatları
     harvest_type = fields.Selection([
@@ -810,21 +908,6 @@ class FarmHarvest(models.Model):
     notes = fields.Text('Qeydlər')
     active = fields.Boolean('Aktiv', default=True)
 
-    @api.depends('worker_line_ids.amount')
-    def _compute_total_worker_cost(self):
-        for record in self:
-            record.total_worker_cost = sum(line.amount for line in record.worker_line_ids)
-
-    @api.depends('additional_expense_ids.amount')
-    def _compute_total_additional_cost(self):
-        for record in self:
-            record.total_additional_cost = sum(expense.amount for expense in record.additional_expense_ids)
-
-    @api.depends('total_worker_cost', 'total_additional_cost')
-    def _compute_total_cost(self):
-        for record in self:
-            record.total_cost = record.total_worker_cost + record.total_additional_cost
-
     @api.constrains('tree_count', 'quantity_kg')
     def _check_positive_values(self):
         for record in self:
@@ -852,6 +935,7 @@ class FarmHarvest(models.Model):
             self.parcel_ids = [(5,)]
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'parcel_ids': []}}
 
     @api.onchange('parcel_ids')
@@ -861,14 +945,16 @@ class FarmHarvest(models.Model):
         else:
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'row_ids': []}}
 
     @api.onchange('row_ids')
     def _onchange_row_ids(self):
         if self.row_ids:
-            return {'domain': {'tree_ids': [('row_id', 'in', self.row_ids.ids)]}}
+            return {'domain': {'tree_ids': self.env['farm.tree']._hierarchy_domain(self.row_ids)}}
         else:
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'tree_ids': []}}
 
 
@@ -876,7 +962,7 @@ class FarmDamagedTrees(models.Model):
     """Zərərçəkmiş Ağaclar"""
     _name = 'farm.damaged.trees'
     _description = 'Zərərçəkmiş Ağaclar'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin', 'farm.tree.scope.mixin']
     _order = 'damage_date desc'
 
     name = fields.Char('Qeyd Adı', required=True, compute='_compute_name', default='Zərərçəkmiş Ağaclar')
@@ -886,6 +972,8 @@ class FarmDamagedTrees(models.Model):
     parcel_ids = fields.Many2many('farm.parcel', string='Parsellər', domain="[('field_id', '=', field_id)]")
     row_ids = fields.Many2many('farm.row', string='Cərgələr')
     tree_ids = fields.Many2many('farm.tree', string='Ağaclar')
+    excluded_tree_ids = fields.Many2many('farm.tree', 'farm_damaged_trees_excluded_tree_rel', 'operation_id', 'tree_id',
+                                         string='İstisna Ağaclar', domain="[('field_id', '=', field_id)]")
     
     # Zərər məlumatları
     damaged_tree_count = fields.Integer('Zərərçəkmiş Ağac Sayı', required=True)
@@ -941,6 +1029,7 @@ class FarmDamagedTrees(models.Model):
             self.parcel_ids = [(5,)]
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'parcel_ids': []}}
 
     @api.onchange('parcel_ids')
@@ -950,23 +1039,32 @@ class FarmDamagedTrees(models.Model):
         else:
             self.row_ids = [(5,)]
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'row_ids': []}}
 
     @api.onchange('row_ids')
     def _onchange_row_ids(self):
         if self.row_ids:
-            return {'domain': {'tree_ids': [('row_id', 'in', self.row_ids.ids)]}}
+            return {'domain': {'tree_ids': self.env['farm.tree']._hierarchy_domain(self.row_ids)}}
         else:
             self.tree_ids = [(5,)]
+            self.excluded_tree_ids = [(5,)]
             return {'domain': {'tree_ids': []}}
 
 class FarmColdStorage(models.Model):
     """Malların Soyuducuya Yerləşdirilməsi"""
     _name = 'farm.cold.storage'
     _description = 'Soyuducu Anbarı'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin',
+                'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin',
+                'farm.operation.mixin']
     _order = 'storage_date desc'
 
+    _expense_report_trigger_fields = ('storage_date', 'notes')
+    _operation_date_field = 'storage_date'
+    _expense_report_child_fields = ('additional_expense_ids',)
+
     name = fields.Char('Əməliyyat Adı', required=True, compute='_compute_name', default='Soyuducuya Yerləşdirmə')
     storage_date = fields.Datetime('Tarix', required=True, default=fields.Datetime.now)
 
@@ -1012,21 +1110,6 @@ class FarmColdStorage(models.Model):
     notes = fields.Text('Qeydlər')
     active = fields.Boolean('Aktiv', default=True)
 
-    @api.depends('worker_line_ids.amount')
-    def _compute_total_worker_cost(self):
-        for record in self:
-            record.total_worker_cost = sum(line.amount for line in record.worker_line_ids)
-
-    @api.depends('additional_expense_ids.amount')
-    def _compute_total_additional_cost(self):
-        for record in self:
-            record.total_additional_cost = sum(expense.amount for expense in record.additional_expense_ids)
-
-    @api.depends('total_worker_cost', 'total_additional_cost')
-    def _compute_total_cost(self):
-        for record in self:
-            record.total_cost = record.total_worker_cost + record.total_additional_cost
-
     @api.constrains('quantity_kg', 'temperature', 'humidity')
     def _check_values(self):
         for record in self:
@@ -1035,15 +1118,56 @@ class FarmColdStorage(models.Model):
             if record.humidity and not (0 <= record.humidity <= 100):
                 raise ValidationError('Rütubət 0-100% arasında olmalıdır!')
 
-    @api.constrains('pallet_code')
-    def _check_unique_pallet_code(self):
-        for record in self:
-            if self.search_count([
-                ('pallet_code', '=', record.pallet_code),
-                ('status', '=', 'stored'),
-                ('id', '!=', record.id)
-            ]) > 0:
-                raise ValidationError('Bu palet kodu artıq soyuducuda mövcuddur!')
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Palet unikallığı reyestrin indeksi ilə yoxlanılır
+        self.env['farm.pallet.occupancy']._sync(records)
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        if set(self.env['farm.pallet.occupancy']._source_fields).intersection(vals):
+            self.env['farm.pallet.occupancy']._sync(self)
+        return result
+
+    def unlink(self):
+        # Reyestr sətirləri bazada kaskadla silinərdi - soyuducu yükü burada azaldılır
+        self.env['farm.pallet.occupancy']._remove(self)
+        return super().unlink()
+
+    def action_propose_slot(self):
+        """Bölmə və nömrəsi olmayan paletlərə soyuducu və yer təklif edir"""
+        storages = self.filtered(lambda s: s.status == 'stored' and not (s.storage_section and s.storage_position))
+        if not storages:
+            raise UserError('Yer təklif ediləcək palet yoxdur!')
+        # Reyestrdəki paletlərin miqdarı hazırkı soyuducunun yükündən çıxılır - yer dəyişə bilər
+        released = defaultdict(float)
+        for storage in storages.filtered('active'):
+            released[storage.cooler_id] += storage.quantity_kg
+        # Temperatura daxil edilməyibsə (0) soyuducu temperaturu məhdudlaşdırılmır
+        proposals = self.env['farm.cooler']._propose_slots(
+            [(storage.quantity_kg, storage.temperature or None) for storage in storages], released=released)
+        unplaced = self.browse()
+        for storage, proposal in zip(storages, proposals):
+            if not proposal:
+                unplaced |= storage
+                continue
+            cooler, section, position = proposal
+            storage.write({'cooler_id': cooler.id, 'storage_section': section, 'storage_position': position})
+        if unplaced:
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': 'Xəbərdarlıq!',
+                    'message': 'Tutumu və temperaturu uyğun boş yer tapılmadı: %s' % ', '.join(
+                        unplaced.mapped('pallet_code')),
+                    'type': 'warning',
+                    'sticky': True,
+                }
+            }
+        return True
 
     @api.depends('storage_date')
     def _compute_name(self):
@@ -1059,6 +1183,12 @@ class FarmPlowingWorker(models.Model):
     """Şumlama İşçi Sətiri"""
     _name = 'farm.plowing.worker'
     _description = 'Şumlama İşçi Sətiri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin', 'farm.cost.cube.mixin',
+                'farm.operation.worker.source.mixin']
+
+    _cash_ledger_required_fields = ('worker_id',)
+    _expense_report_parent_field = 'plowing_id'
+    _cost_cube_parent_fields = ('plowing_id',)
 
     plowing_id = fields.Many2one('farm.plowing', string='Şumlama', ondelete='cascade', required=True)
     worker_id = fields.Many2one('farm.worker', string='İşçi', ondelete='cascade')
@@ -1075,6 +1205,12 @@ class FarmPlantingWorker(models.Model):
     """Əkin İşçi Sətiri"""
     _name = 'farm.planting.worker'
     _description = 'Əkin İşçi Sətiri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin', 'farm.cost.cube.mixin',
+                'farm.operation.worker.source.mixin']
+
+    _cash_ledger_required_fields = ('worker_id',)
+    _expense_report_parent_field = 'planting_id'
+    _cost_cube_parent_fields = ('planting_id',)
 
     planting_id = fields.Many2one('farm.planting', string='Əkin', ondelete='cascade', required=True)
     worker_id = fields.Many2one('farm.worker', string='İşçi', ondelete='cascade')
@@ -1091,6 +1227,12 @@ class FarmIrrigationWorker(models.Model):
     """Sulama İşçi Sətiri"""
     _name = 'farm.irrigation.worker'
     _description = 'Sulama İşçi Sətiri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin', 'farm.cost.cube.mixin',
+                'farm.operation.worker.source.mixin']
+
+    _cash_ledger_required_fields = ('worker_id',)
+    _expense_report_parent_field = 'irrigation_id'
+    _cost_cube_parent_fields = ('irrigation_id',)
 
     irrigation_id = fields.Many2one('farm.irrigation', string='Sulama', ondelete='cascade', required=True)
     worker_id = fields.Many2one('farm.worker', string='İşçi', ondelete='cascade')
@@ -1107,6 +1249,12 @@ class FarmFertilizingWorker(models.Model):
     """Gübrələmə İşçi Sətiri"""
     _name = 'farm.fertilizing.worker'
     _description = 'Gübrələmə İşçi Sətiri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin', 'farm.cost.cube.mixin',
+                'farm.operation.worker.source.mixin']
+
+    _cash_ledger_required_fields = ('worker_id',)
+    _expense_report_parent_field = 'fertilizing_id'
+    _cost_cube_parent_fields = ('fertilizing_id',)
 
     fertilizing_id = fields.Many2one('farm.fertilizing', string='Gübrələmə', ondelete='cascade', required=True)
     worker_id = fields.Many2one('farm.worker', string='İşçi', ondelete='cascade')
@@ -1123,6 +1271,12 @@ class FarmTreatmentWorker(models.Model):
     """Dərmanlama İşçi Sətiri"""
     _name = 'farm.treatment.worker'
     _description = 'Dərmanlama İşçi Sətiri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin', 'farm.cost.cube.mixin',
+                'farm.operation.worker.source.mixin']
+
+    _cash_ledger_required_fields = ('worker_id',)
+    _expense_report_parent_field = 'treatment_id'
+    _cost_cube_parent_fields = ('treatment_id',)
 
     treatment_id = fields.Many2one('farm.treatment', string='Dərmanlama', ondelete='cascade', required=True)
     worker_id = fields.Many2one('farm.worker', string='İşçi', ondelete='cascade')
@@ -1139,6 +1293,12 @@ class FarmPruningWorker(models.Model):
     """Budama İşçi Sətiri"""
     _name = 'farm.pruning.worker'
     _description = 'Budama İşçi Sətiri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin', 'farm.cost.cube.mixin',
+                'farm.operation.worker.source.mixin']
+
+    _cash_ledger_required_fields = ('worker_id',)
+    _expense_report_parent_field = 'pruning_id'
+    _cost_cube_parent_fields = ('pruning_id',)
 
     pruning_id = fields.Many2one('farm.pruning', string='Budama', ondelete='cascade', required=True)
     worker_id = fields.Many2one('farm.worker', string='İşçi', ondelete='cascade')
@@ -1155,6 +1315,12 @@ class FarmHarvestWorker(models.Model):
     """Yığım İşçi Sətiri"""
     _name = 'farm.harvest.worker'
     _description = 'Yığım İşçi Sətiri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin', 'farm.cost.cube.mixin',
+                'farm.operation.worker.source.mixin']
+
+    _cash_ledger_required_fields = ('worker_id',)
+    _expense_report_parent_field = 'harvest_id'
+    _cost_cube_parent_fields = ('harvest_id',)
 
     harvest_id = fields.Many2one('farm.harvest', string='Yığım', ondelete='cascade', required=True)
     worker_id = fields.Many2one('farm.worker', string='İşçi', ondelete='cascade')
@@ -1171,6 +1337,11 @@ class FarmColdStorageWorker(models.Model):
     """Soyuducu Anbarı İşçi Sətiri"""
     _name = 'farm.cold.storage.worker'
     _description = 'Soyuducu Anbarı İşçi Sətiri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin',
+                'farm.operation.worker.source.mixin']
+
+    _cash_ledger_required_fields = ('worker_id',)
+    _expense_report_parent_field = 'cold_storage_id'
 
     cold_storage_id = fields.Many2one('farm.cold.storage', string='Soyuducu Anbarı', ondelete='cascade', required=True)
     worker_id = fields.Many2one('farm.worker', string='İşçi', ondelete='cascade')
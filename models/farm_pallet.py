@@ -5,9 +5,14 @@ from odoo.exceptions import ValidationError
 class FarmPallet(models.Model):
     _name = 'farm.pallet'
     _description = 'Paletlər'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin', 'farm.code.sequence.mixin']
     _order = 'pallet_code'
 
+    _expense_report_trigger_fields = ()
+    _code_field = 'pallet_code'
+    _code_sequence = 'farm.pallet.code'
+
     name = fields.Char('Palet Adı')
     pallet_code = fields.Char('Palet Kodu', copy=False, readonly=True)
     
@@ -76,25 +81,27 @@ class FarmPallet(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
+        # Palet kodu PL001, PL002, PL003... formatında ardıcıllıqdan ayrılır
+        self._assign_codes(vals_list)
         for vals in vals_list:
-            if not vals.get('pallet_code'):
-                # Palet kodu PL001, PL002, PL003... formatında generasiya et
-                last_pallet = self.search([('pallet_code', 'like', 'PL%')], order='pallet_code desc', limit=1)
-                if last_pallet and last_pallet.pallet_code:
-                    try:
-                        # "PL001" formatından nömrəni çıxar
-                        number = int(last_pallet.pallet_code.replace('PL', '')) + 1
-                        vals['pallet_code'] = f'PL{number:03d}'
-                    except ValueError:
-                        vals['pallet_code'] = 'PL001'
-                else:
-                    vals['pallet_code'] = 'PL001'
-            
             # Default ad ver
             if not vals.get('name') and vals.get('pallet_code'):
                 vals['name'] = vals['pallet_code']
         return super().create(vals_list)
 
+    def unlink(self):
+        # Paletlə kaskadla silinən soyuducu anbarı qeydlərinin işçi sətirləri və reyestr sətirləri
+        storages = self.env['farm.cold.storage'].with_context(active_test=False).search(
+            [('pallet_id', 'in', self.ids)])
+        self.env['farm.operation.worker']._remove_operations(storages)
+        self.env['farm.pallet.occupancy']._remove(storages)
+        return super().unlink()
+
+    def _expense_report_keys(self):
+        """Paletlə kaskadla silinən soyuducu anbarı qeydlərinin sətirləri"""
+        return self.env['farm.cold.storage'].with_context(active_test=False).search(
+            [('pallet_id', 'in', self.ids)])._expense_report_keys()
+
     @api.constrains('capacity_kg')
     def _check_capacity(self):
         for record in self:
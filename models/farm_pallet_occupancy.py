@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+
+
+class FarmPalletOccupancy(models.Model):
+    """Soyuducudakı paletlər reyestri - hər palet üçün hazırkı yeri
+
+    Yalnız 'Anbarlandırılıb' statusundakı aktiv soyuducu anbarı qeydləri
+    üçün sətir saxlanılır və status/yer dəyişdikcə yenilənir. Palet
+    unikallığı, soyuducudakı paletlər və palet axtarışı tarixçə cədvəlini
+    skan etmədən bu cədvəlin indeksləri ilə cavablanır.
+    """
+    _name = 'farm.pallet.occupancy'
+    _description = 'Soyuducudakı Paletlər'
+    _order = 'cooler_id, storage_section, storage_position'
+    _log_access = False
+
+    pallet_id = fields.Many2one('farm.pallet', string='Palet', required=True, readonly=True, ondelete='cascade')
+    pallet_code = fields.Char('Palet Kodu', readonly=True, index=True)
+    cold_storage_id = fields.Many2one('farm.cold.storage', string='Soyuducu Anbarı Qeydi', required=True,
+                                      readonly=True, ondelete='cascade', index=True)
+    cooler_id = fields.Many2one('farm.cooler', string='Soyuducu', readonly=True, ondelete='cascade')
+    storage_section = fields.Char('Bölmə', readonly=True)
+    storage_position = fields.Char('Paletin Yerləşdiyi Nömrə', readonly=True)
+    quantity_kg = fields.Float('Miqdar (kq)', readonly=True)
+    entry_time = fields.Datetime('Giriş Vaxtı', readonly=True)
+
+    _sql_constraints = [
+        # Cədvəldə yalnız anbardakı paletlər var - unikal indeks "anbarda olan paletlər" üzrə qismən indeksdir
+        ('pallet_unique', 'unique(pallet_id)', 'Bu palet kodu artıq soyuducuda mövcuddur!'),
+    ]
+
+    # Soyuducu anbarı qeydində reyestri dəyişən sahələr
+    _source_fields = ('pallet_id', 'cooler_id', 'storage_section', 'storage_position', 'quantity_kg',
+                      'entry_time', 'status', 'active')
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS farm_pallet_occupancy_cooler_position_index
+            ON farm_pallet_occupancy (cooler_id, storage_section, storage_position)
+        """)
+        self._rebuild()
+
+    # Silinən/əlavə olunan sətirlərdən soyuducu yükü və yer doluluğu üçün qaytarılan sütunlar
+    _returning = ' RETURNING cooler_id, storage_section, storage_position, quantity_kg'
+
+    @api.model
+    def _insert_query(self, where):
+        return """
+            INSERT INTO farm_pallet_occupancy
+                (pallet_id, pallet_code, cold_storage_id, cooler_id, storage_section, storage_position,
+                 quantity_kg, entry_time)
+            SELECT s.pallet_id, p.pallet_code, s.id, s.cooler_id, s.storage_section, s.storage_position,
+                   s.quantity_kg, s.entry_time
+            FROM farm_cold_storage s
+            JOIN farm_pallet p ON p.id = s.pallet_id
+            WHERE s.status = 'stored' AND s.active AND %s
+        """ % where
+
+    @api.model
+    def _rebuild(self):
+        """Reyestri soyuducu anbarı qeydlərindən qurur (təkrarlanan paletdə ən son qeyd saxlanılır)"""
+        self.env.cr.execute("DELETE FROM farm_pallet_occupancy")
+        self.env.cr.execute(
+            self._insert_query('TRUE') + " ORDER BY s.storage_date DESC, s.id DESC ON CONFLICT (pallet_id) DO NOTHING")
+        self.invalidate_model()
+        self.env['farm.cooler']._reconcile_occupancy()
+
+    @api.model
+    def _sync(self, storages):
+        """Soyuducu anbarı qeydlərinin reyestr sətirlərini yeniləyir"""
+        if not storages:
+            return
+        cr = self.env.cr
+        storages.flush_recordset(list(self._source_fields))
+        self.env['farm.pallet'].flush_model(['pallet_code'])
+        # Palet artıq başqa qeydlə soyuducudadırsa - indeks üzrə bir yoxlama
+        cr.execute("""
+            SELECT s.pallet_id
+            FROM farm_cold_storage s
+            WHERE s.id = ANY(%(ids)s) AND s.status = 'stored' AND s.active
+              AND (EXISTS (SELECT 1 FROM farm_pallet_occupancy o
+                           WHERE o.pallet_id = s.pallet_id AND o.cold_storage_id != ALL(%(ids)s))
+                   OR EXISTS (SELECT 1 FROM farm_cold_storage d
+                              WHERE d.id = ANY(%(ids)s) AND d.id != s.id AND d.pallet_id = s.pallet_id
+                                AND d.status = 'stored' AND d.active))
+            LIMIT 1
+        """, {'ids': storages.ids})
+        if cr.fetchone():
+            raise ValidationError('Bu palet kodu artıq soyuducuda mövcuddur!')
+        # Yer (soyuducu + bölmə + nömrə) artıq başqa paletlə doludursa
+        cr.execute("""
+            SELECT s.id
+            FROM farm_cold_storage s
+            WHERE s.id = ANY(%(ids)s) AND s.status = 'stored' AND s.active
+              AND s.storage_section IS NOT NULL AND s.storage_position IS NOT NULL
+              AND (EXISTS (SELECT 1 FROM farm_pallet_occupancy o
+                           WHERE o.cooler_id = s.cooler_id AND o.storage_section = s.storage_section
+                             AND o.storage_position = s.storage_position
+                             AND o.cold_storage_id != ALL(%(ids)s))
+                   OR EXISTS (SELECT 1 FROM farm_cold_storage d
+                              WHERE d.id = ANY(%(ids)s) AND d.id != s.id AND d.cooler_id = s.cooler_id
+                                AND d.storage_section = s.storage_section
+                                AND d.storage_position = s.storage_position
+                                AND d.status = 'stored' AND d.active))
+            LIMIT 1
+        """, {'ids': storages.ids})
+        if cr.fetchone():
+            raise ValidationError('Soyuducuda bu yer artıq başqa paletlə doludur!')
+        cr.execute("DELETE FROM farm_pallet_occupancy WHERE cold_storage_id = ANY(%s)" + self._returning,
+                   [storages.ids])
+        removed = cr.fetchall()
+        cr.execute(self._insert_query('s.id = ANY(%s)') + self._returning, [storages.ids])
+        inserted = cr.fetchall()
+        self.invalidate_model()
+        self.env['farm.cooler']._apply_occupancy_changes(removed, inserted)
+
+    @api.model
+    def _remove(self, storages):
+        """Silinən soyuducu anbarı qeydlərinin reyestr sətirlərini silir
+
+        Qeydlə (və ya paletlə) kaskadla silinən sətirlər bazada silinərdi və
+        soyuducu yükü/yer doluluğu yenilənməzdi.
+        """
+        if not storages:
+            return
+        cr = self.env.cr
+        cr.execute("DELETE FROM farm_pallet_occupancy WHERE cold_storage_id = ANY(%s)" + self._returning,
+                   [storages.ids])
+        removed = cr.fetchall()
+        self.invalidate_model()
+        self.env['farm.cooler']._apply_occupancy_changes(removed, [])
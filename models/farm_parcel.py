@@ -1,10 +1,12 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 
 class FarmParcel(models.Model):
     _name = 'farm.parcel'
     _description = 'Parsel'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin']
     _order = 'code'
 
     name = fields.Char('Parsel Adı')
@@ -24,8 +26,8 @@ class FarmParcel(models.Model):
     row_ids = fields.One2many('farm.row', 'parcel_id', string='Cərgələr')
 
     # Statistikalar
-    total_rows = fields.Integer('Cərgə Sayı', compute='_compute_statistics')
-    total_trees = fields.Integer('Ağac Sayı', compute='_compute_statistics')
+    total_rows = fields.Integer('Cərgə Sayı', compute='_compute_statistics', store=True)
+    total_trees = fields.Integer('Ağac Sayı', compute='_compute_statistics', store=True)
 
     # Əlavə məlumatlar
     description = fields.Text('Açıqlama')
@@ -33,9 +35,17 @@ class FarmParcel(models.Model):
     
     @api.depends('row_ids', 'row_ids.tree_ids')
     def _compute_statistics(self):
+        """Saylar qruplaşdırılmış sorğularla hesablanır - ağac qeydləri yüklənmir"""
+        parcel_ids = self._origin.ids
+        row_counts = {parcel.id: count for parcel, count in self.env['farm.row']._read_group(
+            [('parcel_id', 'in', parcel_ids)], ['parcel_id'], ['__count'])}
+        tree_counts = defaultdict(int)
+        for row, count in self.env['farm.tree']._read_group(
+                [('row_id.parcel_id', 'in', parcel_ids)], ['row_id'], ['__count']):
+            tree_counts[row.parcel_id.id] += count
         for parcel in self:
-            parcel.total_rows = len(parcel.row_ids)
-            parcel.total_trees = sum(len(row.tree_ids) for row in parcel.row_ids)
+            parcel.total_rows = row_counts.get(parcel._origin.id, 0)
+            parcel.total_trees = tree_counts[parcel._origin.id]
 
     def name_get(self):
         """Override name_get for custom display name"""
@@ -54,16 +64,28 @@ class FarmParcel(models.Model):
 
     def _ensure_field_code(self, field):
         """Sahə kodunun mövcudluğunu təmin edir"""
-        if not field.code:
-            last_field = self.env['farm.field'].search([('code', 'like', 'S%')], order='code desc', limit=1)
-            if last_field and last_field.code:
-                try:
-                    number = int(last_field.code[1:]) + 1
-                except ValueError:
-                    number = 1
-            else:
-                number = 1
-            field.code = f'S{number}'
+        without_code = field.filtered(lambda f: not f.code)
+        for record, code in zip(without_code, field._allocate_codes(len(without_code))):
+            record.code = code
+
+    @api.model
+    def _next_parcel_numbers(self, fields_):
+        """Hər sahə üçün növbəti parsel nömrəsi: {sahə id: nömrə}
+
+        Sahə sətirləri kilidlənir ki, eyni sahəyə paralel parsel əlavə edən
+        işçilər eyni nömrəni almasın; fərqli sahələr bir-birini gözləmir.
+        """
+        self.env.cr.execute(
+            "SELECT id FROM farm_field WHERE id = ANY(%s) FOR NO KEY UPDATE", [fields_.ids])
+        self.flush_model(['field_id', 'code'])
+        self.env.cr.execute("""
+            SELECT field_id, MAX(substring(code from '-P([0-9]+)$')::integer)
+            FROM farm_parcel
+            WHERE field_id = ANY(%s)
+            GROUP BY field_id
+        """, [fields_.ids])
+        last_numbers = dict(self.env.cr.fetchall())
+        return {field_id: (last_numbers.get(field_id) or 0) + 1 for field_id in fields_.ids}
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -71,31 +93,32 @@ class FarmParcel(models.Model):
             # Field ID context-dən götür
             if not vals.get('field_id') and self._context.get('default_field_id'):
                 vals['field_id'] = self._context.get('default_field_id')
-            
-            if not vals.get('code') and vals.get('field_id'):
-                field = self.env['farm.field'].browse(vals['field_id'])
-                self._ensure_field_code(field)
-                
-                # Parsel kodunu generasiya et
-                last_parcel = self.search([
-                    ('field_id', '=', field.id),
-                    ('code', 'like', f'{field.code}-P%')
-                ], order='code desc', limit=1)
-                
-                if last_parcel and last_parcel.code:
-                    try:
-                        number = int(last_parcel.code.split('-P')[1]) + 1
-                    except (ValueError, IndexError):
-                        number = 1
-                else:
-                    number = 1
-                vals['code'] = f'{field.code}-P{number}'
-            
+        
+        # Parsel kodlarını sahə üzrə toplu generasiya et
+        to_number = [vals for vals in vals_list if not vals.get('code') and vals.get('field_id')]
+        if to_number:
+            fields_ = self.env['farm.field'].browse({vals['field_id'] for vals in to_number})
+            self._ensure_field_code(fields_)
+            next_numbers = self._next_parcel_numbers(fields_)
+            field_codes = {field.id: field.code for field in fields_}
+            for vals in to_number:
+                field_id = vals['field_id']
+                vals['code'] = f'{field_codes[field_id]}-P{next_numbers[field_id]}'
+                next_numbers[field_id] += 1
+        
+        for vals in vals_list:
             # Default ad ver
             if not vals.get('name') and vals.get('code'):
                 vals['name'] = vals['code']
         return super().create(vals_list)
 
+    def write(self, vals):
+        result = super().write(vals)
+        if 'field_id' in vals:
+            # Cərgələrin (və onların ağaclarının) sahəsi parselinkinə uyğunlaşdırılır
+            self.env['farm.row'].search([('parcel_id', 'in', self.ids)]).write({'field_id': vals['field_id']})
+        return result
+
     @api.constrains('area_hectare', 'max_trees_per_row')
     def _check_area(self):
         for record in self:
@@ -113,9 +136,11 @@ class FarmParcel(models.Model):
 class FarmParcelType(models.Model):
     _name = 'farm.parcel.type'
     _description = 'Parsel Tipi'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'farm.code.sequence.mixin']
     _order = 'code'
 
+    _code_sequence = 'farm.parcel.type.code'
+
     name = fields.Char('Tip Adı', required=True)
     code = fields.Char('Tip Kodu', copy=False, readonly=True)
     fruit_category = fields.Selection([
@@ -130,18 +155,8 @@ class FarmParcelType(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
-        for vals in vals_list:
-            if not vals.get('code'):
-                # Parsel tip kodu PT001, PT002, PT003... formatında generasiya et
-                last_type = self.search([('code', 'like', 'PT%')], order='code desc', limit=1)
-                if last_type and last_type.code:
-                    try:
-                        number = int(last_type.code[2:]) + 1
-                        vals['code'] = f'PT{number:03d}'
-                    except ValueError:
-                        vals['code'] = 'PT001'
-                else:
-                    vals['code'] = 'PT001'
+        # Parsel tip kodu PT001, PT002, PT003... formatında ardıcıllıqdan ayrılır
+        self._assign_codes(vals_list)
         return super().create(vals_list)
 
     _sql_constraints = [
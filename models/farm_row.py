@@ -1,11 +1,11 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from odoo.exceptions import ValidationError
 
 
 class FarmRow(models.Model):
     _name = 'farm.row'
     _description = 'Cərgə'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin']
     _order = 'sequence desc'
 
     name = fields.Char('Cərgə Adı')
@@ -70,19 +70,29 @@ class FarmRow(models.Model):
             else:
                 record.max_trees = 30  # Default dəyər
 
+    def init(self):
+        # Ad unikallığı yoxlanışı üçün
+        tools.create_index(self.env.cr, 'farm_row_parcel_id_name_index', self._table, ['parcel_id', 'name'])
+
     @api.constrains('name', 'parcel_id')
     def _check_unique_name_in_field(self):
-        """Eyni sahədə cərgə adları unikal olmalıdır"""
-        for record in self:
-            if record.name and record.parcel_id and record.parcel_id.field_id:
-                field_id = record.parcel_id.field_id.id
-                existing_row = self.search([
-                    ('name', '=', record.name),
-                    ('parcel_id.field_id', '=', field_id),
-                    ('id', '!=', record.id)
-                ])
-                if existing_row:
-                    raise ValidationError(f'Bu sahədə "{record.name}" adlı cərgə artıq mövcuddur! Fərqli ad seçin.')
+        """Eyni sahədə cərgə adları unikal olmalıdır - bütün qeydlər bir sorğu ilə yoxlanılır"""
+        self.flush_model(['name', 'parcel_id'])
+        self.env['farm.parcel'].flush_model(['field_id'])
+        self.env.cr.execute("""
+            SELECT farm_row.name
+            FROM farm_row
+            JOIN farm_parcel parcel ON parcel.id = farm_row.parcel_id
+            JOIN farm_parcel other_parcel ON other_parcel.field_id = parcel.field_id
+            JOIN farm_row other ON other.parcel_id = other_parcel.id
+                               AND other.name = farm_row.name
+                               AND other.id != farm_row.id
+            WHERE farm_row.id = ANY(%s)
+            LIMIT 1
+        """, [self.ids])
+        duplicate = self.env.cr.fetchone()
+        if duplicate:
+            raise ValidationError(f'Bu sahədə "{duplicate[0]}" adlı cərgə artıq mövcuddur! Fərqli ad seçin.')
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -93,9 +103,15 @@ class FarmRow(models.Model):
             # Parcel ID context-dən götür
             if not vals.get('parcel_id') and self._context.get('default_parcel_id'):
                 vals['parcel_id'] = self._context.get('default_parcel_id')
-            
+        # Valideynləri bir dəfə oxu ki, kodlar hər qeyd üçün ayrıca sorğulanmasın
+        parcels = {
+            parcel.id: parcel
+            for parcel in self.env['farm.parcel'].browse({vals['parcel_id'] for vals in vals_list if vals.get('parcel_id')})
+        }
+        
+        for vals in vals_list:
             if vals.get('parcel_id'):
-                parcel = self.env['farm.parcel'].browse(vals['parcel_id'])
+                parcel = parcels[vals['parcel_id']]
                 
                 if not parcel.code:
                     raise ValidationError('Parsel kodu olmayan bir parseldə cərgə yarada bilməzsiniz!')
@@ -132,6 +148,28 @@ class FarmRow(models.Model):
         
         return super().create(vals_list)
 
+    def write(self, vals):
+        if vals.get('parcel_id') and 'field_id' not in vals:
+            # Parsel dəyişəndə sahə parseldən götürülür
+            vals = dict(vals, field_id=self.env['farm.parcel'].browse(vals['parcel_id']).field_id.id)
+        result = super().write(vals)
+        if 'parcel_id' in vals or 'field_id' in vals:
+            # Ağacların sahə və parseli cərgəninkinə uyğunlaşdırılır
+            for (parcel, field), rows in self.grouped(lambda row: (row.parcel_id, row.field_id)).items():
+                trees = self.env['farm.tree'].search([
+                    ('row_id', 'in', rows.ids),
+                    '|', ('parcel_id', '!=', parcel.id), ('field_id', '!=', field.id),
+                ])
+                trees.write({'parcel_id': parcel.id, 'field_id': field.id})
+        return result
+
+    @api.constrains('parcel_id', 'field_id')
+    def _check_hierarchy(self):
+        """Cərgənin sahəsi parselinin sahəsi ilə eyni olmalıdır"""
+        for record in self:
+            if record.parcel_id and record.field_id != record.parcel_id.field_id:
+                raise ValidationError(f'"{record.name}" cərgəsinin sahəsi parselinin sahəsi ilə eyni olmalıdır!')
+
     @api.constrains('max_trees', 'length_meter', 'tree_spacing')
     def _check_row_values(self):
         for record in self:
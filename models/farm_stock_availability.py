@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+# Kursor keşindəki açar - keş yalnız cari sorğu (tranzaksiya) boyunca yaşayır
+CACHE_KEY = 'farm_stock_availability'
+
+
+class FarmStockAvailability(models.AbstractModel):
+    """Məhsulların anbardakı miqdarı - toplu sorğu ilə
+
+    product.qty_available əvəzinə bütün məhsullar üçün bir qruplaşdırılmış
+    stock.quant sorğusu işlədilir. Nəticələr cari sorğu boyunca keşlənir ki,
+    eyni formadakı sətirlər və təkrar hesablamalar bazaya yenidən getməsin.
+    """
+    _name = 'farm.stock.availability'
+    _description = 'Anbar Mövcudluğu'
+
+    @api.model
+    def _get_available_qty(self, products, location=None, warehouse=None):
+        """Məhsulların anbarda mövcud miqdarı: {məhsul id: miqdar}
+
+        location/warehouse verilmədikdə bütün daxili yerlər (qty_available kimi) nəzərə alınır.
+        """
+        if warehouse:
+            location = warehouse.view_location_id
+        cache = self.env.cr.cache.setdefault(CACHE_KEY, {}).setdefault(
+            (location.id if location else None, tuple(self.env.companies.ids)), {})
+        missing = [product_id for product_id in set(products.ids) if product_id not in cache]
+        if missing:
+            domain = [
+                ('product_id', 'in', missing),
+                ('location_id.usage', '=', 'internal'),
+                ('company_id', 'in', self.env.companies.ids),
+            ]
+            if location:
+                domain.append(('location_id', 'child_of', location.id))
+            cache.update(dict.fromkeys(missing, 0.0))
+            for product, quantity in self.env['stock.quant'].sudo()._read_group(
+                    domain, ['product_id'], ['quantity:sum']):
+                cache[product.id] = quantity
+        return {product_id: cache[product_id] for product_id in products.ids}
+
+    @api.model
+    def _invalidate_cache(self):
+        """Anbar hərəkətlərindən sonra keşi təmizləyir"""
+        self.env.cr.cache.pop(CACHE_KEY, None)
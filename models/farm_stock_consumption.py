@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from datetime import datetime, time
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError, ValidationError
+
+# Anbardan silinən məhsul sətirləri modelləri
+STOCK_CONSUMPTION_LINE_MODELS = ('farm.fertilizing.line', 'farm.treatment.line')
+# Planlaşdırılmış silmənin başlanğıc tarixi - bundan əvvəlki əməliyyatların anbarı əl ilə üzləşdirilib
+START_DATE_PARAM = 'farm_agriculture_v2.stock_consumption_start_date'
+
+
+class FarmStockConsumptionMixin(models.AbstractModel):
+    """Anbardan silinən məhsul sətirləri üçün mixin
+
+    Sətir anbar hərəkətinə bağlandıqdan sonra məhsulu və miqdarı dəyişdirilə bilməz.
+    Əməliyyatda stock_location_id sahəsi olmalıdır.
+    """
+    _name = 'farm.stock.consumption.mixin'
+    _description = 'Anbar İstifadəsi Sətri'
+
+    # Sətri əməliyyata bağlayan sahə
+    _stock_consumption_operation_field = None
+
+    stock_move_id = fields.Many2one('stock.move', string='Anbar Hərəkəti', readonly=True, copy=False,
+                                    index='btree_not_null')
+
+    def _stock_consumption_operation(self):
+        return self[self._stock_consumption_operation_field]
+
+    def write(self, vals):
+        if {'product_id', 'product_qty', self._stock_consumption_operation_field}.intersection(vals) \
+                and self.filtered('stock_move_id'):
+            raise ValidationError('Anbardan silinmiş məhsul sətri dəyişdirilə bilməz!')
+        return super().write(vals)
+
+    def unlink(self):
+        if self.filtered('stock_move_id'):
+            raise ValidationError('Anbardan silinmiş məhsul sətri silinə bilməz!')
+        return super().unlink()
+
+
+class FarmStockConsumption(models.AbstractModel):
+    """Gübrələmə və dərmanlamada istifadə olunan məhsulların anbardan silinməsi
+
+    Bütün gözləyən sətirlər anbar yeri üzrə qruplaşdırılır: hər yer üçün bir
+    çıxış sənədi yaradılır və bütün sənədlər birlikdə təsdiqlənir.
+    """
+    _name = 'farm.stock.consumption'
+    _description = 'Anbar İstifadəsi'
+
+    @api.model
+    def _default_location(self):
+        warehouse = self.env['stock.warehouse'].search([('company_id', '=', self.env.company.id)], limit=1)
+        return warehouse.lot_stock_id
+
+    @api.model
+    def _init_start_date(self):
+        """Modul yüklənəndə başlanğıc tarixi təyin edilməyibsə bu gün yazılır"""
+        config = self.env['ir.config_parameter'].sudo()
+        if not config.get_param(START_DATE_PARAM):
+            config.set_param(START_DATE_PARAM, fields.Date.to_string(fields.Date.context_today(self)))
+
+    @api.model
+    def _pending_lines(self, until=None):
+        """Tarixi başlanğıc tarixi ilə `until` günü arasında olan, hələ anbardan silinməmiş sətirlər"""
+        start = self.env['ir.config_parameter'].sudo().get_param(START_DATE_PARAM)
+        if not start:
+            return [self.env[model_name] for model_name in STOCK_CONSUMPTION_LINE_MODELS]
+        start = datetime.combine(fields.Date.to_date(start), time.min)
+        until = datetime.combine(until or fields.Date.context_today(self), time.max)
+        lines = []
+        for model_name in STOCK_CONSUMPTION_LINE_MODELS:
+            Line = self.env[model_name]
+            operation_field = Line._stock_consumption_operation_field
+            date_field = self.env[Line._fields[operation_field].comodel_name]._operation_date_field
+            lines.append(Line.search([
+                ('stock_move_id', '=', False),
+                ('product_qty', '>', 0),
+                (f'{operation_field}.{date_field}', '>=', start),
+                (f'{operation_field}.{date_field}', '<=', until),
+                (f'{operation_field}.active', '=', True),
+            ]))
+        return lines
+
+    @api.model
+    def _picking_type(self, location):
+        picking_type = location.warehouse_id.out_type_id
+        if not picking_type:
+            picking_type = self.env['stock.picking.type'].search([
+                ('code', '=', 'outgoing'), ('company_id', '=', location.company_id.id or self.env.company.id),
+            ], limit=1)
+        if not picking_type:
+            raise UserError(f'"{location.display_name}" anbar yeri üçün çıxış əməliyyat növü tapılmadı!')
+        return picking_type
+
+    @api.model
+    def _consume(self, lines_list):
+        """Sətirlərin məhsullarını anbardan silir, yaradılmış sənədləri qaytarır
+
+        lines_list - müxtəlif sətir modellərinin qeydlər siyahısı.
+        """
+        default_location = self._default_location()
+        groups = defaultdict(list)
+        for lines in lines_list:
+            for line in lines:
+                if line.stock_move_id or line.product_qty <= 0:
+                    continue
+                location = line._stock_consumption_operation().stock_location_id or default_location
+                if not location:
+                    raise UserError('Məhsulların silinəcəyi anbar yeri tapılmadı!')
+                groups[location].append(line)
+        if not groups:
+            return self.env['stock.picking']
+
+        destination = self.env.ref('farm_agriculture_v2.stock_location_farm_consumption')
+        picking_vals_list = []
+        for location, lines in groups.items():
+            picking_vals_list.append({
+                'picking_type_id': self._picking_type(location).id,
+                'location_id': location.id,
+                'location_dest_id': destination.id,
+                'origin': 'Təsərrüfat istifadəsi',
+                'move_ids': [(0, 0, {
+                    'name': line._stock_consumption_operation().display_name,
+                    'product_id': line.product_id.id,
+                    'product_uom': line.product_id.uom_id.id,
+                    'product_uom_qty': line.product_qty,
+                    'location_id': location.id,
+                    'location_dest_id': destination.id,
+                }) for line in lines],
+            })
+        pickings = self.env['stock.picking'].with_context(
+            tracking_disable=True, mail_create_nolog=True, mail_create_nosubscribe=True,
+        ).create(picking_vals_list)
+
+        # Bütün sənədlər birlikdə təsdiqlənir (eyni məhsulun hərəkətləri birləşə bilər)
+        pickings.action_confirm()
+        for move in pickings.move_ids:
+            move.quantity = move.product_uom_qty
+        pickings.move_ids.picked = True
+        pickings.with_context(cancel_backorder=True)._action_done()
+
+        # Sətirləri hərəkətlərə bağla - model başına bir sorğu
+        updates = defaultdict(lambda: ([], []))
+        for picking, lines in zip(pickings, groups.values()):
+            move_by_product = {move.product_id: move for move in picking.move_ids}
+            for line in lines:
+                line_ids, move_ids = updates[line._name]
+                line_ids.append(line.id)
+                move_ids.append(move_by_product[line.product_id].id)
+        for model_name, (line_ids, move_ids) in updates.items():
+            Line = self.env[model_name]
+            self.env.cr.execute("""
+                UPDATE %s line SET stock_move_id = data.move_id
+                FROM unnest(%%s::int[], %%s::int[]) AS data(id, move_id)
+                WHERE line.id = data.id
+            """ % Line._table, [line_ids, move_ids])
+            Line.invalidate_model(['stock_move_id'])
+        self.env['farm.stock.availability']._invalidate_cache()
+        return pickings
+
+    @api.model
+    def _check_operations_unlink(self, operations):
+        """Anbardan silinmiş sətirləri olan əməliyyatlar silinə bilməz (sətirlər kaskadla silinərdi)"""
+        if operations.product_line_ids.filtered('stock_move_id'):
+            raise ValidationError('Anbardan silinmiş məhsul sətirləri olan əməliyyat silinə bilməz!')
+
+    @api.model
+    def _check_fields_unlink(self, farm_fields):
+        """Anbardan silinmiş sətirləri olan sahələr silinə bilməz (əməliyyatlar kaskadla silinərdi)"""
+        for model_name in STOCK_CONSUMPTION_LINE_MODELS:
+            Line = self.env[model_name]
+            if Line.with_context(active_test=False).search_count([
+                ('stock_move_id', '!=', False),
+                (f'{Line._stock_consumption_operation_field}.field_id', 'in', farm_fields.ids),
+            ], limit=1):
+                raise ValidationError('Anbardan silinmiş məhsul sətirləri olan sahə silinə bilməz!')
+
+    @api.model
+    def _cron_consume(self):
+        """Planlaşdırılmış gündəlik anbardan silmə"""
+        self._consume(self._pending_lines())
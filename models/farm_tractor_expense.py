@@ -7,6 +7,7 @@ class FarmTractorExpense(models.Model):
     """Traktor Xərcləri"""
     _name = 'farm.tractor.expense'
     _description = 'Traktor Xərcləri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.expense.report.source.mixin']
     _order = 'expense_date desc'
 
     name = fields.Char('Xərc Adı', required=True, default='Traktor Xərci')
@@ -37,10 +38,7 @@ class FarmTractorExpense(models.Model):
     @api.constrains('amount')
     def _check_balance_limit(self):
         """Xərc etməzdən əvvəl balansı yoxlayır"""
-        for record in self:
-            if record.amount > 0:
-                cash_flow = self.env['farm.cash.flow']
-                cash_flow.check_expense_balance(record.amount, 'farm.tractor.expense', record.id)
+        self._check_cash_balance()
     
     @api.depends('expense_date')
     def _compute_date_fields(self):
@@ -7,8 +7,12 @@ class FarmTractorIncome(models.Model):
     """Traktor Gəliri"""
     _name = 'farm.tractor.income'
     _description = 'Traktor Gəliri'
+    _inherit = ['farm.cash.ledger.mixin', 'farm.cost.cube.mixin']
     _order = 'income_date desc'
 
+    _cash_ledger_type = 'income'
+    _cost_cube_date_field = 'income_date'
+
     name = fields.Char('Gəlir Adı', required=True, default='Traktor Gəliri')
     income_date = fields.Date('Tarix', required=True, default=fields.Date.today)
     amount = fields.Float('Məbləğ', required=True)
@@ -1,11 +1,12 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from odoo.exceptions import ValidationError
+from odoo.osv import expression
 
 
 class FarmTree(models.Model):
     _name = 'farm.tree'
     _description = 'Ağac'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin']
     _order = 'sequence desc'
 
     name = fields.Char('Ağac Adı')
@@ -18,6 +19,8 @@ class FarmTree(models.Model):
                                domain="[('field_id', '=', field_id)]")
     row_id = fields.Many2one('farm.row', string='Cərgə', required=True, ondelete='cascade',
                             domain="[('parcel_id', '=', parcel_id)]")
+    # /sahə/parsel/cərgə/ağac/ - prefiks axtarışı ilə bütün alt ağacları bir indeks skanı ilə tapmaq üçün
+    hierarchy_path = fields.Char('İyerarxiya Yolu', compute='_compute_hierarchy_path', store=True, readonly=True)
     
     # Ağac məlumatları
     variety_id = fields.Many2one('farm.variety', string='Bitki Növü', required=True)
@@ -64,18 +67,67 @@ class FarmTree(models.Model):
             self.row_id = False
             return {'domain': {'row_id': []}}
 
+    def init(self):
+        # Ad unikallığı yoxlanışı üçün
+        tools.create_index(self.env.cr, 'farm_tree_row_id_name_index', self._table, ['row_id', 'name'])
+        # LIKE 'prefiks%' sorğuları üçün
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS farm_tree_hierarchy_path_index
+            ON farm_tree (hierarchy_path varchar_pattern_ops)
+        """)
+
+    @api.depends('row_id', 'row_id.parcel_id', 'row_id.parcel_id.field_id')
+    def _compute_hierarchy_path(self):
+        for record in self:
+            row = record.row_id
+            if row and record._origin.id:
+                record.hierarchy_path = '%s%s/' % (self._hierarchy_path_prefix(row), record._origin.id)
+            else:
+                record.hierarchy_path = False
+
+    @api.model
+    def _hierarchy_path_prefix(self, record):
+        """Sahə, parsel və ya cərgənin altındakı ağacların yol prefiksi"""
+        if record._name == 'farm.row':
+            return '%s%s/' % (self._hierarchy_path_prefix(record.parcel_id), record._origin.id)
+        if record._name == 'farm.parcel':
+            return '/%s/%s/' % (record.field_id._origin.id, record._origin.id)
+        return '/%s/' % record._origin.id
+
+    @api.model
+    def _hierarchy_domain(self, records):
+        """Verilmiş sahə/parsel/cərgələrin altındakı bütün ağaclar üçün domen"""
+        if not records:
+            return expression.FALSE_DOMAIN
+        return expression.OR([
+            [('hierarchy_path', '=like', self._hierarchy_path_prefix(record) + '%')]
+            for record in records
+        ])
+
+    @api.constrains('row_id', 'parcel_id', 'field_id')
+    def _check_hierarchy(self):
+        """Ağacın parseli və sahəsi cərgəsininkinə uyğun olmalıdır"""
+        for record in self:
+            row = record.row_id
+            if row and (record.parcel_id != row.parcel_id or record.field_id != row.field_id):
+                raise ValidationError(f'"{record.name}" ağacının sahə və parseli cərgəsinin sahə və parseli ilə eyni olmalıdır!')
+
     @api.constrains('name', 'row_id')
     def _check_unique_name_in_row(self):
-        """Eyni cərgədə ağac adları unikal olmalıdır"""
-        for record in self:
-            if record.name and record.row_id:
-                existing_tree = self.search([
-                    ('name', '=', record.name),
-                    ('row_id', '=', record.row_id.id),
-                    ('id', '!=', record.id)
-                ])
-                if existing_tree:
-                    raise ValidationError(f'Bu cərgədə "{record.name}" adlı ağac artıq mövcuddur! Fərqli ad seçin.')
+        """Eyni cərgədə ağac adları unikal olmalıdır - bütün qeydlər bir sorğu ilə yoxlanılır"""
+        self.flush_model(['name', 'row_id'])
+        self.env.cr.execute("""
+            SELECT tree.name
+            FROM farm_tree tree
+            JOIN farm_tree other ON other.row_id = tree.row_id
+                                AND other.name = tree.name
+                                AND other.id != tree.id
+            WHERE tree.id = ANY(%s)
+            LIMIT 1
+        """, [self.ids])
+        duplicate = self.env.cr.fetchone()
+        if duplicate:
+            raise ValidationError(f'Bu cərgədə "{duplicate[0]}" adlı ağac artıq mövcuddur! Fərqli ad seçin.')
 
     @api.onchange('variety_id')
     def _onchange_variety_id(self):
@@ -113,9 +165,15 @@ class FarmTree(models.Model):
             # Row ID context-dən götür
             if not vals.get('row_id') and self._context.get('default_row_id'):
                 vals['row_id'] = self._context.get('default_row_id')
-            
+        # Valideynləri bir dəfə oxu ki, kodlar hər qeyd üçün ayrıca sorğulanmasın
+        rows = {
+            row.id: row
+            for row in self.env['farm.row'].browse({vals['row_id'] for vals in vals_list if vals.get('row_id')})
+        }
+        
+        for vals in vals_list:
             if vals.get('row_id'):
-                row = self.env['farm.row'].browse(vals['row_id'])
+                row = rows[vals['row_id']]
                 
                 if not row.code:
                     raise ValidationError('Cərgə kodu olmayan bir cərgədə ağac yarada bilməzsiniz!')
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from odoo.osv import expression
+
+
+class FarmTreeScopeMixin(models.AbstractModel):
+    """Əməliyyatın ağaclarını yığcam şəkildə seçmək üçün mixin
+
+    'scope' rejimində ağaclar əlaqə cədvəlinə yazılmır: seçilmiş sahə/parsel/cərgə
+    və istisna edilən ağaclar saxlanılır, ağacların siyahısı isə yalnız lazım
+    olduqda iyerarxiya yolu üzrə sorğu ilə alınır.
+
+    Modellərdə field_id, parcel_ids, row_ids, tree_ids və excluded_tree_ids
+    (ayrıca əlaqə cədvəli ilə) sahələri olmalıdır.
+    """
+    _name = 'farm.tree.scope.mixin'
+    _description = 'Ağac Seçimi'
+
+    tree_selection = fields.Selection([
+        ('trees', 'Seçilmiş Ağaclar'),
+        ('scope', 'Sahə/Parsel/Cərgədəki Bütün Ağaclar')
+    ], string='Ağac Seçimi', default='trees', required=True)
+    target_tree_count = fields.Integer('Ağac Sayı', compute='_compute_target_tree_count')
+
+    def _get_tree_scope(self):
+        """Ən dəqiq seçilmiş səviyyə: cərgələr, parsellər və ya sahə"""
+        self.ensure_one()
+        return self.row_ids or self.parcel_ids or self.field_id
+
+    def _get_target_tree_domain(self):
+        """Əməliyyatın aid olduğu ağaclar üçün domen"""
+        self.ensure_one()
+        if self.tree_selection != 'scope':
+            return [('id', 'in', self.tree_ids._origin.ids)]
+        domain = self.env['farm.tree']._hierarchy_domain(self._get_tree_scope())
+        if self.excluded_tree_ids:
+            domain = expression.AND([domain, [('id', 'not in', self.excluded_tree_ids._origin.ids)]])
+        return domain
+
+    def _get_target_trees(self):
+        """Əməliyyatın aid olduğu ağaclar - scope rejimində sorğu ilə alınır"""
+        self.ensure_one()
+        if self.tree_selection != 'scope':
+            return self.tree_ids
+        return self.env['farm.tree'].search(self._get_target_tree_domain())
+
+    @api.depends('tree_selection', 'tree_ids', 'excluded_tree_ids', 'field_id', 'parcel_ids', 'row_ids')
+    def _compute_target_tree_count(self):
+        # Eyni seçimli əməliyyatlar (məs. siyahıda eyni sahə) üçün sorğu bir dəfə işlədilir
+        counts = {}
+        for record in self:
+            if record.tree_selection != 'scope':
+                record.target_tree_count = len(record.tree_ids)
+                continue
+            domain = record._get_target_tree_domain()
+            key = repr(domain)
+            if key not in counts:
+                counts[key] = self.env['farm.tree'].search_count(domain)
+            record.target_tree_count = counts[key]
+
+    @api.onchange('tree_selection')
+    def _onchange_tree_selection(self):
+        # Scope rejimində ağaclar əlaqə cədvəlinə yazılmır
+        if self.tree_selection == 'scope':
+            self.tree_ids = [(5,)]
+        else:
+            self.excluded_tree_ids = [(5,)]
@@ -17,9 +17,11 @@ class FarmSort(models.Model):
 class FarmVariety(models.Model):
     _name = 'farm.variety'
     _description = 'Bitkilər'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'farm.code.sequence.mixin']
     _order = 'fruit_type, name'
 
+    _code_sequence = 'farm.variety.code'
+
     name = fields.Char('Bitki Adı')
     code = fields.Char('Bitki Kodu', copy=False, readonly=True)
 
@@ -61,22 +63,12 @@ class FarmVariety(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
-        for vals in vals_list:
-            if not vals.get('code'):
-                # Sort kodu V001, V002, V003... formatında generasiya et
-                last_variety = self.search([('code', 'like', 'V%')], order='code desc', limit=1)
-                if last_variety and last_variety.code:
-                    try:
-                        number = int(last_variety.code[1:]) + 1
-                        vals['code'] = f'V{number:03d}'
-                    except ValueError:
-                        vals['code'] = 'V001'
-                else:
-                    vals['code'] = 'V001'
-
-                # Default ad ver
-                if not vals.get('name'):
-                    vals['name'] = vals['code']
+        # Default ad yalnız kodu avtomatik veriləcək qeydlərə verilir
+        unnamed = [vals for vals in vals_list if not vals.get('code') and not vals.get('name')]
+        # Sort kodu V001, V002, V003... formatında ardıcıllıqdan ayrılır
+        self._assign_codes(vals_list)
+        for vals in unnamed:
+            vals['name'] = vals['code']
         return super().create(vals_list)
 
     _sql_constraints = [
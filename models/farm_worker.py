@@ -1,14 +1,30 @@
-from odoo import models, fields, api
+import logging
+
+from datetime import date
+
+from odoo import models, fields, api, tools
+from odoo.tools import date_utils
 from odoo.exceptions import ValidationError
 
+_logger = logging.getLogger(__name__)
+
 
 class FarmWorker(models.Model):
     """İşçilər"""
     _name = 'farm.worker'
     _description = 'İşçilər'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'farm.cash.ledger.cascade.mixin',
+                'farm.expense.report.source.mixin']
     _order = 'name'
 
+    # Hesabatdakı sətir adları və sahəsi işçidən götürülür
+    _expense_report_trigger_fields = ('name', 'field_id')
+    _expense_report_child_fields = (
+        'plowing_line_ids', 'planting_line_ids', 'irrigation_line_ids', 'fertilizing_line_ids',
+        'treatment_line_ids', 'pruning_line_ids', 'harvest_line_ids', 'cold_storage_line_ids',
+        'payment_line_ids',
+    )
+
     name = fields.Char('İşçi Adı', required=True)
     employee_code = fields.Char('İşçi Kodu', required=True)
     field_id = fields.Many2one('farm.field', string='Əsas İş Sahəsi', ondelete='set null')
@@ -22,8 +38,9 @@ class FarmWorker(models.Model):
     salary = fields.Float('Maaş', required=True)
 
     # Hesablanmış sahələr
-    total_operations = fields.Integer('Ümumi Əməliyyat Sayı', compute='_compute_statistics', store=True)
-    total_earned = fields.Float('Əməliyyat Qazancı', compute='_compute_statistics', store=True)
+    # Sətir dəyişikliklərinin fərqi ilə yenilənir (farm.operation.worker), gecəlik üzləşdirilir
+    total_operations = fields.Integer('Ümumi Əməliyyat Sayı', readonly=True, copy=False)
+    total_earned = fields.Float('Əməliyyat Qazancı', readonly=True, copy=False)
     total_paid = fields.Float('Ümumi Ödəniş', compute='_compute_total_paid', store=True)
     balance = fields.Float('Balans', compute='_compute_balance', store=True)
     
@@ -36,36 +53,114 @@ class FarmWorker(models.Model):
     pruning_line_ids = fields.One2many('farm.pruning.worker', 'worker_id', string='Budama Əməliyyatları')
     harvest_line_ids = fields.One2many('farm.harvest.worker', 'worker_id', string='Yığım Əməliyyatları')
     cold_storage_line_ids = fields.One2many('farm.cold.storage.worker', 'worker_id', string='Soyuducu Əməliyyatları')
+    # Bütün əməliyyatların sətirləri (birləşdirilmiş, indeksli cədvəl)
+    operation_line_ids = fields.One2many('farm.operation.worker', 'worker_id', string='Əməliyyatlar')
     
     # Ödənişlər
     payment_line_ids = fields.One2many('farm.worker.payment', 'worker_id', string='Ödənişlər')
+    # Aylıq bağlanışlar
+    period_ids = fields.One2many('farm.worker.period', 'worker_id', string='Aylıq Bağlanışlar')
 
-    @api.depends('plowing_line_ids', 'planting_line_ids', 'irrigation_line_ids', 
-                 'fertilizing_line_ids', 'treatment_line_ids', 'pruning_line_ids',
-                 'harvest_line_ids', 'cold_storage_line_ids')
-    def _compute_statistics(self):
-        for worker in self:
-            # Hər model üçün ayrı-ayrı hesabla
-            total_operations = (len(worker.plowing_line_ids) + len(worker.planting_line_ids) + 
-                              len(worker.irrigation_line_ids) + len(worker.fertilizing_line_ids) +
-                              len(worker.treatment_line_ids) + len(worker.pruning_line_ids) +
-                              len(worker.harvest_line_ids) + len(worker.cold_storage_line_ids))
-            
-            total_earned = (sum(line.amount for line in worker.plowing_line_ids) +
-                           sum(line.amount for line in worker.planting_line_ids) +
-                           sum(line.amount for line in worker.irrigation_line_ids) +
-                           sum(line.amount for line in worker.fertilizing_line_ids) +
-                           sum(line.amount for line in worker.treatment_line_ids) +
-                           sum(line.amount for line in worker.pruning_line_ids) +
-                           sum(line.amount for line in worker.harvest_line_ids) +
-                           sum(line.amount for line in worker.cold_storage_line_ids))
-            
-            worker.total_operations = total_operations
-            worker.total_earned = total_earned
+    @api.model
+    def _apply_statistics_deltas(self, deltas):
+        """Sətir fərqlərini statistikaya tətbiq edir: {işçi id: [say, məbləğ]}
+
+        İşçinin keçmiş sətirləri oxunmur - yeniləmə sətir tarixçəsindən asılı deyil.
+        """
+        deltas = {worker_id: delta for worker_id, delta in deltas.items() if delta[0] or delta[1]}
+        if not deltas:
+            return
+        self.flush_model(['total_operations', 'total_earned', 'balance'])
+        self.env.cr.execute("""
+            UPDATE farm_worker w
+            SET total_operations = COALESCE(w.total_operations, 0) + d.count,
+                total_earned = COALESCE(w.total_earned, 0) + d.amount,
+                balance = COALESCE(w.balance, 0) + d.amount
+            FROM unnest(%s::int[], %s::int[], %s::float8[]) AS d(id, count, amount)
+            WHERE w.id = d.id
+        """, [list(deltas), [delta[0] for delta in deltas.values()], [delta[1] for delta in deltas.values()]])
+        self.browse(deltas).invalidate_recordset(['total_operations', 'total_earned', 'balance'])
+
+    @api.model
+    def _reconcile_statistics(self):
+        """Statistikanı farm.operation.worker cədvəlindən tam yenidən hesablayır, düzəldilən işçiləri qaytarır"""
+        self.flush_model(['total_operations', 'total_earned', 'total_paid', 'balance'])
+        self.env['farm.operation.worker'].flush_model()
+        self.env.cr.execute("""
+            WITH actual AS (
+                SELECT w.id, COUNT(l.id) AS count, COALESCE(SUM(l.amount), 0) AS amount
+                FROM farm_worker w
+                LEFT JOIN farm_operation_worker l ON l.worker_id = w.id
+                GROUP BY w.id
+            )
+            UPDATE farm_worker w
+            SET total_operations = a.count,
+                total_earned = a.amount,
+                balance = a.amount + COALESCE(w.total_paid, 0)
+            FROM actual a
+            WHERE w.id = a.id
+              AND (COALESCE(w.total_operations, 0) != a.count
+                   OR ABS(COALESCE(w.total_earned, 0) - a.amount) >= 0.005
+                   OR ABS(COALESCE(w.balance, 0) - a.amount - COALESCE(w.total_paid, 0)) >= 0.005)
+            RETURNING w.id
+        """)
+        worker_ids = [row[0] for row in self.env.cr.fetchall()]
+        self.invalidate_model(['total_operations', 'total_earned', 'balance'])
+        if worker_ids:
+            _logger.warning("İşçi statistikası üzləşdirildi, düzəldilən işçilər: %s", worker_ids)
+            # Uyğunsuzluğun hansı aya düşdüyü bilinmir - bağlanışlar yenidən hesablanır
+            self.env['farm.worker.period']._reopen(dict.fromkeys(worker_ids, date.min))
+        return worker_ids
+
+    def _balance_at(self, day):
+        """İşçilərin verilmiş günün sonuna balansı: {işçi id: balans}
+
+        Son bağlanmış aydan başlanır, yalnız ondan sonrakı sətir və ödənişlər
+        (işçi və tarix üzrə indekslə) toplanır.
+        """
+        day = fields.Date.to_date(day)
+        self.env['farm.operation.worker'].flush_model()
+        self.env['farm.worker.payment'].flush_model(['worker_id', 'payment_date', 'amount'])
+        self.env['farm.worker.period'].flush_model()
+        # Bu aydan əvvəlki bağlanışlar günün sonuna tam daxildir
+        closed_before = date_utils.start_of(date_utils.add(day, days=1), 'month')
+        self.env.cr.execute("""
+            SELECT w.id,
+                   COALESCE(s.closing_balance, 0)
+                   + COALESCE((SELECT SUM(l.amount) FROM farm_operation_worker l
+                               WHERE l.worker_id = w.id AND l.date >= s.open_from AND l.date <= %(day)s), 0)
+                   + COALESCE((SELECT SUM(p.amount) FROM farm_worker_payment p
+                               WHERE p.worker_id = w.id AND p.payment_date >= s.open_from
+                                 AND p.payment_date <= %(day)s), 0)
+            FROM farm_worker w
+            CROSS JOIN LATERAL (
+                SELECT MAX(closing_balance) AS closing_balance,
+                       COALESCE(MAX(period_start + interval '1 month')::date, '-infinity'::date) AS open_from
+                FROM (
+                    SELECT closing_balance, period_start FROM farm_worker_period
+                    WHERE worker_id = w.id AND period_start < %(closed_before)s
+                    ORDER BY period_start DESC LIMIT 1
+                ) last_period
+            ) s
+            WHERE w.id = ANY(%(ids)s)
+        """, {'day': day, 'closed_before': closed_before, 'ids': self.ids})
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _cron_reconcile_statistics(self):
+        """Planlaşdırılmış üzləşmə: işçi sətirləri cədvəli və statistika mənbə ilə müqayisə edilib düzəldilir"""
+        self.env['farm.operation.worker']._reconcile()
 
     @api.depends('payment_line_ids.amount')
     def _compute_total_paid(self):
-        for worker in self:
+        # Toplu ödənişlərdə bütün işçilər üçün bir qruplaşdırılmış sorğu
+        stored = self.filtered('id')
+        paid = dict(self.env['farm.worker.payment']._read_group(
+            [('worker_id', 'in', stored.ids)], ['worker_id'], ['amount:sum'])) if stored else {}
+        for worker in stored:
+            worker.total_paid = paid.get(worker, 0.0)
+        # Formada redaktə olunan işçilər yaddaşdakı sətirlərlə hesablanır
+        for worker in self - stored:
             worker.total_paid = sum(payment.amount for payment in worker.payment_line_ids)
 
     @api.depends('total_earned', 'total_paid')
@@ -94,7 +189,8 @@ class FarmWorkerPayment(models.Model):
     """İşçi Ödənişləri"""
     _name = 'farm.worker.payment'
     _description = 'İşçi Ödənişləri'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['farm.high.volume.mixin', 'mail.thread', 'mail.activity.mixin', 'farm.cash.ledger.mixin',
+                'farm.expense.report.source.mixin']
     _order = 'payment_date desc'
 
     worker_id = fields.Many2one('farm.worker', string='İşçi', required=True, ondelete='cascade')
@@ -110,6 +206,40 @@ class FarmWorkerPayment(models.Model):
     description = fields.Text('Açıqlama')
     reference = fields.Char('İstinad')
 
+    def init(self):
+        # Dövr balansları işçi və tarix üzrə oxunur
+        tools.create_index(self.env.cr, 'farm_worker_payment_worker_date_index',
+                           self._table, ['worker_id', 'payment_date'])
+
+    def _reopen_periods(self):
+        """Ödənişlərin düşdüyü bağlanmış ayları açır"""
+        worker_dates = {}
+        for payment in self:
+            worker_id = payment.worker_id.id
+            if worker_id and (worker_id not in worker_dates or payment.payment_date < worker_dates[worker_id]):
+                worker_dates[worker_id] = payment.payment_date
+        self.env['farm.worker.period']._reopen(worker_dates)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        payments = super().create(vals_list)
+        payments._reopen_periods()
+        return payments
+
+    def write(self, vals):
+        # Köhnə və yeni tarixlərin hər ikisinin ayı açılır
+        reopen = {'worker_id', 'payment_date', 'amount'}.intersection(vals)
+        if reopen:
+            self._reopen_periods()
+        result = super().write(vals)
+        if reopen:
+            self._reopen_periods()
+        return result
+
+    def unlink(self):
+        self._reopen_periods()
+        return super().unlink()
+
     @api.constrains('amount')
     def _check_amount(self):
         for payment in self:
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api
+from odoo.tools import date_utils
+
+
+class FarmWorkerPeriod(models.Model):
+    """İşçi hesabının aylıq bağlanışı
+
+    Hər bağlanmış ay üçün işçinin dövriyyəsi və ay sonuna balansı saxlanılır.
+    İstənilən tarixə balans = son bağlanış + yalnız açıq dövrün sətirləri.
+    Bağlanmış aya düşən sətir/ödəniş dəyişdikdə həmin aydan sonrakı
+    bağlanışlar silinir və növbəti bağlanışda yenidən hesablanır.
+    """
+    _name = 'farm.worker.period'
+    _description = 'İşçi Aylıq Bağlanışı'
+    _order = 'period_start desc, worker_id'
+    _log_access = False
+
+    worker_id = fields.Many2one('farm.worker', string='İşçi', required=True, readonly=True, ondelete='cascade')
+    period_start = fields.Date('Dövr', required=True, readonly=True)
+    operation_count = fields.Integer('Əməliyyat Sayı', readonly=True)
+    earned = fields.Float('Qazanc', readonly=True)
+    paid = fields.Float('Ödəniş', readonly=True)
+    closing_balance = fields.Float('Ay Sonuna Balans', readonly=True)
+
+    _sql_constraints = [
+        ('worker_period_unique', 'unique(worker_id, period_start)', 'İşçinin hər ayı yalnız bir dəfə bağlana bilər!'),
+    ]
+
+    @api.model
+    def _close_periods(self, until=None):
+        """Bitmiş ayları (until tarixinin ayından əvvəlkiləri) bütün işçilər üçün bağlayır
+
+        Hər ay bir INSERT ... SELECT sorğusu ilə bağlanır; artıq bağlanmış
+        işçi-ay cütlərinə toxunulmur. Dövr bağlanışı çatışmayan ən erkən aydan
+        başlayır: bağlanışı olan işçi üçün son bağlanışdan sonrakı ay, olmayan
+        işçi üçün ilk sətir/ödəniş ayı.
+        """
+        cr = self.env.cr
+        self.env['farm.operation.worker'].flush_model()
+        self.env['farm.worker.payment'].flush_model(['worker_id', 'payment_date', 'amount'])
+        self.flush_model()
+        until = date_utils.start_of(until or fields.Date.context_today(self), 'month')
+        cr.execute("""
+            SELECT MIN(date) FROM (
+                SELECT (MAX(period_start) + interval '1 month')::date AS date
+                FROM farm_worker_period
+                GROUP BY worker_id
+                UNION ALL
+                SELECT MIN(l.date) FROM farm_operation_worker l
+                WHERE l.worker_id IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM farm_worker_period p WHERE p.worker_id = l.worker_id)
+                UNION ALL
+                SELECT MIN(pay.payment_date) FROM farm_worker_payment pay
+                WHERE NOT EXISTS (SELECT 1 FROM farm_worker_period p WHERE p.worker_id = pay.worker_id)
+            ) dates
+        """)
+        first_date = cr.fetchone()[0]
+        if not first_date:
+            return
+        month = date_utils.start_of(first_date, 'month')
+        while month < until:
+            next_month = month + relativedelta(months=1)
+            cr.execute("""
+                INSERT INTO farm_worker_period
+                    (worker_id, period_start, operation_count, earned, paid, closing_balance)
+                SELECT w.id, %(month)s, COALESCE(l.count, 0), COALESCE(l.amount, 0), COALESCE(p.amount, 0),
+                       COALESCE(prev.closing_balance, 0) + COALESCE(l.amount, 0) + COALESCE(p.amount, 0)
+                FROM farm_worker w
+                LEFT JOIN farm_worker_period prev
+                       ON prev.worker_id = w.id AND prev.period_start = %(previous)s
+                LEFT JOIN (
+                    SELECT worker_id, COUNT(*) AS count, SUM(amount) AS amount
+                    FROM farm_operation_worker
+                    WHERE date >= %(month)s AND date < %(next)s
+                    GROUP BY worker_id
+                ) l ON l.worker_id = w.id
+                LEFT JOIN (
+                    SELECT worker_id, SUM(amount) AS amount
+                    FROM farm_worker_payment
+                    WHERE payment_date >= %(month)s AND payment_date < %(next)s
+                    GROUP BY worker_id
+                ) p ON p.worker_id = w.id
+                WHERE (prev.id IS NOT NULL OR l.worker_id IS NOT NULL OR p.worker_id IS NOT NULL)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM farm_worker_period done
+                      WHERE done.worker_id = w.id AND done.period_start = %(month)s
+                  )
+            """, {'month': month, 'previous': month - relativedelta(months=1), 'next': next_month})
+            month = next_month
+        self.invalidate_model()
+
+    @api.model
+    def _reopen(self, worker_dates):
+        """Dəyişikliyin düşdüyü aydan başlayaraq işçilərin bağlanışlarını silir: {işçi id: tarix}"""
+        worker_dates = {worker_id: date for worker_id, date in worker_dates.items() if worker_id and date}
+        if not worker_dates:
+            return
+        self.env.cr.execute("""
+            DELETE FROM farm_worker_period p
+            USING unnest(%s::int[], %s::date[]) AS d(worker_id, date)
+            WHERE p.worker_id = d.worker_id AND p.period_start >= date_trunc('month', d.date)::date
+        """, [list(worker_dates), [fields.Date.to_date(date) for date in worker_dates.values()]])
+        if self.env.cr.rowcount:
+            self.invalidate_model()
+
+    @api.model
+    def _cron_close_periods(self):
+        """Planlaşdırılmış aylıq bağlanış"""
+        self._close_periods()
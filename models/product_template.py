@@ -1,5 +1,7 @@
 from odoo import models, fields, api
 
+from .farm_stock_consumption import STOCK_CONSUMPTION_LINE_MODELS
+
 
 class ProductActiveIngredient(models.Model):
     _name = 'product.active.ingredient'
@@ -110,3 +112,14 @@ class ProductProduct(models.Model):
                 name = f"{name} ({record.manufacturer_company})"
             result.append((record.id, name))
         return result
+
+    def write(self, vals):
+        result = super().write(vals)
+        if 'standard_price' in vals:
+            # Gübrə/dərman sətirlərinin xərci maya dəyərindən hesablanır - əməliyyat yazılmadan
+            # dəyişir, ona görə onların kub xanaları burada köhnəlmiş kimi qeyd edilir
+            cells = set()
+            for model_name in STOCK_CONSUMPTION_LINE_MODELS:
+                cells |= self.env[model_name].search([('product_id', 'in', self.ids)])._cost_cube_cells()
+            self.env['farm.cost.cube']._mark_dirty(cells)
+        return result
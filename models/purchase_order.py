@@ -1,14 +1,44 @@
 from odoo import models, fields, api
 
+# Sifariş öz yazısında sətirləri də dəyişir - sətir səviyyəsində kassa yenilənməsi ötürülür
+ORDER_LEDGER_SYNC_CONTEXT = 'farm_cash_ledger_order_sync'
+
 
 class PurchaseOrder(models.Model):
-    _inherit = 'purchase.order'
+    _inherit = ['purchase.order', 'farm.cash.ledger.mixin', 'farm.expense.report.source.mixin']
+
+    _cash_ledger_amount_field = 'amount_total'
+    _cash_ledger_trigger_fields = ('state', 'date_order', 'order_line')
+    _expense_report_trigger_fields = ('name', 'state', 'date_order', 'farm_field_id', 'order_line')
 
     farm_field_id = fields.Many2one('farm.field', string='Sahə', required=True)
 
+    def _cash_ledger_entry(self):
+        """Təsdiqlənmiş sifariş xərc hesabatında hər sətir üçün bir dəfə görünür"""
+        self.ensure_one()
+        if self.state not in ('purchase', 'done') or not self.date_order:
+            return None
+        return 'expense', self.amount_total * max(len(self.order_line), 1)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        return super(PurchaseOrder, self.with_context(**{ORDER_LEDGER_SYNC_CONTEXT: True})).create(vals_list)
+
+    def write(self, vals):
+        return super(PurchaseOrder, self.with_context(**{ORDER_LEDGER_SYNC_CONTEXT: True})).write(vals)
+
+    def unlink(self):
+        return super(PurchaseOrder, self.with_context(**{ORDER_LEDGER_SYNC_CONTEXT: True})).unlink()
+
 
 class PurchaseOrderLine(models.Model):
-    _inherit = 'purchase.order.line'
+    _inherit = ['purchase.order.line', 'farm.expense.report.source.mixin']
+
+    # Sətirlər sifarişin cəmini və kateqoriyasını dəyişir
+    _expense_report_parent_field = 'order_id'
+    _expense_report_trigger_fields = (
+        'order_id', 'product_id', 'product_qty', 'price_unit', 'discount', 'taxes_id',
+    )
 
     stock_qty_available = fields.Float(
         string='Anbarda Mövcud',
@@ -23,12 +53,47 @@ class PurchaseOrderLine(models.Model):
         help='Məhsulun vahid çəkisi'
     )
 
+    # Sifarişin kassa təsirini (cəm × sətir sayı) dəyişən sətir sahələri
+    _cash_ledger_order_fields = ('order_id', 'product_qty', 'price_unit', 'discount', 'taxes_id')
+
+    def _cash_ledger_apply_orders(self, orders, sign):
+        """Sətir birbaşa dəyişəndə (idxal, RPC) sifarişlərin kassa təsirini çıxarır/əlavə edir"""
+        if orders and not self.env.context.get(ORDER_LEDGER_SYNC_CONTEXT):
+            self.env['farm.cash.ledger']._apply(orders.exists()._cash_ledger_deltas(sign))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        default_order_id = self.env.context.get('default_order_id')
+        orders = self.env['purchase.order'].browse(
+            {vals.get('order_id') or default_order_id for vals in vals_list} - {None, False})
+        self._cash_ledger_apply_orders(orders, -1)
+        lines = super().create(vals_list)
+        self._cash_ledger_apply_orders(orders, 1)
+        return lines
+
+    def write(self, vals):
+        if not set(self._cash_ledger_order_fields).intersection(vals):
+            return super().write(vals)
+        orders = self.order_id
+        if vals.get('order_id'):
+            orders |= self.env['purchase.order'].browse(vals['order_id'])
+        self._cash_ledger_apply_orders(orders, -1)
+        result = super().write(vals)
+        self._cash_ledger_apply_orders(orders, 1)
+        return result
+
+    def unlink(self):
+        orders = self.order_id
+        self._cash_ledger_apply_orders(orders, -1)
+        result = super().unlink()
+        self._cash_ledger_apply_orders(orders, 1)
+        return result
+
     @api.depends('product_id')
     def _compute_stock_qty_available(self):
+        # Bütün sifariş sətirlərinin məhsulları üçün bir stock.quant sorğusu
+        available = self.env['farm.stock.availability']._get_available_qty(self.product_id)
         for line in self:
-            if line.product_id:
-                line.stock_qty_available = line.product_id.qty_available
-            else:
-                line.stock_qty_available = 0
+            line.stock_qty_available = available.get(line.product_id.id, 0.0)
     
 
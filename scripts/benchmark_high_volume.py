@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Yüksək həcm rejiminin ağac yaratma sürətinə təsiri
+
+Odoo shell ilə işə salınır (bütün dəyişikliklər sonda geri qaytarılır):
+
+    FARM_BENCH_TREES=100000 odoo-bin shell -d <baza> < scripts/benchmark_high_volume.py
+
+Eyni sayda ağac əvvəl adi rejimdə (chatter mesajı, izləyici), sonra yüksək
+həcm rejimində (farm_high_volume=True) yaradılır; hər biri üçün müddət,
+saniyədə qeyd sayı və yazılan mail.message/mail.followers sətirləri çap edilir.
+"""
+
+import os
+import time
+
+from odoo.tools import split_every
+
+TREE_COUNT = int(os.environ.get('FARM_BENCH_TREES', 100000))
+BATCH_SIZE = 5000
+TREES_PER_ROW = 100
+
+
+def _table_count(table):
+    env.cr.execute("SELECT COUNT(*) FROM %s" % table)  # noqa: F821 (odoo shell)
+    return env.cr.fetchone()[0]  # noqa: F821
+
+
+def _create_trees(label, context):
+    field = env['farm.field'].create({'name': f'Benchmark {label}'})  # noqa: F821
+    parcel = env['farm.parcel'].create({  # noqa: F821
+        'name': f'Benchmark {label}',
+        'field_id': field.id,
+        'max_trees_per_row': TREES_PER_ROW,
+    })
+    rows = env['farm.row'].with_context(**context).create([{  # noqa: F821
+        'name': f'{label}-C{number}',
+        'field_id': field.id,
+        'parcel_id': parcel.id,
+    } for number in range(TREE_COUNT // TREES_PER_ROW + 1)])
+    variety = env['farm.variety'].search([], limit=1) or env['farm.variety'].create({  # noqa: F821
+        'name': 'Benchmark',
+        'fruit_species': 'Benchmark',
+        'fruit_type': 'Benchmark',
+    })
+    vals_list = [{
+        'name': f'{label}-A{number}',
+        'field_id': field.id,
+        'parcel_id': parcel.id,
+        'row_id': rows[number // TREES_PER_ROW].id,
+        'variety_id': variety.id,
+    } for number in range(TREE_COUNT)]
+
+    env.flush_all()  # noqa: F821
+    messages, followers = _table_count('mail_message'), _table_count('mail_followers')
+    started = time.perf_counter()
+    Tree = env['farm.tree'].with_context(**context)  # noqa: F821
+    for batch in split_every(BATCH_SIZE, vals_list, list):
+        Tree.create(batch)
+        env.flush_all()  # noqa: F821
+        env.invalidate_all()  # noqa: F821
+    elapsed = time.perf_counter() - started
+    print(f'{label:>12}: {TREE_COUNT} ağac {elapsed:.1f} s ({TREE_COUNT / elapsed:.0f} ağac/s), '
+          f'mail.message +{_table_count("mail_message") - messages}, '
+          f'mail.followers +{_table_count("mail_followers") - followers}')
+
+
+try:
+    _create_trees('adi rejim', {})
+    _create_trees('yüksək həcm', {'farm_high_volume': True})
+finally:
+    env.cr.rollback()  # noqa: F821
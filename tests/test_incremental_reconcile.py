@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import fields
+from odoo.fields import Command
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestIncrementalReconcile(TransactionCase):
+    """Artımla yenilənən cəmlər tam yenidən hesablama ilə üst-üstə düşməlidir
+
+    Kassa reyestri, işçi statistikası və soyuducu yükü/yer doluluğu
+    yaradılma, dəyişmə, silmə və kaskad silmədən sonra gecəlik
+    üzləşdirmənin düzəldəcəyi heç nə qalmamalıdır.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.farm_field = cls.env['farm.field'].create({'name': 'Test Sahəsi'})
+        cls.worker = cls.env['farm.worker'].create({
+            'name': 'Test İşçi',
+            'employee_code': 'TEST001',
+            'salary': 500.0,
+        })
+        # Xərclərin balans yoxlanışı üçün kassaya mədaxil
+        cls.env['farm.cash.flow'].create({
+            'name': 'Başlanğıc Mədaxil',
+            'transaction_type': 'income',
+            'amount': 100000.0,
+        })
+
+    def assertLedgerReconciled(self):
+        self.env.flush_all()
+        self.assertEqual(self.env['farm.cash.ledger']._reconcile(), [])
+
+    def assertWorkerStatisticsReconciled(self):
+        self.env.flush_all()
+        self.assertEqual(self.env['farm.worker']._reconcile_statistics(), [])
+        # İşçi sətirləri cədvəli də mənbə sətirləri ilə eyni olmalıdır
+        query = """
+            SELECT line_model, line_id, worker_id, operation_model, operation_id, date, field_id, amount
+            FROM farm_operation_worker ORDER BY line_model, line_id
+        """
+        self.env.cr.execute(query)
+        lines = self.env.cr.fetchall()
+        self.env['farm.operation.worker']._reconcile()
+        self.env.cr.execute(query)
+        self.assertEqual(self.env.cr.fetchall(), lines)
+
+    def _occupancy_state(self):
+        self.env.cr.execute("SELECT id, current_load_kg FROM farm_cooler ORDER BY id")
+        loads = self.env.cr.fetchall()
+        self.env.cr.execute("SELECT id FROM farm_cooler_slot WHERE occupied ORDER BY id")
+        return loads, self.env.cr.fetchall()
+
+    def assertOccupancyReconciled(self):
+        self.env.flush_all()
+        state = self._occupancy_state()
+        self.env['farm.cooler']._reconcile_occupancy()
+        self.assertEqual(self._occupancy_state(), state)
+
+    def test_cash_flow_ledger(self):
+        flow = self.env['farm.cash.flow'].create({
+            'name': 'Test Məxaric',
+            'transaction_type': 'expense',
+            'amount': 300.0,
+        })
+        flow.write({'amount': 450.0})
+        flow.write({'transaction_type': 'subsidy'})
+        self.assertLedgerReconciled()
+        flow.unlink()
+
+        founder = self.env['farm.founder'].create({'name': 'Test Təsisçi'})
+        expense = self.env['farm.founder.expense'].create({
+            'name': 'Test Ödəmə',
+            'founder_id': founder.id,
+            'amount': 200.0,
+        })
+        expense.write({'amount': 250.0})
+        investment = self.env['farm.founder.investment'].create({
+            'name': 'Test İnvestisiya',
+            'founder_id': founder.id,
+            'amount': 1000.0,
+        })
+        self.assertLedgerReconciled()
+        investment.unlink()
+        expense.unlink()
+        self.assertLedgerReconciled()
+
+    def test_purchase_order_ledger(self):
+        partner = self.env['res.partner'].create({'name': 'Test Təchizatçı'})
+        product = self.env['product.product'].create({'name': 'Test Gübrə', 'type': 'consu'})
+        order = self.env['purchase.order'].create({
+            'partner_id': partner.id,
+            'farm_field_id': self.farm_field.id,
+            'order_line': [
+                Command.create({'product_id': product.id, 'product_qty': 2.0, 'price_unit': 100.0}),
+                Command.create({'product_id': product.id, 'product_qty': 1.0, 'price_unit': 30.0}),
+            ],
+        })
+        order.order_line[1].unlink()
+        order.button_confirm()
+        self.assertLedgerReconciled()
+
+        # Sətirlər sifarişdən keçmədən birbaşa dəyişdirilir (idxal, RPC)
+        line = order.order_line
+        line.write({'price_unit': 120.0})
+        self.env['purchase.order.line'].create({
+            'order_id': order.id,
+            'product_id': product.id,
+            'product_qty': 1.0,
+            'price_unit': 50.0,
+        })
+        self.assertLedgerReconciled()
+
+        order.write({'order_line': [Command.update(line.id, {'product_qty': 3.0})]})
+        self.assertLedgerReconciled()
+
+        order.button_cancel()
+        order.unlink()
+        self.assertLedgerReconciled()
+
+    def test_worker_lines(self):
+        other_worker = self.env['farm.worker'].create({
+            'name': 'Test İşçi 2',
+            'employee_code': 'TEST002',
+            'salary': 500.0,
+        })
+        plowing = self.env['farm.plowing'].create({
+            'field_id': self.farm_field.id,
+            'worker_line_ids': [
+                Command.create({'worker_id': self.worker.id, 'amount': 40.0}),
+                Command.create({'worker_id': self.worker.id, 'amount': 60.0}),
+            ],
+        })
+        self.assertEqual(self.worker.total_operations, 2)
+        self.assertEqual(self.worker.total_earned, 100.0)
+
+        first_line, second_line = plowing.worker_line_ids
+        first_line.write({'amount': 50.0})
+        second_line.write({'worker_id': other_worker.id})
+        plowing.write({'operation_date': fields.Datetime.now() - timedelta(days=40)})
+        self.env['farm.worker.payment'].create({'worker_id': self.worker.id, 'amount': 30.0})
+        self.assertWorkerStatisticsReconciled()
+        self.assertLedgerReconciled()
+
+        # Bağlanışdan sonra tarixə balans statistikadakı balansla eynidir
+        self.env['farm.worker.period']._close_periods()
+        today = fields.Date.context_today(self.worker)
+        self.assertEqual(self.worker._balance_at(today)[self.worker.id], self.worker.balance)
+
+        plowing.write({'worker_line_ids': [Command.delete(first_line.id)]})
+        self.assertWorkerStatisticsReconciled()
+        self.assertEqual(self.worker._balance_at(today)[self.worker.id], self.worker.balance)
+
+        # Sahə silinəndə əməliyyatlar və işçi sətirləri kaskadla silinir
+        removed_field = self.env['farm.field'].create({'name': 'Silinən Sahə'})
+        self.env['farm.plowing'].create({
+            'field_id': removed_field.id,
+            'worker_line_ids': [Command.create({'worker_id': self.worker.id, 'amount': 70.0})],
+        })
+        removed_field.unlink()
+        self.assertWorkerStatisticsReconciled()
+        self.assertLedgerReconciled()
+
+        # İşçi silinəndə sətirləri kaskadla silinir
+        other_worker.unlink()
+        self.assertWorkerStatisticsReconciled()
+        self.assertLedgerReconciled()
+
+    def test_cooler_occupancy(self):
+        Cooler = self.env['farm.cooler']
+        cooler = Cooler.create({
+            'name': 'Test Soyuducu',
+            'capacity_kg': 5000.0,
+            'section_count': 2,
+            'positions_per_section': 2,
+        })
+        other_cooler = Cooler.create({
+            'name': 'Test Soyuducu 2',
+            'capacity_kg': 5000.0,
+            'section_count': 1,
+            'positions_per_section': 2,
+        })
+        pallets = self.env['farm.pallet'].create([{'name': f'Test Palet {index}'} for index in range(4)])
+        storages = self.env['farm.cold.storage'].create([{
+            'pallet_id': pallets[0].id,
+            'cooler_id': cooler.id,
+            'quantity_kg': 250.0,
+            'storage_section': '1',
+            'storage_position': '1',
+        }, {
+            'pallet_id': pallets[1].id,
+            'cooler_id': cooler.id,
+            'quantity_kg': 500.0,
+            'storage_section': '1',
+            'storage_position': '2',
+            'worker_line_ids': [Command.create({'worker_id': self.worker.id, 'amount': 15.0})],
+        }, {
+            'pallet_id': pallets[2].id,
+            'cooler_id': cooler.id,
+            'quantity_kg': 125.0,
+            'storage_section': '2',
+            'storage_position': '1',
+            'worker_line_ids': [Command.create({'worker_id': self.worker.id, 'amount': 20.0})],
+        }])
+        self.assertEqual(cooler.current_load_kg, 875.0)
+        self.assertEqual(cooler.free_slot_count, 1)
+        self.assertOccupancyReconciled()
+
+        # Yer, miqdar və soyuducu dəyişir
+        storages[0].write({'storage_section': '2', 'storage_position': '2'})
+        storages[1].write({'quantity_kg': 400.0})
+        storages[2].write({'cooler_id': other_cooler.id, 'storage_section': '1', 'storage_position': '1'})
+        self.assertEqual(cooler.current_load_kg, 650.0)
+        self.assertEqual(other_cooler.current_load_kg, 125.0)
+        self.assertOccupancyReconciled()
+
+        # Göndərilən və arxivlənən paletlər soyuducudan çıxır
+        storages[0].write({'status': 'shipped'})
+        storages[1].action_archive()
+        self.assertEqual(cooler.current_load_kg, 0.0)
+        self.assertOccupancyReconciled()
+
+        # Palet silinəndə soyuducu anbarı qeydi kaskadla silinir
+        pallets[2].unlink()
+        self.assertEqual(other_cooler.current_load_kg, 0.0)
+        self.assertOccupancyReconciled()
+        self.assertWorkerStatisticsReconciled()
+
+        storage = self.env['farm.cold.storage'].create({
+            'pallet_id': pallets[3].id,
+            'cooler_id': cooler.id,
+            'quantity_kg': 100.0,
+            'storage_section': '1',
+            'storage_position': '1',
+        })
+        self.assertOccupancyReconciled()
+        storage.unlink()
+        self.assertEqual(cooler.current_load_kg, 0.0)
+        self.assertOccupancyReconciled()
+
+        # Soyuducu silinəndə arxivlənmiş qeydlər də kaskadla silinir
+        cooler.unlink()
+        self.assertOccupancyReconciled()
+        self.assertWorkerStatisticsReconciled()
+        self.assertLedgerReconciled()
@@ -1,3 +1,5 @@
 from . import farm_field_wizard
 from . import farm_row_wizard
 from . import farm_tree_wizard
+from . import farm_payroll_wizard
+from . import farm_cooler_reading_wizard
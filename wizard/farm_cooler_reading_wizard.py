@@ -0,0 +1,36 @@
+import base64
+import os
+
+from odoo import models, fields
+from odoo.exceptions import UserError
+
+from ..models.farm_cooler_reading import READING_FORMATS
+
+
+class FarmCoolerReadingWizard(models.TransientModel):
+    """Soyuducu ölçmələrinin fayldan toplu yüklənməsi (CSV/JSON)"""
+    _name = 'farm.cooler.reading.wizard'
+    _description = 'Soyuducu Ölçmələrinin Yüklənməsi'
+
+    reading_file = fields.Binary('Ölçmə Faylı', required=True)
+    file_name = fields.Char('Fayl Adı')
+
+    def action_import(self):
+        self.ensure_one()
+        file_format = os.path.splitext(self.file_name or '')[1].lower().lstrip('.')
+        if file_format not in READING_FORMATS:
+            raise UserError('Ölçmə faylı CSV və ya JSON formatında olmalıdır!')
+        Reading = self.env['farm.cooler.reading']
+        rows = Reading._parse_rows(base64.b64decode(self.reading_file), file_format)
+        count = Reading._ingest(rows)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Uğurlu!',
+                'message': f'{count} ölçmə yükləndi ({len(rows) - count} təkrar və ya köhnə ölçmə ötürüldü).',
+                'type': 'success',
+                'sticky': False,
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
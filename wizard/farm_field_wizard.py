@@ -1,5 +1,13 @@
+import logging
+
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+# Avto sahədə bir create çağırışında yaradılan maksimum qeyd sayı
+CREATE_BATCH_SIZE = 5000
 
 
 class FarmFieldWizard(models.TransientModel):
@@ -56,70 +64,100 @@ class FarmFieldWizard(models.TransientModel):
             if record.create_trees and not record.variety_id:
                 raise ValidationError('Ağac yaradılacaqsa sort seçilməlidir!')
 
+    def _get_tree_counter_start(self):
+        """Bütün sahələrdəki son ağac nömrəsindən sonrakı nömrə"""
+        last_tree = self.env['farm.tree'].search([], order='tree_id desc', limit=1)
+        if last_tree and last_tree.tree_id:
+            try:
+                # Son ağacın nömrəsini götür (məsələn: S1-P1-C1-A5 -> 5)
+                parts = last_tree.tree_id.split('-A')
+                if len(parts) == 2:
+                    return int(parts[1]) + 1
+            except (ValueError, IndexError):
+                pass
+        return 1
+
+    def _create_in_batches(self, model_name, vals_list, label):
+        """Qeydləri hissə-hissə toplu yaradır və irəliləyişi loga yazır"""
+        Model = self.env[model_name].with_context(
+            tracking_disable=True, mail_create_nolog=True, mail_create_nosubscribe=True)
+        total = len(vals_list)
+        record_ids = []
+        for batch in split_every(CREATE_BATCH_SIZE, vals_list, list):
+            records = Model.create(batch)
+            record_ids.extend(records.ids)
+            # Yaddaşı məhdud saxlamaq üçün hər hissədən sonra keşi təmizlə
+            self.env.flush_all()
+            records.invalidate_recordset()
+            _logger.info('Avto Sahə: %s yaradılır %s/%s', label, len(record_ids), total)
+        return self.env[model_name].browse(record_ids)
+
     def action_create_field(self):
-        """Sahə və bütün strukturunu yarat"""
+        """Sahə və bütün strukturunu yarat
+
+        Hər səviyyə (parsel, cərgə, ağac) dəyərləri yaddaşda hazırlanaraq
+        bir neçə toplu create ilə yaradılır.
+        """
         self.ensure_one()
+        if self.create_trees and not self.variety_id:
+            raise ValidationError('Ağac yaradılacaqsa sort seçilməlidir!')
         
         # 1. Sahəni yarat
         field = self.env['farm.field'].create({
             'name': self.field_name,
             'description': f'Sihirbaz ilə yaradılmış sahə - {self.parcel_count} parsel, {self.rows_per_parcel} cərgə/parsel'
         })
+        if not field.code:
+            self.env['farm.parcel']._ensure_field_code(field)
         
-        total_trees = 0
+        # 2. Parselləri yarat (yeni sahədə kodlar 1-dən başlayır)
+        parcels = self._create_in_batches('farm.parcel', [{
+            'field_id': field.id,
+            'name': f'Parsel {parcel_num}',
+            'code': f'{field.code}-P{parcel_num}',
+            'area_hectare': self.area_per_parcel,
+            'max_trees_per_row': self.max_trees_per_row,
+            'soil_depth': self.soil_depth,
+            'irrigation_available': self.irrigation_available,
+        } for parcel_num in range(1, self.parcel_count + 1)], 'parsellər')
         
-        # Bütün sahədəki son ağac nömrəsini tap
-        last_tree = self.env['farm.tree'].search([], order='tree_id desc', limit=1)
-        tree_counter = 1
-        if last_tree and last_tree.tree_id:
-            try:
-                # Son ağacın nömrəsini götür (məsələn: S1-P1-C1-A5 -> 5)
-                parts = last_tree.tree_id.split('-A')
-                if len(parts) == 2:
-                    tree_counter = int(parts[1]) + 1
-            except (ValueError, IndexError):
-                tree_counter = 1
-        
-        # 2. Parselləri yarat
-        for parcel_num in range(1, self.parcel_count + 1):
-            parcel = self.env['farm.parcel'].create({
-                'field_id': field.id,
-                'name': f'Parsel {parcel_num}',
-                'area_hectare': self.area_per_parcel,
-                'max_trees_per_row': self.max_trees_per_row,
-                'soil_depth': self.soil_depth,
-                'irrigation_available': self.irrigation_available,
-            })
-            
-            # 3. Cərgələri yarat
+        # 3. Cərgələri yarat
+        row_vals_list = []
+        for parcel in parcels:
             for row_num in range(1, self.rows_per_parcel + 1):
-                row = self.env['farm.row'].create({
+                row_vals_list.append({
+                    'field_id': field.id,
                     'parcel_id': parcel.id,
-                    'name': f'Cərgə {row_num}',
+                    # Cərgə adları sahədə unikal olmalıdır - ad koddan götürülür
+                    'name': f'{parcel.code}-C{row_num}',
+                    'code': f'{parcel.code}-C{row_num}',
+                    'sequence': row_num,
                     'length_meter': self.row_length,
                     'tree_spacing': self.tree_spacing,
                 })
-                
-                # 4. Ağacları yarat (əgər seçilibsə)
-                if self.create_trees:
-                    if not self.variety_id:
-                        raise ValidationError('Ağac yaradılacaqsa sort seçilməlidir!')
-                    
-                    for tree_num in range(1, self.trees_per_row + 1):
-                        # Unikal tree_id generasiya et
-                        tree_id = f'{row.code}-A{tree_counter}'
-                        tree_vals = {
-                            'row_id': row.id,
-                            'tree_id': tree_id,
-                            'name': tree_id,
-                            'field_id': field.id,
-                            'status': 'healthy',
-                            'variety_id': self.variety_id.id,
-                        }
-                        
-                        self.env['farm.tree'].create(tree_vals)
-                        total_trees += 1
-                        tree_counter += 1
+        rows = self._create_in_batches('farm.row', row_vals_list, 'cərgələr')
+        
+        # 4. Ağacları yarat (əgər seçilibsə)
+        total_trees = 0
+        if self.create_trees:
+            tree_counter = self._get_tree_counter_start()
+            tree_vals_list = []
+            for row in rows:
+                for tree_num in range(1, self.trees_per_row + 1):
+                    # Unikal tree_id generasiya et
+                    tree_id = f'{row.code}-A{tree_counter}'
+                    tree_vals_list.append({
+                        'row_id': row.id,
+                        'parcel_id': row.parcel_id.id,
+                        'field_id': field.id,
+                        'tree_id': tree_id,
+                        'name': tree_id,
+                        'sequence': tree_num,
+                        'status': 'healthy',
+                        'variety_id': self.variety_id.id,
+                    })
+                    tree_counter += 1
+            total_trees = len(self._create_in_batches('farm.tree', tree_vals_list, 'ağaclar'))
         
         # Nəticə mesajı
         message = f"""
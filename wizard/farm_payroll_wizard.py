@@ -0,0 +1,128 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError, ValidationError
+
+
+class FarmPayrollWizard(models.TransientModel):
+    """Toplu Maaş Ödənişi
+
+    Dövr üzrə işçilərin əməliyyat qazancı birləşdirilmiş işçi sətirləri
+    cədvəlindən bir qruplaşdırılmış sorğu ilə hesablanır, ödənişlər isə
+    izləmə (chatter) söndürülərək bir toplu create ilə yaradılır.
+    """
+    _name = 'farm.payroll.wizard'
+    _description = 'Toplu Maaş Ödənişi'
+
+    date_from = fields.Date('Başlanğıc Tarixi', required=True,
+                            default=lambda self: fields.Date.context_today(self).replace(day=1))
+    date_to = fields.Date('Son Tarix', required=True, default=fields.Date.context_today)
+    payment_date = fields.Date('Ödəniş Tarixi', required=True, default=fields.Date.context_today)
+    payment_type = fields.Selection([
+        ('salary', 'Maaş'),
+        ('daily', 'Günlük'),
+        ('bonus', 'Bonus'),
+        ('advance', 'Avans'),
+        ('other', 'Digər')
+    ], string='Ödəniş Növü', required=True, default='daily')
+    reference = fields.Char('İstinad', compute='_compute_reference', store=True, readonly=False, required=True,
+                            help='Eyni istinadla artıq edilmiş ödənişlər ödəniləcək məbləğdən çıxılır')
+    worker_ids = fields.Many2many('farm.worker', string='İşçilər',
+                                  help='Boş qalsa dövrdə qazancı olan bütün aktiv işçilər')
+    line_ids = fields.One2many('farm.payroll.wizard.line', 'wizard_id', string='Ödəniş Sətirləri')
+    total_amount = fields.Float('Cəmi Ödəniş', compute='_compute_total_amount')
+
+    @api.depends('date_from', 'date_to')
+    def _compute_reference(self):
+        for wizard in self:
+            wizard.reference = f'MAAŞ/{wizard.date_from or ""}/{wizard.date_to or ""}'
+
+    @api.depends('line_ids.amount')
+    def _compute_total_amount(self):
+        for wizard in self:
+            wizard.total_amount = sum(wizard.line_ids.mapped('amount'))
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for wizard in self:
+            if wizard.date_from > wizard.date_to:
+                raise ValidationError('Başlanğıc tarixi son tarixdən böyük ola bilməz!')
+
+    def _get_payroll_amounts(self):
+        """Dövrün qazancı və bu istinadla ödənilmiş məbləğ: {işçi: (say, qazanc, ödənilmiş)}"""
+        self.ensure_one()
+        domain = [
+            ('date', '>=', self.date_from),
+            ('date', '<=', self.date_to),
+            ('worker_id.active', '=', True),
+        ]
+        if self.worker_ids:
+            domain.append(('worker_id', 'in', self.worker_ids.ids))
+        earned = {
+            worker: (count, amount)
+            for worker, count, amount in self.env['farm.operation.worker']._read_group(
+                domain, ['worker_id'], ['__count', 'amount:sum'])
+        }
+        paid = dict(self.env['farm.worker.payment']._read_group(
+            [('reference', '=', self.reference), ('worker_id', 'in', [worker.id for worker in earned])],
+            ['worker_id'], ['amount:sum']))
+        return {
+            worker: (count, amount, paid.get(worker, 0.0))
+            for worker, (count, amount) in earned.items()
+        }
+
+    def action_compute(self):
+        """Ödəniləcək məbləğləri hesabla"""
+        self.ensure_one()
+        amounts = self._get_payroll_amounts()
+        balances = self.env['farm.worker'].browse([worker.id for worker in amounts])._balance_at(self.date_to)
+        self.line_ids = [(5,)] + [(0, 0, {
+            'worker_id': worker.id,
+            'operation_count': count,
+            'earned': earned,
+            'paid': paid,
+            'amount': max(earned - paid, 0.0),
+            'balance': balances.get(worker.id, 0.0),
+        }) for worker, (count, earned, paid) in sorted(amounts.items(), key=lambda item: item[0].name or '')]
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_confirm(self):
+        """Ödənişləri toplu yarat"""
+        self.ensure_one()
+        lines = self.line_ids.filtered(lambda line: line.amount > 0)
+        if not lines:
+            raise UserError('Ödəniləcək məbləğ yoxdur! Əvvəlcə məbləğləri hesablayın.')
+        payments = self.env['farm.worker.payment'].with_context(farm_high_volume=True).create([{
+            'worker_id': line.worker_id.id,
+            'payment_date': self.payment_date,
+            'amount': line.amount,
+            'payment_type': self.payment_type,
+            'reference': self.reference,
+            'description': f'Toplu ödəniş: {self.date_from} - {self.date_to}, {line.operation_count} əməliyyat',
+        } for line in lines])
+        return {
+            'name': 'İşçi Ödənişləri',
+            'type': 'ir.actions.act_window',
+            'view_mode': 'list,form',
+            'res_model': 'farm.worker.payment',
+            'domain': [('id', 'in', payments.ids)],
+        }
+
+
+class FarmPayrollWizardLine(models.TransientModel):
+    """Toplu Maaş Ödənişi Sətri"""
+    _name = 'farm.payroll.wizard.line'
+    _description = 'Toplu Maaş Ödənişi Sətri'
+
+    wizard_id = fields.Many2one('farm.payroll.wizard', string='Sihirbaz', required=True, ondelete='cascade')
+    worker_id = fields.Many2one('farm.worker', string='İşçi', required=True)
+    operation_count = fields.Integer('Əməliyyat Sayı', readonly=True)
+    earned = fields.Float('Dövrün Qazancı', readonly=True)
+    paid = fields.Float('Artıq Ödənilib', readonly=True)
+    amount = fields.Float('Ödəniləcək Məbləğ')
+    balance = fields.Float('Son Tarixə Balans', readonly=True,
+                           help='İşçinin dövrün son tarixinin sonuna ümumi balansı (bağlanmış aylar + açıq dövr)')
@@ -93,13 +93,39 @@ class FarmRowWizard(models.TransientModel):
             return
         
         field_id = self.parcel_id.field_id.id
-        for name in names_to_check:
-            existing_row = self.env['farm.row'].search([
-                ('name', '=', name),
-                ('parcel_id.field_id', '=', field_id)
-            ])
-            if existing_row:
-                raise ValidationError(f'Bu sahədə "{name}" adlı çərgə artıq mövcuddur! Fərqli ad seçin.')
+        existing_row = self.env['farm.row'].search_fetch([
+            ('name', 'in', names_to_check),
+            ('parcel_id.field_id', '=', field_id)
+        ], ['name'], limit=1)
+        if existing_row:
+            raise ValidationError(f'Bu sahədə "{existing_row.name}" adlı çərgə artıq mövcuddur! Fərqli ad seçin.')
+
+    def _prepare_tree_vals(self, rows):
+        """Cərgələr üçün ağac dəyərlərini hazır ad, kod və sıra ilə hazırla"""
+        tree_vals_list = []
+        for row in rows:
+            for tree_num in range(1, self.trees_per_row + 1):
+                tree_name = f"{row.name}-A{tree_num}"
+                tree_vals_list.append({
+                    'row_id': row.id,
+                    'parcel_id': row.parcel_id.id,
+                    'field_id': row.field_id.id,
+                    'name': tree_name,
+                    'tree_id': f'{row.code}-{tree_name}',
+                    'sequence': tree_num,
+                    'variety_id': self.tree_variety_id.id,
+                    'status': 'healthy',
+                    'description': f'{row.name} çərgəsindəki {tree_num} nömrəli ağac',
+                })
+        return tree_vals_list
+
+    def _check_tree_code_uniqueness(self, codes):
+        """Ağac kodlarının unikallığını bir sorğu ilə yoxla"""
+        if not codes:
+            return
+        existing = self.env['farm.tree'].search_fetch([('tree_id', 'in', codes)], ['tree_id'], limit=1)
+        if existing:
+            raise ValidationError(f'"{existing.tree_id}" kodlu ağac artıq mövcuddur! Fərqli ad seçin.')
 
     def action_create_rows(self):
         """Cərgələri yarat"""
@@ -166,21 +192,14 @@ class FarmRowWizard(models.TransientModel):
         created_rows = self.env['farm.row'].create(rows_to_create)
         
         total_trees = 0
-        # Ağaclar yaradılacaqsa
+        # Ağaclar yaradılacaqsa - hamısı bir toplu create ilə
         if self.create_trees and self.tree_variety_id:
-            for row in created_rows:
-                for tree_num in range(1, self.trees_per_row + 1):
-                    tree_name = f"{row.name}-A{tree_num}"
-                    self.env['farm.tree'].create({
-                        'row_id': row.id,
-                        'parcel_id': row.parcel_id.id,
-                        'field_id': row.field_id.id,
-                        'name': tree_name,
-                        'variety_id': self.tree_variety_id.id,
-                        'status': 'healthy',
-                        'description': f'{row.name} çərgəsindəki {tree_num} nömrəli ağac',
-                    })
-                    total_trees += 1
+            tree_vals_list = self._prepare_tree_vals(created_rows)
+            self._check_tree_code_uniqueness([vals['tree_id'] for vals in tree_vals_list])
+            trees = self.env['farm.tree'].with_context(
+                tracking_disable=True, mail_create_nolog=True, mail_create_nosubscribe=True,
+            ).create(tree_vals_list)
+            total_trees = len(trees)
         
         # Nəticə mesajı
         created_count = len(created_rows)
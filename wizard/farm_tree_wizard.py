@@ -99,13 +99,12 @@ class FarmTreeWizard(models.TransientModel):
         if not self.row_id:
             return
         
-        for name in names_to_check:
-            existing_tree = self.env['farm.tree'].search([
-                ('name', '=', name),
-                ('row_id', '=', self.row_id.id)
-            ])
-            if existing_tree:
-                raise ValidationError(f'Bu cərgədə "{name}" adlı ağac artıq mövcuddur! Fərqli ad seçin.')
+        existing_tree = self.env['farm.tree'].search_fetch([
+            ('name', 'in', names_to_check),
+            ('row_id', '=', self.row_id.id)
+        ], ['name'], limit=1)
+        if existing_tree:
+            raise ValidationError(f'Bu cərgədə "{existing_tree.name}" adlı ağac artıq mövcuddur! Fərqli ad seçin.')
 
     def _generate_tree_name(self, prefix, number):
         """Ağac adı generasiya et"""